@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench.py — enhance.py 离线吞吐基准：真实调度 / ComboLimiter / 重试逻辑 + MockBackend
+
+用法：
+  python ai/bench.py --data data/2025-08-08.jsonl --keys 4 --speedup 120
+  python ai/bench.py --data data/2025-08-08.jsonl --malformed-rate 0.05 --transient-rate 0.02 --json bench.json
+
+--speedup N 表示 1 个“模拟分钟”在真实世界只需 60/N 秒：限速间隔、退避等待、模拟延迟与
+服务端 RPM 窗口同比例压缩；报告中的时间均换算回模拟时间。
+"""
+
+import os, sys, json, time, random, argparse, asyncio
+
+import enhance
+from mock_backend import MockBackend, MockConfig
+
+def cli():
+    ap = argparse.ArgumentParser(description="Offline throughput benchmark for enhance.py")
+    ap.add_argument("--data", required=True)
+    ap.add_argument("--limit", type=int, default=0, help="只取前 N 篇（0 = 全部）")
+    ap.add_argument("--keys", type=int, default=3, help="模拟 Key 数量")
+    ap.add_argument("--models", default=os.getenv("MODEL_PRIORITY_LIST") or ",".join(list(enhance.FREE)[:3]))
+    ap.add_argument("--language", default="Chinese")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--speedup", type=float, default=60.0)
+    ap.add_argument("--latency", default=MockConfig.latency)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--rpm", type=int, default=None)
+    ap.add_argument("--rpd", type=int, default=None)
+    ap.add_argument("--transient-rate", type=float, default=0.0)
+    ap.add_argument("--exhausted-rate", type=float, default=0.0)
+    ap.add_argument("--freetier-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--categories", default=os.getenv("CATEGORIES", ""))
+    ap.add_argument("--time-budget", type=float, default=0.0, help="模拟时间预算（秒，0 = 不限）")
+    ap.add_argument("--flush-margin", type=float, default=60.0)
+    ap.add_argument("--follow-plan", action="store_true", help="先做配额规划，再按规划分配模型（对比规划与实际）")
+    ap.add_argument("--plan-latency", type=float, default=None, help="规划用的延迟估计（默认取 --latency 的中位数）")
+    ap.add_argument("--telemetry", default=None, help="遥测输出前缀（同 enhance.py --telemetry，时间为模拟时间）")
+    ap.add_argument("--json", default=None, help="将结果另存为 JSON")
+    return ap.parse_args()
+
+async def bench(args) -> dict:
+    scale = 1.0 / args.speedup
+    random.seed(args.seed)   # 退避抖动同样可复现
+    enhance.TIME_SCALE = scale
+    cfg = MockConfig(latency=args.latency, seed=args.seed, time_scale=scale, rpm=args.rpm, rpd=args.rpd,
+                     transient_rate=args.transient_rate, exhausted_rate=args.exhausted_rate,
+                     freetier_rate=args.freetier_rate, malformed_rate=args.malformed_rate)
+    backend = MockBackend(cfg, quota=enhance.quota)
+    keys = [f"mock-key-{i}" for i in range(1, args.keys + 1)]
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    enhance.configure(keys, models, backend, telemetry=enhance.Telemetry(
+        args.telemetry + ".events.jsonl" if args.telemetry else None))
+
+    papers = enhance.load_papers(args.data)
+    if args.limit:
+        papers = papers[:args.limit]
+    if not papers:
+        sys.exit(f"⚠️ 输入文件无可处理数据：{args.data}")
+
+    reporter = enhance.ProgressReporter(len(papers))
+    prefs = [c.strip() for c in args.categories.split(",") if c.strip()]
+    plan = None
+    enhance.PLAN.clear()
+    if args.follow_plan:
+        latency = args.plan_latency or float(args.latency.split(":")[1])
+        plan = enhance.plan_run(papers, len(keys), models, enhance.quota,
+                                lambda p: enhance.paper_priority(p, prefs), args.concurrency, latency=latency)
+        enhance.print_plan(plan)
+        enhance.PLAN.update(plan["assign"])
+    t0 = time.monotonic()
+    await enhance.run_papers(papers, args.language, args.retries, args.concurrency, reporter, prefs=prefs,
+                             deadline=enhance.parse_deadline(None, args.time_budget), margin=args.flush_margin)
+    wall = time.monotonic() - t0
+    reporter.close()
+    enhance.finish_telemetry(args.telemetry)
+
+    sim_wall = wall / scale
+    lat = [x / scale for x in reporter.latencies]
+    requests = backend.stats["requests"]
+    return {
+        "papers": len(papers),
+        "ok": reporter.ok,
+        "error_papers": len(papers) - reporter.ok,
+        "deferred": len(reporter.deferred),
+        "keys": len(keys),
+        "models": models,
+        "concurrency": args.concurrency,
+        "wall_seconds": round(wall, 3),
+        "simulated_seconds": round(sim_wall, 1),
+        "papers_per_second": round(reporter.ok / sim_wall, 4) if sim_wall else 0.0,
+        "papers_per_hour": round(reporter.ok / sim_wall * 3600, 1) if sim_wall else 0.0,
+        "requests": requests,
+        "quota_efficiency": round(reporter.ok / requests, 4) if requests else 0.0,
+        "latency_seconds": {f"p{q}": round(enhance.percentile(lat, q), 2) for q in (50, 90, 99)}
+                           | {"max": round(max(lat, default=0.0), 2)},
+        "backend": dict(backend.stats),
+        "model_usage": dict(reporter.model_counter),
+        **({"plan": {"est_seconds": plan["est_seconds"], "projected_errors": plan["projected_errors"],
+                     "assigned": {s["model"]: s["assigned"] for s in plan["models"]}}} if plan else {}),
+        "combo_errors": {f"{m}@key{enhance.KEY_INDEX[k]}": {"calls": l.calls, "errors": l.errors, "trips": l.tripped}
+                         for (k, m), l in enhance.LIMITER.items() if l.calls or l.errors},
+    }
+
+def main():
+    args = cli()
+    report = asyncio.run(bench(args))
+    print("\n🏁 基准结果（时间为模拟时间）")
+    for k, v in report.items():
+        print(f"  {k:<20}: {v}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 结果保存至：{args.json}")
+
+if __name__ == "__main__":
+    main()
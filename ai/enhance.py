@@ -4,7 +4,10 @@
 enhance_arxiv.py — 并发 + 进度条 + 模型与 Key 编号显示 + 使用统计 + 健壮性防御
 """
 
-import os, sys, json, time, argparse, asyncio
+import os, re, sys, time, heapq, random, hashlib, argparse, asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, Tuple, Any, List, Optional
 from collections import Counter
 
@@ -13,7 +16,12 @@ from tqdm import tqdm
 from google.api_core import exceptions as gexc
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
-from structure import Structure
+from structure import Structure, partial_structure
+from telemetry import Telemetry
+from planner import plan_run, print_plan, save_plan, load_plan
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 仓库根目录：共享的 insightarxiv 包
+from insightarxiv import jsonl_io, record
+from insightarxiv.record import Paper
 
 # ───────── 1 · 自定义 LLM ──────────
 def _no_retry(f): return f
@@ -38,29 +46,67 @@ FREE = {
 quota = lambda m: next((v for p, v in FREE.items() if m.startswith(p)), (10, 250))
 
 # ───────── 3 · CLI & ENV ──────────
-def cli():
+def cli(argv=None):
     ap = argparse.ArgumentParser(description="Enhance arXiv JSONL with Gemini")
     ap.add_argument("--data", required=True)
     ap.add_argument("--language", default="Chinese")
     ap.add_argument("--retries", type=int, default=3)
     ap.add_argument("--concurrency", type=int, default=10)
-    return ap.parse_args()
+    ap.add_argument("--backend", choices=["gemini", "mock"], default=os.getenv("ENHANCE_BACKEND", "gemini"),
+                    help="LLM 后端；mock 为本地确定性模拟，无需真实 Key（ENV:ENHANCE_BACKEND）")
+    ap.add_argument("--categories", default=os.getenv("CATEGORIES", ""),
+                    help="优先处理的分类（逗号分隔，靠前者优先；ENV:CATEGORIES）")
+    ap.add_argument("--deadline", default=os.getenv("ENHANCE_DEADLINE"),
+                    help="截止时刻（ISO 8601，无时区按 UTC；ENV:ENHANCE_DEADLINE）")
+    ap.add_argument("--time-budget", type=float, default=float(os.getenv("ENHANCE_TIME_BUDGET", 0) or 0),
+                    help="本次运行的时间预算（秒，0 = 不限；ENV:ENHANCE_TIME_BUDGET）")
+    ap.add_argument("--flush-margin", type=float, default=60.0,
+                    help="距截止不足该秒数时停止派发新论文，留出收尾与写盘时间")
+    ap.add_argument("--no-cache", action="store_true", help="忽略已有输出文件中的有效结果，全部重新生成")
+    ap.add_argument("--telemetry", default=os.getenv("ENHANCE_TELEMETRY"),
+                    help="遥测输出前缀：写出 <前缀>.events.jsonl / .json / .prom（ENV:ENHANCE_TELEMETRY）")
+    ap.add_argument("--plan", nargs="?", const="", default=None, metavar="PATH",
+                    help="只做配额规划：打印并保存规划（默认 <输出>.plan.json）后退出")
+    ap.add_argument("--follow-plan", nargs="?", const="", default=None, metavar="PATH",
+                    help="按规划为每篇论文优先选用模型（文件不存在时现场规划并保存）")
+    ap.add_argument("--plan-latency", type=float, default=float(os.getenv("ENHANCE_PLAN_LATENCY", 6) or 6),
+                    help="规划用的单次请求延迟估计（秒；ENV:ENHANCE_PLAN_LATENCY）")
+    ap.add_argument("--plan-keep", default="new",
+                    help="规划时保留首选模型的小节（逗号分隔）")
+    ap.add_argument("--shard", type=parse_shard, default=os.getenv("ENHANCE_SHARD"),
+                    help="只处理第 i 个分片，格式 i/N（0 ≤ i < N，按论文 ID 的稳定哈希划分；ENV:ENHANCE_SHARD）")
+    ap.add_argument("--keys-subset", default=os.getenv("ENHANCE_KEYS_SUBSET"),
+                    help="本进程使用的 Key：1 起的编号/区间如 1,3-5；auto = 按分片轮转分配（ENV:ENHANCE_KEYS_SUBSET）")
+    return ap.parse_args(argv)
 
-dotenv.load_dotenv()
-API_KEYS = [k.strip() for k in os.getenv("GOOGLE_API_KEYS", "").split(",") if k.strip()]
-MODELS   = [m.strip() for m in os.getenv("MODEL_PRIORITY_LIST", "").split(",") if m.strip()]
-if not API_KEYS or not MODELS:
-    sys.exit("❌ 环境变量 GOOGLE_API_KEYS / MODEL_PRIORITY_LIST 未设置")
+API_KEYS: List[str] = []
+MODELS  : List[str] = []
+KEY_INDEX  : Dict[str, int] = {}
+MODEL_INDEX: Dict[str, int] = {}
+TOTAL_KEYS, TOTAL_MODELS = 0, 0
 
-KEY_INDEX   = {k: idx for idx, k in enumerate(API_KEYS, 1)}
-MODEL_INDEX = {m: idx for idx, m in enumerate(MODELS, 1)}
-TOTAL_KEYS, TOTAL_MODELS = len(API_KEYS), len(MODELS)
+# 时间缩放：基准测试中压缩限速间隔与退避等待（1.0 = 真实时间）
+TIME_SCALE = 1.0
+nap = lambda sec: asyncio.sleep(sec * TIME_SCALE)
 
-# ───────── 4 · ComboLimiter ──────────
+def load_env() -> Tuple[List[str], List[str]]:
+    dotenv.load_dotenv()
+    keys   = [k.strip() for k in os.getenv("GOOGLE_API_KEYS", "").split(",") if k.strip()]
+    models = [m.strip() for m in os.getenv("MODEL_PRIORITY_LIST", "").split(",") if m.strip()]
+    return keys, models
+
+# ───────── 4 · ComboLimiter（限速 + 熔断） ──────────
 class ComboLimiter:
+    TRIP_AFTER   = 3      # 连续失败 N 次后熔断
+    COOLDOWN     = 30.0   # 首次熔断冷却（秒），之后指数翻倍
+    MAX_COOLDOWN = 600.0
+    SHORT_HINT   = 5.0    # 服务端建议的等待不超过该值时原地等待，否则熔断并转投其他组合
+
     def __init__(self, rpm, rpd):
-        self.intv, self.rpd = 60/rpm, rpd
+        self.intv, self.rpd = 60/rpm * TIME_SCALE, rpd
         self.calls, self.next_t, self.exhaust = 0, 0.0, False
+        self.errors, self.fails, self.trips, self.tripped = 0, 0, 0, 0
+        self.open_until = 0.0
         self.lock = asyncio.Lock()
     async def __aenter__(self):
         if self.exhaust: raise RuntimeError
@@ -73,134 +119,513 @@ class ComboLimiter:
             if self.calls >= self.rpd: self.exhaust = True
     async def __aexit__(self, *_) : ...
 
-# ───────── 5 · Prompt 与 Chain 初始化 ──────────
+    def available(self) -> bool:
+        return not self.exhaust and time.monotonic() >= self.open_until
+
+    def success(self):
+        self.fails = self.trips = 0
+
+    def failure(self, hint: Optional[float] = None) -> bool:
+        """记录一次失败；触发熔断时返回 True（冷却期内 `available()` 为 False）。"""
+        self.errors += 1; self.fails += 1
+        if hint is not None and hint > self.SHORT_HINT:
+            cool = hint
+        elif self.fails >= self.TRIP_AFTER:
+            cool = min(self.MAX_COOLDOWN, self.COOLDOWN * 2 ** self.trips)
+        else:
+            return False
+        self.open_until = time.monotonic() + cool * random.uniform(1.0, 1.2) * TIME_SCALE
+        self.fails, self.trips, self.tripped = 0, self.trips + 1, self.tripped + 1
+        return True
+
+# ───────── 5 · Prompt、后端与 Chain（按需创建） ──────────
 ROOT = os.path.dirname(os.path.abspath(__file__))
-PROMPT = ChatPromptTemplate.from_messages([
-    ("system",  open(os.path.join(ROOT, "system.txt"), encoding="utf-8").read()),
-    ("human",   open(os.path.join(ROOT, "template.txt"), encoding="utf-8").read())
-])
 
-CHAINS : Dict[Tuple[str, str], Any] = {}
+FIELDS = tuple(Structure.model_fields.keys())
+PARTIAL_HINT = "\n\nOnly answer the following fields: {fields}"
+
+@lru_cache(maxsize=None)
+def prompt_template(partial: bool = False) -> ChatPromptTemplate:
+    human = open(os.path.join(ROOT, "template.txt"), encoding="utf-8").read()
+    return ChatPromptTemplate.from_messages([
+        ("system",  open(os.path.join(ROOT, "system.txt"), encoding="utf-8").read()),
+        ("human",   human + PARTIAL_HINT if partial else human)
+    ])
+
+class Backend(ABC):
+    """LLM 后端接口：为每个 (key, model) 组合构造一个支持 `await chain.ainvoke(prompt)` 的对象；
+    `fields` 非空时只需返回这些字段（缺字段追问用的精简 schema）。
+    返回值可以是解析后的对象，也可以是 `{"raw": 带 usage_metadata 的消息, "parsed": 对象}`。"""
+    name = "base"
+    @abstractmethod
+    def make_chain(self, key: str, model: str, fields: Optional[Tuple[str, ...]] = None): ...
+
+class GeminiBackend(Backend):
+    """同一 Key 下的所有模型共用一个 LLM 实例的同步 / 异步客户端（即同一条 gRPC 连接池），
+    其余模型通过 `model_copy` 仅替换模型名，不再各自建连。"""
+    name = "gemini"
+    def __init__(self):
+        self._base: Dict[str, ChatGoogleNoRetry] = {}
+
+    def _llm(self, key, model):
+        base = self._base.get(key)
+        if base is None:
+            try:   base = ChatGoogleNoRetry(model=model, google_api_key=key)
+            except TypeError:
+                base = ChatGoogleNoRetry(model=model, api_key=key)
+            base.async_client  # 在事件循环内构建异步客户端，供同 Key 的其他模型复用
+            self._base[key] = base
+            return base
+        return base.model_copy(update={"model": model if model.startswith("models/") else f"models/{model}"})
+
+    def make_chain(self, key, model, fields=None):
+        schema = partial_structure(fields) if fields else Structure
+        return prompt_template(bool(fields)) | self._llm(key, model).with_structured_output(schema, include_raw=True)
+
+def make_backend(name: str, **kw) -> Backend:
+    if name == "mock":
+        from mock_backend import MockBackend, MockConfig
+        kw.setdefault("config", MockConfig.from_spec(os.getenv("MOCK_LLM", "")))
+        return MockBackend(**kw)
+    return GeminiBackend()
+
+BACKEND: Optional[Backend] = None
+TELEMETRY = Telemetry()
+CHAINS : Dict[Tuple[str, str, Optional[Tuple[str, ...]]], Any] = {}
 LIMITER: Dict[Tuple[str, str], ComboLimiter] = {}
+PLAN   : Dict[str, list] = {}   # paper_id → [规划的首选模型, 预计开始秒数]（--follow-plan）
 
-for key in API_KEYS:
+def configure(keys: List[str], models: List[str], backend: Backend, verbose: bool = True,
+              telemetry: Optional[Telemetry] = None):
+    """注册 Key / 模型与各组合的限速器；Chain 在首次使用时才由 `get_chain` 创建。"""
+    global API_KEYS, MODELS, KEY_INDEX, MODEL_INDEX, TOTAL_KEYS, TOTAL_MODELS, BACKEND, TELEMETRY
+    API_KEYS, MODELS, BACKEND = list(keys), list(models), backend
+    TELEMETRY = telemetry or Telemetry()
+    KEY_INDEX   = {k: idx for idx, k in enumerate(API_KEYS, 1)}
+    MODEL_INDEX = {m: idx for idx, m in enumerate(MODELS, 1)}
+    TOTAL_KEYS, TOTAL_MODELS = len(API_KEYS), len(MODELS)
+    CHAINS.clear(); LIMITER.clear()
     for model in MODELS:
         rpm, rpd = quota(model)
-        LIMITER[(key, model)] = ComboLimiter(rpm, rpd)
-        try:   llm = ChatGoogleNoRetry(model=model, google_api_key=key)
-        except TypeError:
-            llm = ChatGoogleNoRetry(model=model, api_key=key)
-        CHAINS[(key, model)] = PROMPT | llm.with_structured_output(Structure)
-        print(f"✔ {model:<18} @ {key[:6]}… RPM={rpm} RPD={rpd}")
+        for key in API_KEYS:
+            LIMITER[(key, model)] = ComboLimiter(rpm, rpd)
+        if verbose:
+            print(f"✔ {model:<18} × {TOTAL_KEYS} keys RPM={rpm} RPD={rpd}")
+
+def get_chain(key: str, model: str, fields: Optional[Tuple[str, ...]] = None):
+    chain = CHAINS.get((key, model, fields))
+    if chain is None:
+        chain = CHAINS[(key, model, fields)] = BACKEND.make_chain(key, model, fields)
+    return chain
 
 # ───────── 6 · 工具函数 ──────────
 good = lambda r: all(v and str(v).strip() and v != "ERROR" for v in r.model_dump().values())
+valid = lambda v: bool(v and str(v).strip() and v != "ERROR")
 
-async def invoke(chain, prompt, lim: ComboLimiter, retries: int):
-    for _ in range(retries):
+# 缺字段追问统计：追问次数、由追问补全的论文数、复用的字段数与估算节省的输出 token
+PARTIAL_STATS = Counter()
+
+def est_tokens(text: str) -> int:
+    """粗略估算 token 数：CJK 字符按 1 个计，其余按 4 字符 1 个计。"""
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk) // 4
+
+RE_RETRY = re.compile(r"retry (?:in|after) ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.I)
+
+def retry_hint(e: Exception) -> Optional[float]:
+    """从 RetryInfo 详情、Retry-After 响应头或错误文本中提取服务端建议的等待秒数。"""
+    for d in getattr(e, "details", None) or []:
+        rd = getattr(d, "retry_delay", None)
+        if rd is not None:
+            return rd.seconds + rd.nanos / 1e9
+        if isinstance(d, dict) and (d.get("retryDelay") or d.get("retry_delay")):
+            try:    return float(str(d.get("retryDelay") or d.get("retry_delay")).rstrip("s"))
+            except ValueError: pass
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    if headers.get("Retry-After", "").strip().isdigit():
+        return float(headers["Retry-After"])
+    m = RE_RETRY.search(str(e))
+    return float(m.group(1) or m.group(2)) if m else None
+
+def daily_exhausted(e: Exception) -> bool:
+    msg = str(e)
+    return "PerDay" in msg or ("FreeTier" in msg and "PerMinute" not in msg)
+
+backoff = lambda attempt, base=1.0, cap=30.0: random.uniform(0, min(cap, base * 2 ** attempt))
+
+def unwrap(res) -> Tuple[Any, Optional[dict]]:
+    """拆出 `include_raw=True` 的结构化输出：返回 (解析结果, token 用量)。"""
+    if isinstance(res, dict) and "parsed" in res:
+        return res["parsed"], getattr(res.get("raw"), "usage_metadata", None)
+    return res, None
+
+async def invoke(chain, prompt, lim: ComboLimiter, retries: int, combo: Tuple[str, str] = ("", "")):
+    key, model = combo
+    def emit(status, attempt, t0, t1, usage=None):
+        now = time.monotonic()
+        TELEMETRY.record(model, KEY_INDEX.get(key, 0), status, attempt,
+                         latency=(now - t1) / TIME_SCALE if t1 else 0.0,
+                         wait=((t1 or now) - t0) / TIME_SCALE, usage=usage)
+
+    for attempt in range(retries):
+        if not lim.available(): raise RuntimeError
+        t0, t1 = time.monotonic(), None
         try:
             async with lim:
-                return await chain.ainvoke(prompt)
+                t1 = time.monotonic()
+                res, usage = unwrap(await chain.ainvoke(prompt))
+            lim.success()
+            emit("malformed" if res is None else "ok" if good(res) else "incomplete", attempt, t0, t1, usage)
+            return res
         except RuntimeError:
             raise
         except gexc.ResourceExhausted as e:
-            if "FreeTier" in str(e):
-                lim.exhaust = True; raise
-            await asyncio.sleep(4)
+            if daily_exhausted(e):
+                emit("exhausted", attempt, t0, t1)
+                lim.errors += 1; lim.exhaust = True; raise
+            emit("rate_limited", attempt, t0, t1)
+            hint = retry_hint(e)
+            if lim.failure(hint): raise RuntimeError
+            await nap(hint if hint is not None else backoff(attempt, 2.0))
         except Exception:
-            await asyncio.sleep(2)
+            emit("error", attempt, t0, t1)
+            if lim.failure(): raise RuntimeError
+            await nap(backoff(attempt))
     raise RuntimeError
 
 # ───────── 7 · 单篇处理 ──────────
-async def process(paper, lang, retries):
-    if not paper or not isinstance(paper, dict): return None
-    prm = {"title": paper["title"], "content": paper["summary"], "language": lang}
+async def process(paper: Paper, lang, retries):
+    if not isinstance(paper, Paper): return None
+    prm = {"title": paper.title, "content": paper.abstract, "language": lang}
+    acc: Dict[str, str] = {}   # 已拿到的有效字段；缺字段时只追问剩余部分
     last_combo = None
-    for model in MODELS:
-        for key in API_KEYS:
-            lim = LIMITER[(key, model)]
-            if lim.exhaust: continue
-            last_combo = (key, model)
-            try:
-                res = await invoke(CHAINS[(key, model)], prm, lim, retries)
-                if res and good(res):
-                    paper["AI"] = res.model_dump()
-                    return paper, last_combo
-            except (RuntimeError, gexc.ResourceExhausted):
-                continue
-    paper["AI"] = {f: "ERROR" for f in Structure.model_fields.keys()}
+    planned = (PLAN.get(paper.id) or [None])[0]
+    models = [planned] + [m for m in MODELS if m != planned] if planned in MODEL_INDEX else MODELS
+    for _ in range(max(1, retries)):
+        deferred = False   # 本轮是否有组合因熔断被跳过 / 中途熔断
+        for model in models:
+            # 同一模型下先用最早空闲的 Key，避免所有并发都排在第一个 Key 的限速队列上
+            for key in sorted(API_KEYS, key=lambda k: LIMITER[(k, model)].next_t):
+                lim = LIMITER[(key, model)]
+                if not lim.available():
+                    deferred |= not lim.exhaust
+                    continue
+                last_combo = (key, model)
+                try:
+                    while True:
+                        need = tuple(f for f in FIELDS if f not in acc)
+                        partial = need if acc else None
+                        res = await invoke(get_chain(key, model, partial),
+                                           {**prm, "fields": ", ".join(need)} if partial else prm, lim, retries,
+                                           (key, model))
+                        if partial: PARTIAL_STATS["followups"] += 1
+                        got = {f: v for f, v in (res.model_dump() if res else {}).items() if f in need and valid(v)}
+                        acc.update(got)
+                        if len(acc) == len(FIELDS):
+                            if partial:
+                                reused = [acc[f] for f in FIELDS if f not in need]
+                                PARTIAL_STATS["completed"] += 1
+                                PARTIAL_STATS["fields_reused"] += len(reused)
+                                PARTIAL_STATS["tokens_saved"] += sum(est_tokens(str(v)) for v in reused)
+                            paper.ai = {f: acc[f] for f in FIELDS}
+                            return paper, last_combo
+                        if not got: break   # 本组合没有进展，换下一个组合
+                except (RuntimeError, gexc.ResourceExhausted):
+                    deferred |= not lim.available() and not lim.exhaust
+                    continue
+        if not deferred: break
+        # 等最早结束冷却的组合恢复后再来一轮
+        reopen = min((l.open_until for l in LIMITER.values() if not l.exhaust), default=None)
+        if reopen is None: break
+        await asyncio.sleep(max(0.0, reopen - time.monotonic()))
+    paper.ai = {f: "ERROR" for f in FIELDS}
     return paper, last_combo
 
 # ───────── 8 · 进度与统计 ──────────
+def percentile(values: List[float], q: float) -> float:
+    if not values: return 0.0
+    xs = sorted(values)
+    return xs[min(len(xs) - 1, int(round(q / 100 * (len(xs) - 1))))]
+
 class ProgressReporter:
-    def __init__(self, total):
-        self.bar = tqdm(total=total, unit="paper")
+    def __init__(self, total, disable=False):
+        self.bar = tqdm(total=total, unit="paper", disable=disable)
         self.ok = 0
         self.model_counter = Counter()
         self.key_counter = Counter()
+        self.latencies: List[float] = []
+        self.cached = 0
+        self.deferred: List[Paper] = []
+
+    def hit(self, result):
+        """已有有效结果（缓存命中），不消耗配额。"""
+        self.ok += 1; self.cached += 1
+        self.bar.update()
 
-    def update(self, result, model, key):
-        if result and "AI" in result and all(v != "ERROR" for v in result["AI"].values()):
+    def defer(self, paper):
+        """截止前未能处理的论文。"""
+        self.deferred.append(paper)
+        self.bar.update()
+
+    def update(self, result, model, key, elapsed=None):
+        if result and result.ai and all(v != "ERROR" for v in result.ai.values()):
             self.ok += 1
         self.model_counter[model] += 1
         self.key_counter[key] += 1
-        self.bar.set_postfix(
-            model=f"{model}[{MODEL_INDEX[model]}/{TOTAL_MODELS}]",
-            key=f"{KEY_INDEX[key]}/{TOTAL_KEYS}·{key[:6]}"
-        )
+        if elapsed is not None:
+            self.latencies.append(elapsed)
+        if model in MODEL_INDEX and key in KEY_INDEX:
+            self.bar.set_postfix(
+                model=f"{model}[{MODEL_INDEX[model]}/{TOTAL_MODELS}]",
+                key=f"{KEY_INDEX[key]}/{TOTAL_KEYS}·{key[:6]}"
+            )
         self.bar.update()
 
     def close(self):
         self.bar.close()
-        print(f"\n✅ {self.ok}/{self.bar.total} 完成\n")
+        print(f"\n✅ {self.ok}/{self.bar.total} 完成" + (f"（其中缓存命中 {self.cached}）" if self.cached else "") + "\n")
         print("📊 模型使用分布：")
         for m, c in self.model_counter.items():
             print(f"  {m:<20} : {c}")
         print("📊 Key 使用分布：")
         for k, c in self.key_counter.items():
-            print(f"  {k[:6]}… : {c}")
+            print(f"  {str(k)[:6]}… : {c}")
+        print("📊 组合错误率：")
+        for (k, m), lim in LIMITER.items():
+            if lim.calls or lim.errors:
+                rate = lim.errors / max(lim.calls, 1)
+                state = "耗尽" if lim.exhaust else ("熔断中" if not lim.available() else "正常")
+                print(f"  {m:<20} @ key{KEY_INDEX.get(k, '?')} : {lim.errors}/{lim.calls} 错误 ({rate:.0%})"
+                      f" | 熔断 {lim.tripped} 次 | {state}")
+        if PARTIAL_STATS["followups"]:
+            print(f"🧩 缺字段追问：{PARTIAL_STATS['followups']} 次，补全 {PARTIAL_STATS['completed']} 篇，"
+                  f"复用字段 {PARTIAL_STATS['fields_reused']} 个，"
+                  f"免去完整重试 {PARTIAL_STATS['completed']} 次 / 约 {PARTIAL_STATS['tokens_saved']} 输出 token")
+        if self.latencies:
+            print("⏱️ 单篇耗时 (s)：" + " ".join(
+                f"p{q}={percentile(self.latencies, q):.2f}" for q in (50, 90, 99)))
+        if self.deferred:
+            by_sec = Counter(p.section or "?" for p in self.deferred)
+            print(f"⏳ 截止前未处理 {len(self.deferred)} 篇（" +
+                  ", ".join(f"{s}={c}" for s, c in by_sec.items()) + "）：")
+            for p in self.deferred:
+                print(f"  {p.id} [{p.section or '?'}|{p.primary_category or ''}] {(p.title or '')[:60]}")
+
+# ───────── 9 · 调度与主程序 ──────────
+def dedupe_papers(papers) -> List[Paper]:
+    """按 id 去重（保留首次出现的条目）"""
+    seen, unique = set(), []
+    for p in papers:
+        if p.id and p.id not in seen:
+            seen.add(p.id)
+            unique.append(p)
+    return unique
+
+def load_papers(path: str) -> List[Paper]:
+    """读文件 & 去重（.jsonl / .jsonl.gz / .jsonl.zst；历史字段变体由 Paper 统一）"""
+    return dedupe_papers(record.iter_papers(path))
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """--shard 的 argparse 类型：'i/N' → (i, N)；格式不对时由 argparse 报出用法错误。"""
+    if not spec: return None
+    i, sep, n = spec.partition("/")
+    try:
+        i, n = int(i), int(n)
+    except ValueError:
+        i = n = None
+    if not sep or i is None or not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"非法分片 {spec!r}：格式应为 i/N，且 0 ≤ i < N")
+    return i, n
+
+def shard_of(paper_id: str, n: int) -> int:
+    """按无版本 ID 的 SHA-1 划分分片：与进程、机器、Python 哈希种子无关。"""
+    base = re.sub(r"v\d+$", "", paper_id or "")
+    return int(hashlib.sha1(base.encode("utf-8")).hexdigest()[:8], 16) % n
+
+def select_keys(keys: List[str], subset: Optional[str], shard: Optional[Tuple[int, int]]) -> List[str]:
+    if not subset: return keys
+    if subset == "auto":
+        if not shard: return keys
+        i, n = shard
+        return [k for j, k in enumerate(keys) if j % n == i]
+    picked: List[int] = []
+    for part in filter(None, (p.strip() for p in subset.split(","))):
+        a, _, b = part.partition("-")
+        picked.extend(range(int(a), int(b or a) + 1))
+    return [keys[j - 1] for j in picked if 1 <= j <= len(keys)]
+
+def output_path(data: str, lang: str, shard: Optional[Tuple[int, int]] = None) -> str:
+    suffix = f".shard{shard[0]}of{shard[1]}" if shard else ""
+    return data.replace(".jsonl", f"_AI_enhanced_{lang}{suffix}.jsonl")
+
+def load_cache(path: str) -> Dict[str, dict]:
+    """读取上次运行的输出，返回 id → 完整有效的 AI 结果（命中者无需再调用 API）。"""
+    cache: Dict[str, dict] = {}
+    if not jsonl_io.exists(path): return cache
+    for p in record.iter_papers(path, skip_bad=True):
+        if p.ai and all(valid(p.ai.get(f)) for f in FIELDS):
+            cache[p.id] = p.ai
+    return cache
+
+SECTION_RANK = {"new": 0, "cross": 1, "repl": 2}
+
+def paper_priority(p: Paper, prefs: List[str]) -> Tuple[int, int]:
+    """排序键：小节（new → cross → repl）优先，其次按偏好分类的顺序。"""
+    cat = p.primary_category or p.primary or ""
+    return SECTION_RANK.get(p.section, len(SECTION_RANK)), (prefs.index(cat) if cat in prefs else len(prefs))
+
+def parse_deadline(deadline: Optional[str], budget: float) -> Optional[float]:
+    """将截止时刻 / 时间预算换算为 `time.monotonic()` 时刻；两者都给时取较早者。"""
+    cands = []
+    if budget and budget > 0:
+        cands.append(time.monotonic() + budget * TIME_SCALE)
+    if deadline:
+        dt = datetime.fromisoformat(deadline.replace("Z", "+00:00"))
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+        cands.append(time.monotonic() + (dt - datetime.now(timezone.utc)).total_seconds())
+    return min(cands) if cands else None
+
+def mark_deferred(paper: Paper) -> Paper:
+    paper.ai = {f: "ERROR" for f in FIELDS}
+    return paper
+
+async def run_papers(papers: List[Paper], lang: str, retries: int, concurrency: int,
+                     reporter: ProgressReporter, prefs: Optional[List[str]] = None,
+                     deadline: Optional[float] = None, margin: float = 60.0) -> List[Paper]:
+    """按优先级派发论文；到达 `deadline - margin` 后不再派发，到达 `deadline` 时取消仍在处理的论文。
+    未处理的论文以 ERROR 占位写出，并登记到 `reporter.deferred`。"""
+    prefs = prefs or []
+    # 跟随规划时先按预计开始时刻派发（各模型并行推进），其次才是小节 / 分类优先级
+    eta = lambda p: PLAN[p.id][1] if p.id in PLAN else (float("inf") if PLAN else 0.0)
+    heap = [((eta(p), *paper_priority(p, prefs)), i, p)
+            for i, p in enumerate(papers)]
+    heapq.heapify(heap)
+    stop_at = None if deadline is None else deadline - margin * TIME_SCALE
+    processed: List[Paper] = []
+    inflight: Dict[int, Paper] = {}
 
-# ───────── 9 · 主程序 ──────────
-async def main():
-    args = cli()
+    async def worker(wid):
+        while heap:
+            if stop_at is not None and time.monotonic() >= stop_at: return
+            _, _, p = heapq.heappop(heap)
+            inflight[wid] = p
+            t0 = time.monotonic()
+            result = await process(p, lang, retries)
+            del inflight[wid]
+            if result is None:
+                continue
+            paper, combo = result
+            k, m = combo or (None, None)
+            processed.append(paper)
+            reporter.update(paper, m, k, time.monotonic() - t0)
+
+    workers = [asyncio.create_task(worker(i)) for i in range(max(1, min(concurrency, len(heap))))]
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    _, pending = await asyncio.wait(workers, timeout=timeout)
+    for t in pending: t.cancel()
+    if pending: await asyncio.gather(*pending, return_exceptions=True)
+
+    for p in list(inflight.values()) + [p for _, _, p in sorted(heap)]:
+        processed.append(mark_deferred(p))
+        reporter.defer(p)
+    return processed
+
+def unchanged(papers: List[Paper], path: str) -> bool:
+    """已有输出与本次结果逐篇相同（不计行序）时为 True：全部命中缓存的重跑不必改写已提交的文件。"""
+    if not jsonl_io.exists(path): return False
+    new = {p.id: p.to_dict() for p in papers}
+    old = {}
+    for row in jsonl_io.iter_jsonl(path, skip_bad=True):
+        if not isinstance(row, dict) or row.get("id") not in new: return False
+        old[row["id"]] = row
+    return old == new
+
+def write_jsonl(papers: List[Paper], path: str) -> str:
+    """写 JSONL（临时文件 + 原子替换，避免中断时留下半截输出；按扩展名 / JSONL_COMPRESSION 压缩）。返回实际路径。
+    内容没有变化时不改写，文件的大小、mtime 与格式保持原样（下游按这些判断是否需要重建）。"""
+    if unchanged(papers, path): return jsonl_io.resolve(path)
+    return record.write_papers(papers, path)
+
+def plan_path(outp: str, path: Optional[str]) -> str:
+    return path or jsonl_io.logical(outp)[:-len(".jsonl")] + ".plan.json"
+
+def make_plan(papers: List[Paper], args, prefs: List[str]) -> dict:
+    keep = tuple(s.strip() for s in args.plan_keep.split(",") if s.strip())
+    return plan_run(papers, TOTAL_KEYS, MODELS, quota, lambda p: paper_priority(p, prefs),
+                    args.concurrency, latency=args.plan_latency, keep=keep)
 
-    # 读文件 & 去重
-    seen, papers = set(), []
-    for line in open(args.data, encoding="utf-8"):
-        if line.strip():
-            d = json.loads(line)
-            if d.get("id") and d["id"] not in seen:
-                seen.add(d["id"])
-                papers.append(d)
+def finish_telemetry(prefix: Optional[str]):
+    for (k, m), lim in LIMITER.items():
+        TELEMETRY.set_quota(m, KEY_INDEX[k], lim.calls, lim.rpd, lim.tripped)
+    TELEMETRY.close(prefix)
 
+async def main(argv=None, papers: Optional[List[Paper]] = None) -> Optional[List[Paper]]:
+    """命令行入口；流水线（python -m insightarxiv）直接传入上一阶段的 papers，省去重读 --data。
+    返回写出的全部论文（只做规划或无数据时返回 None）。"""
+    args = cli(argv)
+
+    shard = args.shard
+    keys, models = load_env()
+    if args.backend == "mock":
+        keys = keys or [f"mock-key-{i}" for i in range(1, 4)]
+        models = models or list(FREE)[:3]
+    keys = select_keys(keys, args.keys_subset, shard)
+    if not keys or not models:
+        sys.exit("❌ 环境变量 GOOGLE_API_KEYS / MODEL_PRIORITY_LIST 未设置（或 --keys-subset 未选中任何 Key）")
+
+    # 先确认有数据再打开遥测：无数据直接返回时不留下没有收尾的事件文件
+    papers = load_papers(args.data) if papers is None else dedupe_papers(papers)
+    if shard:
+        papers = [p for p in papers if shard_of(p.id, shard[1]) == shard[0]]
+        print(f"🧩 分片 {shard[0]}/{shard[1]}：{len(papers)} 篇，使用 {len(keys)} 个 Key")
     total = len(papers)
     if total == 0:
         print(f"⚠️ 输入文件无可处理数据：{args.data}")
         return
 
-    print(f"\n📑 {total} papers | concurrency {args.concurrency}\n")
-
-    sem = asyncio.Semaphore(args.concurrency)
-    async def worker(p):
-        async with sem:
-            return await process(p, args.language, args.retries)
-
-    processed: List[dict] = []
-    reporter = ProgressReporter(total)
-    for coro in asyncio.as_completed([worker(p) for p in papers]):
-        result = await coro
-        if result is None:
-            continue
-        paper, (k, m) = result
-        processed.append(paper)
-        reporter.update(paper, m, k)
-    reporter.close()
-
-    outp = args.data.replace(".jsonl", f"_AI_enhanced_{args.language}.jsonl")
-    with open(outp, "w", encoding="utf-8") as f:
-        for row in processed:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
-    print(f"📁 输出保存至：{outp}")
+    configure(keys, models, make_backend(args.backend, quota=quota),
+              telemetry=Telemetry(args.telemetry + ".events.jsonl" if args.telemetry else None))
+    try:
+        deadline = parse_deadline(args.deadline, args.time_budget)
+
+        outp = output_path(args.data, args.language, shard)
+        cache = {} if args.no_cache else load_cache(outp)
+        hits = [p for p in papers if p.id in cache]
+        todo = [p for p in papers if p.id not in cache]
+        prefs = [c.strip() for c in args.categories.split(",") if c.strip()]
+
+        if args.plan is not None:
+            plan = make_plan(todo, args, prefs)
+            print_plan(plan)
+            save_plan(plan, plan_path(outp, args.plan))
+            print(f"📁 规划保存至：{plan_path(outp, args.plan)}")
+            return
+        if args.follow_plan is not None:
+            path = plan_path(outp, args.follow_plan)
+            plan = load_plan(path)
+            if plan is None:
+                plan = make_plan(todo, args, prefs)
+                save_plan(plan, path)
+            else:
+                print(f"🗺️ 使用规划：{path}")
+            print_plan(plan)
+            PLAN.clear(); PLAN.update(plan.get("assign") or {})
+
+        print(f"\n📑 {total} papers | cached {len(hits)} | concurrency {args.concurrency}\n")
+
+        reporter = ProgressReporter(total)
+        for p in hits:
+            p.ai = cache[p.id]
+            reporter.hit(p)
+        processed = hits + await run_papers(todo, args.language, args.retries, args.concurrency, reporter,
+                                            prefs=prefs, deadline=deadline, margin=args.flush_margin)
+        reporter.close()
+
+        outp = write_jsonl(processed, outp)
+        print(f"📁 输出保存至：{outp}")
+        return processed
+    finally:
+        finish_telemetry(args.telemetry)   # --plan 只做规划时同样写出（空的）遥测汇总
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+merge_shards.py — 合并 `enhance.py --shard i/N` 的分片输出为标准 `_AI_enhanced_<lang>.jsonl`
+
+用法：
+  python ai/merge_shards.py --data data/2025-08-08.jsonl                # 自动查找 *.shard*of*.jsonl
+  python ai/merge_shards.py --data data/2025-08-08.jsonl --shards a.jsonl b.jsonl
+
+规则：
+- 输出顺序与原始输入文件一致（原始文件不存在时按 ID 排序），结果确定、可复现；
+- 同一论文出现在多个分片时：完整有效的结果优先，其次按分片编号取靠前者；
+- 原始输入中存在、但所有分片都缺失的论文以 ERROR 占位写出，并在报告中列出；
+- 报告每个分片的覆盖情况：应处理 / 实际写出 / 有效 / ERROR。
+"""
+
+import os, re, sys, glob, argparse
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from enhance import FIELDS, valid, load_papers, shard_of, write_jsonl, output_path
+from insightarxiv import jsonl_io, record
+from insightarxiv.record import Paper
+
+RE_SHARD = re.compile(r"\.shard(\d+)of(\d+)\.jsonl(?:\.gz|\.zst)?$")
+
+def cli():
+    ap = argparse.ArgumentParser(description="Merge sharded enhance outputs")
+    ap.add_argument("--data", required=True, help="原始输入 JSONL（决定输出路径与顺序）")
+    ap.add_argument("--language", default="Chinese")
+    ap.add_argument("--shards", nargs="*", default=None, help="分片文件（默认按命名规则自动查找）")
+    ap.add_argument("--cleanup", action="store_true", help="合并成功后删除分片文件")
+    return ap.parse_args()
+
+def complete(row: Paper) -> bool:
+    return bool(row.ai) and all(valid(row.ai.get(f)) for f in FIELDS)
+
+def shard_index(path: str) -> Tuple[int, int]:
+    m = RE_SHARD.search(path)
+    return (int(m.group(1)), int(m.group(2))) if m else (sys.maxsize, 0)
+
+def read_rows(path: str) -> List[Paper]:
+    return record.read_papers(path, skip_bad=True)
+
+def merge(shard_files: List[str], papers: List[Paper]) -> Tuple[List[Paper], Dict[str, Counter], List[str]]:
+    best: Dict[str, Tuple[bool, int, Paper]] = {}
+    report: Dict[str, Counter] = {}
+    for rank, path in enumerate(sorted(shard_files, key=shard_index)):
+        i, n = shard_index(path)
+        c = report.setdefault(os.path.basename(path), Counter())
+        for row in read_rows(path):
+            pid = row.id
+            if not pid: continue
+            ok = complete(row)
+            c["written"] += 1; c["ok" if ok else "error"] += 1
+            prev = best.get(pid)
+            if prev is not None: c["duplicates"] += 1
+            if prev is None or (ok and not prev[0]):
+                best[pid] = (ok, rank, row)
+        if n and papers:
+            c["expected"] = sum(1 for p in papers if shard_of(p.id, n) == i)
+
+    merged, missing = [], []
+    for p in papers:
+        if p.id in best:
+            merged.append(best[p.id][2])
+        else:
+            missing.append(p.id)
+            p.ai = {f: "ERROR" for f in FIELDS}
+            merged.append(p)
+    # 分片中出现但原始输入没有的条目（或原始输入不可用时的全部条目）按 ID 排序追加
+    known = {p.id for p in papers}
+    merged.extend(best[pid][2] for pid in sorted(best) if pid not in known)
+    return merged, report, missing
+
+def main():
+    args = cli()
+    outp = output_path(args.data, args.language)
+    stem = jsonl_io.logical(outp)[:-len(".jsonl")]
+    shard_files = args.shards or jsonl_io.glob_jsonl(glob.escape(stem) + ".shard*of*.jsonl")
+    if not shard_files:
+        sys.exit(f"❌ 未找到分片文件：{stem}.shard*of*.jsonl")
+    totals = {shard_index(f)[1] for f in shard_files}
+    if len(totals) > 1:
+        sys.exit(f"❌ 分片数不一致：{sorted(totals)}")
+
+    papers = load_papers(args.data) if jsonl_io.exists(args.data) else []
+    merged, report, missing = merge(shard_files, papers)
+    outp = write_jsonl(merged, outp)
+
+    print(f"🧩 合并 {len(shard_files)} 个分片 → {outp}（{len(merged)} 篇）")
+    for name, c in report.items():
+        exp = c.get("expected")
+        cover = f"{c['ok']}/{exp} ({c['ok'] / exp:.0%})" if exp else f"{c['ok']}/{c['written']}"
+        print(f"  {name:<48} 有效 {cover} | ERROR {c['error']} | 重复 {c['duplicates']}")
+    n_ok = sum(1 for r in merged if complete(r))
+    print(f"✅ 有效 {n_ok}/{len(merged)}" + (f" | 缺失 {len(missing)} 篇：{', '.join(missing[:20])}"
+                                           + (" …" if len(missing) > 20 else "") if missing else ""))
+    if args.cleanup:
+        for f in shard_files: os.remove(f)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+mock_backend.py — 离线、确定性的 LLM 模拟后端（供 enhance.py / bench.py 使用）
+
+模拟内容：
+- 延迟分布：fixed / uniform / lognormal（以“秒”为单位，受 time_scale 缩放）；
+- 服务端限额：每个 (key, model) 独立的 RPM 滑动窗口与 RPD 计数，
+  超 RPM 抛出带 retry 提示的 `ResourceExhausted`，超 RPD 抛出含 `FreeTier` 的 `ResourceExhausted`；
+- 随机故障：瞬时异常、偶发 429、偶发 FreeTier 耗尽；
+- 结构化输出异常：返回 None，或部分字段为空的结果（完整 / 精简 schema 均适用）。
+
+所有随机性均由 (seed, key, model, 调用序号) 派生，同一输入与配置下结果可复现。
+"""
+
+import time, random, asyncio, hashlib
+from types import SimpleNamespace
+from collections import deque, Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Tuple, Optional
+
+from google.api_core import exceptions as gexc
+from structure import Structure, partial_structure
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal:2.0:0.4"   # fixed:S | uniform:A:B | lognormal:MEDIAN:SIGMA
+    seed: int = 0
+    time_scale: float = 1.0              # 与 enhance.TIME_SCALE 保持一致
+    rpm: Optional[int] = None            # 覆盖服务端 RPM（默认取 FREE 表）
+    rpd: Optional[int] = None            # 覆盖服务端 RPD（默认取 FREE 表）
+    transient_rate: float = 0.0          # 普通异常（网络/5xx）
+    exhausted_rate: float = 0.0          # 偶发 429（可重试）
+    freetier_rate: float = 0.0           # 偶发 FreeTier 耗尽（组合作废）
+    malformed_rate: float = 0.0          # 结构化输出缺字段 / 解析失败
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "MockConfig":
+        """解析 `k=v,k=v` 形式的配置串（如 ENV:MOCK_LLM="seed=1,malformed_rate=0.05"）。"""
+        cfg = cls()
+        for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+            k, _, v = part.partition("=")
+            if not hasattr(cfg, k):
+                raise ValueError(f"未知的 mock 配置项: {k}")
+            cur = getattr(cfg, k)
+            setattr(cfg, k, v if isinstance(cur, str) else (int(v) if k in ("seed", "rpm", "rpd") else float(v)))
+        return cfg
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    kind, *params = spec.split(":")
+    p = [float(x) for x in params]
+    if kind == "fixed":     return p[0]
+    if kind == "uniform":   return rng.uniform(p[0], p[1])
+    if kind == "lognormal": return rng.lognormvariate(0.0, p[1]) * p[0]
+    raise ValueError(f"未知的延迟分布: {spec}")
+
+@dataclass
+class ComboState:
+    window: deque = field(default_factory=deque)   # 最近一分钟内的请求时刻
+    day_calls: int = 0
+    seq: int = 0
+
+class MockChain:
+    def __init__(self, backend: "MockBackend", key: str, model: str, fields=None):
+        self.backend, self.key, self.model = backend, key, model
+        self.schema = partial_structure(fields) if fields else Structure
+
+    async def ainvoke(self, prompt: dict):
+        return await self.backend.call(self.key, self.model, prompt, self.schema)
+
+class MockBackend:
+    """与 enhance.Backend 相同的接口：`make_chain(key, model, fields=None)`。"""
+    name = "mock"
+
+    def __init__(self, config: Optional[MockConfig] = None,
+                 quota: Callable[[str], Tuple[int, int]] = lambda m: (10, 250)):
+        self.cfg, self.quota = config or MockConfig(), quota
+        self.state: Dict[Tuple[str, str], ComboState] = {}
+        self.stats = Counter()
+
+    def make_chain(self, key, model, fields=None):
+        self.state.setdefault((key, model), ComboState())
+        return MockChain(self, key, model, fields)
+
+    def _rng(self, key, model, seq) -> random.Random:
+        h = hashlib.sha1(f"{self.cfg.seed}|{key}|{model}|{seq}".encode()).hexdigest()
+        return random.Random(int(h[:16], 16))
+
+    async def call(self, key, model, prompt, schema=Structure):
+        st = self.state.setdefault((key, model), ComboState())
+        st.seq += 1
+        rng = self._rng(key, model, st.seq)
+        cfg, self.stats["requests"] = self.cfg, self.stats["requests"] + 1
+        rpm, rpd = self.quota(model)
+        rpm, rpd = cfg.rpm or rpm, cfg.rpd or rpd
+
+        # 服务端配额检查（在产生延迟前完成，与真实 API 行为一致）
+        now, minute = time.monotonic(), 60 * cfg.time_scale
+        while st.window and now - st.window[0] >= minute:
+            st.window.popleft()
+        if st.day_calls >= rpd or rng.random() < cfg.freetier_rate:
+            self.stats["freetier"] += 1
+            raise gexc.ResourceExhausted(
+                "Resource has been exhausted: quota_id: GenerateRequestsPerDayPerProjectPerModel-FreeTier")
+        if len(st.window) >= rpm or rng.random() < cfg.exhausted_rate:
+            retry = max(1.0, (minute - (now - st.window[0])) / cfg.time_scale) if st.window else 1.0
+            self.stats["exhausted"] += 1
+            raise gexc.ResourceExhausted(
+                f"Resource has been exhausted (e.g. check quota). Please retry in {retry:.1f}s",
+                details=[{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{int(retry)}s"}])
+        st.window.append(now)
+        st.day_calls += 1
+
+        await asyncio.sleep(sample_latency(cfg.latency, rng) * cfg.time_scale)
+
+        if rng.random() < cfg.transient_rate:
+            self.stats["transient"] += 1
+            raise gexc.ServiceUnavailable("mock transient failure")
+        fields = list(schema.model_fields)
+        if rng.random() < cfg.malformed_rate:
+            self.stats["malformed"] += 1
+            if rng.random() < 0.5:
+                return self._wrap(None, prompt, 0)
+            missing = set(rng.sample(fields, rng.randint(1, min(3, len(fields)))))
+            return self._wrap(schema(**{f: (None if f in missing else self._answer(f, prompt)) for f in fields}),
+                              prompt, len(fields) - len(missing))
+        self.stats["ok"] += 1
+        return self._wrap(schema(**{f: self._answer(f, prompt) for f in fields}), prompt, len(fields))
+
+    @staticmethod
+    def _wrap(parsed, prompt: dict, n_fields: int) -> dict:
+        """与 `with_structured_output(include_raw=True)` 相同的返回形态，附带估算的 token 用量。"""
+        tin = 400 + (len(prompt.get("title") or "") + len(prompt.get("content") or "")) // 4
+        usage = {"input_tokens": tin, "output_tokens": 60 * n_fields, "total_tokens": tin + 60 * n_fields}
+        return {"raw": SimpleNamespace(usage_metadata=usage), "parsed": parsed, "parsing_error": None}
+
+    @staticmethod
+    def _answer(fld: str, prompt: dict) -> str:
+        if fld == "keywords":
+            return "mock, offline, benchmark"
+        return f"[mock {fld}] {(prompt.get('title') or '')[:80]}"
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+planner.py — enhance 阶段的运行前配额规划
+
+已知论文数、Key 数与 FREE 表中各模型的 RPM / RPD，在第一次调用前估算：
+- 每个模型今天最多能处理多少篇（RPD × Key 数 ÷ 每篇平均请求数）；
+- 每个模型的处理速率（RPM × Key 数 ÷ 60 ÷ 每篇平均请求数），以及并发上限（并发数 ÷ 单次延迟）；
+- 按 MODELS 的偏好顺序，让最高优先级小节的论文保留首选模型，其余论文在各模型间分配，
+  使全部论文最早完成（每次把下一篇分给“多接这一篇后完成时刻最早”的模型）；
+- 总容量不足时预计的 ERROR 篇数。
+
+规划结果是 `{"models": [...], "assign": {paper_id: [model, eta]}, ...}`：enhance.py 按其中的模型优先尝试每篇论文
+（失败时仍按原有顺序回退到其他模型），并按预计开始时刻 eta 派发，使各模型同时开工而不是按优先级依次轮到。
+"""
+
+import os, json, math, heapq
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from insightarxiv.record import Paper
+
+def plan_run(papers: List["Paper"], keys: int, models: List[str], quota: Callable[[str], Tuple[int, int]],
+             priority: Callable[["Paper"], tuple], concurrency: int, latency: float = 6.0,
+             overhead: float = 1.1, keep: Tuple[str, ...] = ("new",)) -> dict:
+    """papers 应为待处理（未命中缓存）的论文；`keep` 中小节的论文尽量留给 models[0]。"""
+    papers = sorted(papers, key=priority)
+    n = len(papers)
+    stats = []
+    for m in models:
+        rpm, rpd = quota(m)
+        stats.append({"model": m, "rpm": rpm, "rpd": rpd, "keys": keys,
+                      "capacity": int(rpd * keys / overhead),
+                      "rate_per_min": round(min(rpm * keys / overhead, concurrency / latency * 60), 2)})
+    if not stats:
+        return {"papers": n, "models": [], "assign": {}, "projected_errors": n, "est_seconds": 0.0}
+
+    # 首选模型至少承接 keep 小节的论文（不超过其容量）
+    top = sum(1 for p in papers if p.section in keep)
+    load = [0] * len(stats)
+    load[0] = min(top, stats[0]["capacity"], n)
+    finish = lambda i, k: k / stats[i]["rate_per_min"] * 60 if stats[i]["rate_per_min"] else math.inf
+    heap = [(finish(i, load[i] + 1), i) for i, s in enumerate(stats) if load[i] < s["capacity"]]
+    heapq.heapify(heap)
+    left = n - load[0]
+    while left and heap:
+        _, i = heapq.heappop(heap)
+        load[i] += 1; left -= 1
+        if load[i] < stats[i]["capacity"]:
+            heapq.heappush(heap, (finish(i, load[i] + 1), i))
+
+    # 按优先级顺序填充：靠前的论文先拿到偏好靠前的模型；eta 为该论文在所属模型队列中的预计开始时刻
+    assign: Dict[str, list] = {}
+    it = iter(papers)
+    for i, (s, k) in enumerate(zip(stats, load)):
+        s["assigned"] = k
+        s["est_seconds"] = round(finish(i, k), 1) if k else 0.0
+        for j in range(k):
+            assign[next(it).id] = [s["model"], round(finish(i, j), 1)]
+    planned = sum(load)
+    wall = max([s["est_seconds"] for s in stats] + [math.ceil(planned / max(1, concurrency)) * latency if planned else 0.0])
+    return {
+        "papers": n, "keys": keys, "concurrency": concurrency, "latency": latency, "overhead": overhead,
+        "keep": list(keep), "keep_papers": top,
+        "models": stats, "est_seconds": round(wall, 1),
+        "projected_errors": n - planned, "assign": assign,
+    }
+
+def print_plan(plan: dict):
+    print(f"🗺️ 配额规划：{plan['papers']} 篇 | {plan['keys']} keys | 并发 {plan['concurrency']} | "
+          f"单次延迟≈{plan['latency']}s | 每篇≈{plan['overhead']} 次请求")
+    for s in plan["models"]:
+        print(f"  {s['model']:<22} RPM={s['rpm']:<3} RPD={s['rpd']:<5} 容量 {s['capacity']:<5} "
+              f"速率 {s['rate_per_min']:>6}/min → 分配 {s['assigned']:<5} 预计 {s['est_seconds'] / 60:.1f} min")
+    print(f"  预计总耗时 {plan['est_seconds'] / 60:.1f} min | 预计 ERROR {plan['projected_errors']} 篇"
+          f" | 保留首选模型的小节 {','.join(plan['keep'])}（{plan['keep_papers']} 篇）")
+
+def save_plan(plan: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def load_plan(path: str) -> Optional[dict]:
+    if not os.path.exists(path): return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from typing import Optional, Tuple, Type
 
 class Structure(BaseModel):
     """
@@ -15,4 +16,15 @@ class Structure(BaseModel):
     summary: Optional[str] = Field(default=None, description="generate a new, concise summary of the paper based on its abstract")
     keywords: Optional[str] = Field(default=None, description="Extract 3 to 5 keywords from the abstract, separated by commas.")
     # **新增**: AI点评字段
-    comments: Optional[str] = Field(default=None, description="add some insightful comments about this paper, focusing on its innovation, importance, or limitations")
\ No newline at end of file
+    comments: Optional[str] = Field(default=None, description="add some insightful comments about this paper, focusing on its innovation, importance, or limitations")
+
+@lru_cache(maxsize=None)
+def partial_structure(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    只包含指定字段的精简 Structure，用于结构化输出缺字段时的定向追问。
+    """
+    return create_model(
+        "PartialStructure",
+        __doc__="仅补全上一次回答中缺失的字段。",
+        **{f: (Optional[str], Field(default=None, description=Structure.model_fields[f].description)) for f in fields},
+    )
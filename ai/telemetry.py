@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+telemetry.py — enhance 阶段的请求级遥测：逐请求事件 + 按 (model, key 编号) 汇总的直方图
+
+输出（均不含任何 Key 明文，Key 只以 1 起的编号出现）：
+- `<prefix>.events.jsonl`：每次 API 请求一行（运行中流式写出）；
+- `<prefix>.json`：运行结束时的汇总；
+- `<prefix>.prom`：Prometheus textfile 格式，可交给 node_exporter 的 textfile collector。
+"""
+
+import os, json, time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64)           # 秒
+WAIT_BUCKETS    = (0.1, 0.5, 1, 2, 5, 10, 30, 60)         # 秒
+TOKEN_BUCKETS   = (128, 256, 512, 1024, 2048, 4096, 8192)  # 输出 token
+METRIC_PREFIX   = "insightarxiv_enhance"
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds, self.counts, self.sum, self.n = tuple(bounds), [0] * (len(bounds) + 1), 0.0, 0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v; self.n += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, acc = [], 0
+        for le, c in zip([*map(str, self.bounds), "+Inf"], self.counts):
+            acc += c; out.append((le, acc))
+        return out
+
+    def to_dict(self) -> dict:
+        return {"buckets": dict(self.cumulative()), "sum": round(self.sum, 3), "count": self.n}
+
+class ComboStats:
+    def __init__(self):
+        self.status = Counter()
+        self.retries = 0
+        self.tokens_in = self.tokens_out = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.wait    = Histogram(WAIT_BUCKETS)
+        self.out_tok = Histogram(TOKEN_BUCKETS)
+        self.rpd_used, self.rpd_limit, self.trips = 0, 0, 0
+
+class Telemetry:
+    def __init__(self, events_path: Optional[str] = None):
+        self.events_path = events_path
+        self._events = None
+        self.combos: Dict[Tuple[str, int], ComboStats] = {}
+        self.started = time.time()
+
+    def record(self, model: str, key_idx: int, status: str, attempt: int,
+               latency: float, wait: float, usage: Optional[dict] = None):
+        st = self.combos.setdefault((model, key_idx), ComboStats())
+        st.status[status] += 1
+        st.retries += attempt > 0
+        st.wait.observe(wait)
+        st.latency.observe(latency)
+        tin, tout = (usage or {}).get("input_tokens") or 0, (usage or {}).get("output_tokens") or 0
+        st.tokens_in += tin; st.tokens_out += tout
+        if tout: st.out_tok.observe(tout)
+        if self.events_path:
+            if self._events is None:
+                os.makedirs(os.path.dirname(self.events_path) or ".", exist_ok=True)
+                self._events = open(self.events_path, "w", encoding="utf-8")
+            self._events.write(json.dumps({
+                "ts": round(time.time(), 3), "model": model, "key": key_idx, "status": status,
+                "attempt": attempt, "latency": round(latency, 3), "wait": round(wait, 3),
+                "input_tokens": tin, "output_tokens": tout}) + "\n")
+
+    def set_quota(self, model: str, key_idx: int, used: int, limit: int, trips: int = 0):
+        st = self.combos.setdefault((model, key_idx), ComboStats())
+        st.rpd_used, st.rpd_limit, st.trips = used, limit, trips
+
+    def summary(self) -> dict:
+        combos = []
+        for (model, kidx), st in sorted(self.combos.items()):
+            n = sum(st.status.values())
+            combos.append({
+                "model": model, "key": kidx, "requests": n, "status": dict(st.status),
+                "error_rate": round(1 - st.status["ok"] / n, 4) if n else 0.0,
+                "retries": st.retries, "breaker_trips": st.trips, "input_tokens": st.tokens_in, "output_tokens": st.tokens_out,
+                "rpd_used": st.rpd_used, "rpd_limit": st.rpd_limit,
+                "rpd_ratio": round(st.rpd_used / st.rpd_limit, 4) if st.rpd_limit else 0.0,
+                "latency_seconds": st.latency.to_dict(), "limiter_wait_seconds": st.wait.to_dict(),
+                "output_tokens_hist": st.out_tok.to_dict(),
+            })
+        return {"started": self.started, "finished": time.time(), "combos": combos}
+
+    def prometheus(self) -> str:
+        p, lines = METRIC_PREFIX, []
+        def head(name, kind, help_):
+            lines.extend([f"# HELP {p}_{name} {help_}", f"# TYPE {p}_{name} {kind}"])
+        def hist(name, attr, help_):
+            head(name, "histogram", help_)
+            for (m, k), st in sorted(self.combos.items()):
+                h = getattr(st, attr)
+                for le, c in h.cumulative():
+                    lines.append(f'{p}_{name}_bucket{{model="{m}",key="{k}",le="{le}"}} {c}')
+                lines.append(f'{p}_{name}_sum{{model="{m}",key="{k}"}} {h.sum:.3f}')
+                lines.append(f'{p}_{name}_count{{model="{m}",key="{k}"}} {h.n}')
+
+        head("requests_total", "counter", "API requests by outcome.")
+        for (m, k), st in sorted(self.combos.items()):
+            for status, c in sorted(st.status.items()):
+                lines.append(f'{p}_requests_total{{model="{m}",key="{k}",status="{status}"}} {c}')
+        head("retries_total", "counter", "Requests that were a retry of an earlier attempt.")
+        for (m, k), st in sorted(self.combos.items()):
+            lines.append(f'{p}_retries_total{{model="{m}",key="{k}"}} {st.retries}')
+        head("breaker_trips_total", "counter", "Times the per-combo circuit breaker opened.")
+        for (m, k), st in sorted(self.combos.items()):
+            lines.append(f'{p}_breaker_trips_total{{model="{m}",key="{k}"}} {st.trips}')
+        head("tokens_total", "counter", "Prompt and completion tokens reported by the API.")
+        for (m, k), st in sorted(self.combos.items()):
+            lines.append(f'{p}_tokens_total{{model="{m}",key="{k}",direction="input"}} {st.tokens_in}')
+            lines.append(f'{p}_tokens_total{{model="{m}",key="{k}",direction="output"}} {st.tokens_out}')
+        head("rpd_used_ratio", "gauge", "Share of the per-day request quota used in this run.")
+        for (m, k), st in sorted(self.combos.items()):
+            if st.rpd_limit:
+                lines.append(f'{p}_rpd_used_ratio{{model="{m}",key="{k}"}} {st.rpd_used / st.rpd_limit:.4f}')
+        hist("request_latency_seconds", "latency", "API request latency.")
+        hist("limiter_wait_seconds", "wait", "Time spent waiting inside ComboLimiter.")
+        hist("output_tokens", "out_tok", "Completion tokens per request.")
+        return "\n".join(lines) + "\n"
+
+    def close(self, prefix: Optional[str] = None):
+        if self._events is not None:
+            self._events.close(); self._events = None
+        if not prefix: return
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        for path, text in ((prefix + ".json", json.dumps(self.summary(), ensure_ascii=False, indent=2)),
+                           (prefix + ".prom", self.prometheus())):
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+        print(f"📈 遥测已写出：{prefix}.json / {prefix}.prom" + (f" / {self.events_path}" if self.events_path else ""))
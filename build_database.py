@@ -1,4 +1,5 @@
 import os
+import sys
 import glob
 import json
 import re
@@ -7,6 +8,9 @@ from datetime import datetime
 import multiprocessing
 from functools import partial
 import shutil
+from contextlib import nullcontext
+
+from insightarxiv import archive, jsonl_io, record, related, trends
 
 # --- 新增：引入NLTK进行词形还原，提升搜索质量 ---
 # 首次运行时，需要安装NLTK: pip install nltk
@@ -148,10 +152,18 @@ def process_paper_for_indexing(paper_data: dict) -> tuple:
 
     return paper_id, all_search_tokens, categories, year_month
 
-def build_database_from_jsonl_fixed():
+def open_source(path: str, file_date: str, records: dict):
+    """某天的数据源：流水线已在内存中持有的记录（record.Paper 列表），否则逐行读取文件。"""
+    if file_date in records:
+        return nullcontext(records[file_date])
+    return jsonl_io.open_text(path)
+
+def build_database_from_jsonl_fixed(data_dir: str = "data", output_dir: str = "docs/data", language: str = "Chinese",
+                                    records: dict = None):
     """
     构建数据库的主函数。
-    它从 'data' 目录下的所有 *_AI_enhanced_Chinese.jsonl 文件中读取数据，
+    它从 data_dir 目录下的所有 *_AI_enhanced_<language>.jsonl 文件中读取数据，
+    records（{日期: [record.Paper]}）中给出的日期直接使用内存中的记录、不再读文件，
     并智能地处理论文版本更新，只保留最新版本。然后生成：
     1. 按月份分片的数据文件 (database-YYYY-MM.json)
     2. 一个清单文件 (index.json)
@@ -161,15 +173,18 @@ def build_database_from_jsonl_fixed():
     # 核心改动：使用一个字典来存储最新版本的论文，键为基础ID (e.g., "2401.12345")
     all_papers_map = {} 
     skipped_paper_count = 0
+    records = records or {}
 
-    output_dir = "docs/data"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         print(f"创建目录: {output_dir}")
 
-    jsonl_files = glob.glob("data/*_AI_enhanced_Chinese.jsonl")
+    pattern = f"*_AI_enhanced_{language}.jsonl"
+    jsonl_files = jsonl_io.glob_jsonl(os.path.join(data_dir, pattern))   # 含 .jsonl.gz / .jsonl.zst
+    dated = {m.group(1) for m in (re.match(r'(\d{4}-\d{2}-\d{2})', os.path.basename(p)) for p in jsonl_files) if m}
+    jsonl_files += [os.path.join(data_dir, f"{d}_AI_enhanced_{language}.jsonl") for d in records if d not in dated]
     if not jsonl_files:
-        print("错误: 在 'data' 目录下没有找到任何 '_AI_enhanced_Chinese.jsonl' 文件。")
+        print(f"错误: 在 '{data_dir}' 目录下没有找到任何 '_AI_enhanced_{language}.jsonl' 文件。")
         return
 
     print(f"找到 {len(jsonl_files)} 个 .jsonl 数据源文件。开始处理...")
@@ -183,11 +198,14 @@ def build_database_from_jsonl_fixed():
             continue
         file_date = date_from_filename_match.group(1)
 
-        with open(jsonl_file, 'r', encoding='utf-8') as f:
+        with open_source(jsonl_file, file_date, records) as f:
             for line in f:
+                if isinstance(line, str) and not line.strip():
+                    continue
                 try:
-                    raw_data = json.loads(line)
-                    paper_id_full = raw_data.get("id")
+                    # 规范记录：已吸收 summary/abstract、comment/comments 等字段变体
+                    paper = line if isinstance(line, record.Paper) else record.decode(line)
+                    paper_id_full = paper.id
 
                     if not paper_id_full or not isinstance(paper_id_full, str):
                         skipped_paper_count += 1
@@ -195,13 +213,12 @@ def build_database_from_jsonl_fixed():
 
                     # --- [核心版本更新逻辑 - 优化版] ---
                     # 步骤 1: 提取基础ID和版本号
-                    match = re.match(r'(\d+\.\d+)(v\d+)?', paper_id_full)
-                    if not match:
+                    split = record.split_id(paper_id_full)
+                    if not split:
                         skipped_paper_count += 1
                         continue
                     
-                    base_id = match.group(1)
-                    current_version = int(match.group(2)[1:]) if match.group(2) else 1
+                    base_id, current_version = split
 
                     # 步骤 2: 检查是否需要更新
                     existing_paper = all_papers_map.get(base_id)
@@ -211,24 +228,27 @@ def build_database_from_jsonl_fixed():
                         continue
 
                     # 步骤 3: 无论如何都先进行数据整形，准备一个完整的 paper_data 对象
-                    ai_enhanced_info = raw_data.get("AI", {})
+                    ai_enhanced_info = paper.ai or {}
                     keywords_str = ai_enhanced_info.get("keywords", "")
                     keywords_list = [kw.strip() for kw in keywords_str.split(',') if kw.strip()] if isinstance(keywords_str, str) else []
 
+                    # 与改用 Paper 之前的输出差异（有意为之）：pdf_url 取记录的 pdf_url / pdf / pdf_link 中第一个非空值，
+                    # 都没有时才拼 http://arxiv.org/pdf/<id>（以前只读 pdf_link，抓取脚本写出 "pdf_link": null 时输出 null）；
+                    # comment 为 null 时输出 ""（以前原样输出 null）。前端 PDF 链接由 id 生成，备注按真假判断，显示不受影响。
                     current_paper_data = {
                         "id": base_id, # 存储基础ID
                         "full_id": paper_id_full, # 保留完整ID供参考
                         "_version": current_version, # 内部使用，记录版本号
-                        "title": raw_data.get("title", "无标题"),
+                        "title": paper.title if paper.title is not None else "无标题",
                         "date": file_date,
-                        "url": raw_data.get("url", f"http://arxiv.org/abs/{paper_id_full}"),
-                        "pdf_url": raw_data.get("pdf_link", f"http://arxiv.org/pdf/{paper_id_full}"),
-                        "authors": ", ".join(raw_data.get("authors", [])),
-                        "abstract": raw_data.get("summary", raw_data.get("abstract", "")),
-                        "comment": raw_data.get("comment", raw_data.get("comments", "")),
-                        "categories": raw_data.get("categories", []),
-                        "updated": raw_data.get("updated", file_date),
-                        "first_published": raw_data.get("published", raw_data.get("date", file_date)),
+                        "url": paper.url or f"http://arxiv.org/abs/{paper_id_full}",
+                        "pdf_url": paper.pdf_url or f"http://arxiv.org/pdf/{paper_id_full}",
+                        "authors": ", ".join(paper.authors),
+                        "abstract": paper.abstract or "",
+                        "comment": paper.comment or "",
+                        "categories": paper.categories,
+                        "updated": paper.updated or file_date,
+                        "first_published": paper.published or paper.date or file_date,
                         "zh_title": ai_enhanced_info.get("title_translation"),
                         "translation": ai_enhanced_info.get("translation"),
                         "keywords": keywords_list,
@@ -337,6 +357,17 @@ def build_database_from_jsonl_fixed():
     print(f"✅ 多进程处理完成，共处理 {processed_count} 篇论文。")
     print("中间索引文件已写入临时目录。")
 
+    # 相关论文：标题 + 摘要 + 关键词的 TF-IDF 近邻，只对新论文分词，输出 docs/data/related/ 下的分片
+    related_dir = os.path.join(output_dir, "related")
+    if related.available():
+        related.print_update(related.update(papers_list, tokenize_text, os.path.join(data_dir, ".related"), related_dir),
+                             related_dir)
+    elif os.getenv("CI"):   # 依赖已在 pyproject.toml 中声明，CI 中缺失说明环境有误，不能悄悄少一份输出
+        print("错误: 未安装 numpy / scipy，无法生成相关论文（运行 uv sync）", file=sys.stderr)
+        sys.exit(1)
+    else:
+        print("⚠️ Warning: 'numpy'/'scipy' not installed. Related papers will not be precomputed (run `uv sync`).")
+
     # 释放内存
     del all_papers_map
     del papers_list
@@ -465,11 +496,24 @@ def build_database_from_jsonl_fixed():
     with open(category_index_file_path, 'w', encoding='utf-8') as f:
         json.dump(final_category_index, f, ensure_ascii=False)
     print("成功写入分类索引文件 category_index.json。")
-    old_db_path = "docs/database.json"
+    old_db_path = os.path.join(os.path.dirname(output_dir), "database.json")
     if os.path.exists(old_db_path):
         os.remove(old_db_path)
         print(f"已删除旧的数据文件: {old_db_path}")
 
+    # 分类与关键词趋势：只重新计数新增 / 变化的日期，输出 docs/data/trends/ 下的小分片
+    trends_dir = os.path.join(output_dir, "trends")
+    trends.print_update(trends.update(data_dir, trends_dir, pattern), trends_dir)
+
+    # 可选：按月分区的列式归档，供分析查询（python -m insightarxiv.archive count ...）
+    archive_dir = os.environ.get("PAPER_ARCHIVE")
+    if archive_dir:
+        result = archive.update(data_dir, archive_dir, pattern)
+        if result["mode"] == "unchanged":
+            print(f"列式归档已是最新: {archive_dir}")
+        else:
+            print(f"成功更新列式归档 {archive_dir}（导入 {result['files']} 个文件，重写 {len(result['months'])} 个月份分区）。")
+
 # 为了安全地应用修复，我将原函数重命名，并创建一个新的调用它的函数
 build_database_from_jsonl = build_database_from_jsonl_fixed
 
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_fetch_plan.py — 列表抓取规划的离线校验与对比：逐分类抓取 vs 归档级抓取（fetch_plan）
+
+fixtures/day/papers.jsonl 记录了一天的论文（ID、New / Replacement、带分类代码的 Subjects 等）。
+本脚本按 arXiv 列表页的规则为任意列表路径渲染页面（含 skip/show 分页与 “Total of N entries”）：
+- 分类页 /list/<cat>/new：New = 主分类为该分类的新论文；Cross = 其余含该分类的新论文；Replacement = 含该分类的替换条目；
+- 归档页 /list/<arc>/new：同上，但“属于该分类”换成“属于该归档”。
+然后用与爬虫相同的 `listing_parser.parse_listing` + `fetch_plan` 流程模拟两种抓取策略，校验：
+- 两种策略得到的论文 ID 集合相同，且等于“分类与请求集合有交集”的论文集合；
+- 同一论文除 url / pdf_url（页面上 New 条目带版本号，Cross 条目不带）外逐字段一致，包括小节标签；
+- 分页（小 show）与不分页的输出完全一致；
+- 爬虫记录的列表规模（`observed`）与页面实际条目数一致。
+并报告请求数、下载字节数、解析条目数，以及合并决策：无规模记录时（按覆盖率）与有记录时（按条目数）的规划。
+
+用法：
+  python daily_arxiv/bench_fetch_plan.py
+  python daily_arxiv/bench_fetch_plan.py --categories cs.AI,cs.CL,cs.CV,eess.IV --page-size 10 --json fetch_bench.json
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import html as htmlmod
+import argparse
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import listing_parser
+import fetch_plan
+from daily_arxiv import DEFAULT_CATEGORIES
+
+DAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "day", "papers.jsonl")
+SECTIONS = (("new", "New submissions"), ("cross", "Cross submissions"), ("repl", "Replacement submissions"))
+
+def load_day(path: str = DAY) -> List[Dict]:
+    papers = [json.loads(l) for l in open(path, encoding="utf-8") if l.strip()]
+    for p in papers:
+        p["cats"] = [listing_parser.RE_CATEGORIES.search(s).group(1) for s in p["subjects"]]
+    return papers
+
+def listed(papers: List[Dict], path: str) -> List[Tuple[str, Dict]]:
+    """列表路径 path（分类或归档）当天的条目，按页面顺序：New、Cross、Replacement。"""
+    match = (lambda c: fetch_plan.archive_of(c) == path) if fetch_plan.is_group(path) else (lambda c: c == path)
+    new = [p for p in papers if p["kind"] == "new" and match(p["cats"][0])]
+    cross = [p for p in papers if p["kind"] == "new" and not match(p["cats"][0]) and any(map(match, p["cats"]))]
+    repl = [p for p in papers if p["kind"] == "repl" and any(map(match, p["cats"]))]
+    return [("new", p) for p in new] + [("cross", p) for p in cross] + [("repl", p) for p in repl]
+
+def entry(n: int, p: Dict) -> str:
+    pid, esc = p["id"], htmlmod.escape
+    authors = ",\n".join(f'    <a href="https://arxiv.org/a/{a.split()[-1].lower()}_1" rel="nofollow">{esc(a)}</a>'
+                         for a in p["authors"])
+    subjects = f'<span class="primary-subject">{p["subjects"][0]}</span>' + "".join(f"; {s}" for s in p["subjects"][1:])
+    comment = (f"    <div class='list-comments mathjax'><span class='descriptor'>Comments:</span>\n"
+               f"      {esc(p['comment'])}\n    </div>\n") if p.get("comment") else ""
+    return (f"<dt>\n  <a name='item{n}'>[{n}]</a>\n"
+            f'  <a href ="/abs/{pid}" title="Abstract" id="{pid}">\n    arXiv:{pid}\n  </a>\n'
+            f'  [<a href="/pdf/{pid}" title="Download PDF" id="pdf-{pid}">pdf</a>, '
+            f'<a href="https://arxiv.org/html/{pid}v1" title="View HTML" id="html-{pid}">html</a>, '
+            f'<a href="/format/{pid}" title="Other formats" id="oth-{pid}">other</a>]\n</dt>\n'
+            f"<dd>\n  <div class='meta'>\n"
+            f"    <div class='list-title mathjax'><span class='descriptor'>Title:</span>\n      {esc(p['title'])}\n    </div>\n"
+            f"    <div class='list-authors'>\n{authors}\n    </div>\n{comment}"
+            f"    <div class='list-subjects'><span class='descriptor'>Subjects:</span>\n      {subjects}\n    </div>\n"
+            f"    <p class='mathjax'>\n      {esc(p['abstract'])}\n    </p>\n  </div>\n</dd>\n")
+
+def render(papers: List[Dict], path: str, skip: int, show: int) -> bytes:
+    """渲染 /list/<path>/new?skip=&show= 的页面；小节标题只出现在小节开始的那一页（续页开头没有 <h3>）。"""
+    rows = listed(papers, path)
+    counts = Counter(sec for sec, _ in rows)
+    body, prev = [], rows[skip - 1][0] if 0 < skip <= len(rows) else None
+    for n, (sec, p) in enumerate(rows[skip:skip + show], skip + 1):
+        if sec != prev:
+            title = dict(SECTIONS)[sec]
+            body.append(f"<h3>{title} (showing {counts[sec]} of {counts[sec]} entries)</h3>\n")
+            prev = sec
+        body.append(entry(n, p))
+    return ("<!DOCTYPE html>\n<html lang=\"en\">\n<head><meta charset=\"utf-8\"><title>" + path + "</title></head>\n"
+            "<body>\n<div id='content'>\n<div id='dlpage'>\n"
+            f"  <h1>{path}</h1>\n  <div class='paging'>Total of {len(rows)} entries</div>\n"
+            "<dl id='articles'>\n" + "".join(body) + "</dl>\n</div>\n</div>\n</body>\n</html>\n").encode("utf-8")
+
+def crawl(papers: List[Dict], categories: List[str], group_min: int, show: int,
+          sizes: Dict[str, int] | None = None) -> Dict:
+    """按爬虫的流程模拟一次抓取：规划 → 逐列表顺序翻页 → 解析（共享 seen）→ 记录列表规模。"""
+    plan = fetch_plan.plan_fetch(categories, group_min, sizes)
+    wanted, seen = set(categories), set()
+    items, pages, size, stats, observed = [], 0, 0, Counter(), {}
+    for path, members in plan:
+        skip, state = 0, {}
+        while skip is not None:
+            html = render(papers, path, skip, show)
+            pages += 1
+            size += len(html)
+            counts = Counter()
+            items.extend(listing_parser.parse_listing(html, seen=seen, stats=stats, state=state,
+                                                      wanted=wanted, counts=counts))
+            if skip == 0:
+                observed[path] = listing_parser.total_entries(html)
+            if fetch_plan.is_group(path):
+                for c in members:
+                    observed[c] = observed.get(c, 0) + counts[c]
+            skip = fetch_plan.next_skip(html, skip, show)
+    return {"plan": plan, "items": items, "requests": pages, "bytes": size, "entries": sum(stats.values()),
+            "observed": observed}
+
+def compare(a: Dict, b: Dict, truth: set) -> List[str]:
+    problems = []
+    ia, ib = {r["id"]: r for r in a["items"]}, {r["id"]: r for r in b["items"]}
+    if len(ia) != len(a["items"]) or len(ib) != len(b["items"]):
+        problems.append("输出中有重复 ID")
+    if set(ia) != truth:
+        problems.append(f"逐分类抓取 ID 集合与期望不符：缺 {sorted(truth - set(ia))} 多 {sorted(set(ia) - truth)}")
+    if set(ib) != truth:
+        problems.append(f"归档级抓取 ID 集合与期望不符：缺 {sorted(truth - set(ib))} 多 {sorted(set(ib) - truth)}")
+    volatile = ("url", "pdf_url")
+    for pid in sorted(set(ia) & set(ib)):
+        da = {k: v for k, v in ia[pid].items() if k not in volatile}
+        db = {k: v for k, v in ib[pid].items() if k not in volatile}
+        if da != db:
+            problems.append(f"{pid} 字段不一致：{da} vs {db}")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate and compare listing fetch strategies on a recorded day")
+    ap.add_argument("--day", default=DAY, help="论文记录（JSONL）")
+    ap.add_argument("--categories", default=",".join(DEFAULT_CATEGORIES), help="逗号分隔的分类列表（默认同爬虫）")
+    ap.add_argument("--group-min", type=int, default=2)
+    ap.add_argument("--show", type=int, default=2000, help="每页条数（同爬虫 --show）")
+    ap.add_argument("--page-size", type=int, default=7, help="分页校验用的小 show")
+    ap.add_argument("--json", default=None, help="将结果另存为 JSON")
+    args = ap.parse_args()
+
+    papers = load_day(args.day)
+    cats = list(dict.fromkeys(c.strip() for c in args.categories.split(",") if c.strip()))
+    truth = {p["id"] for p in papers if set(p["cats"]) & set(cats)}
+
+    # 强制合并（覆盖率阈值取 0）以便两种策略总能对比；实际规划另见下方“合并决策”
+    runs = {}
+    full = {**dict.fromkeys(cats, 1), **{fetch_plan.archive_of(c): 0 for c in cats}}
+    for name, gmin in (("per_category", 0), ("grouped", args.group_min)):
+        runs[name] = crawl(papers, cats, gmin, args.show, None if gmin == 0 else full)
+        runs[name + "_paged"] = crawl(papers, cats, gmin, args.page_size, None if gmin == 0 else full)
+
+    problems = compare(runs["per_category"], runs["grouped"], truth)
+    for name in ("per_category", "grouped"):
+        if runs[name]["items"] != runs[name + "_paged"]["items"]:
+            problems.append(f"{name}：show={args.page_size} 分页结果与 show={args.show} 不一致")
+        for path, n in runs[name]["observed"].items():
+            if n != len(listed(papers, path)):
+                problems.append(f"{name}：记录的 {path} 规模 {n} 与页面条目数 {len(listed(papers, path))} 不一致")
+
+    base, grp = runs["per_category"], runs["grouped"]
+    labels = {r["id"]: r["section"] for r in base["items"]}
+    relabel = Counter(f"{labels[r['id']]}→{r['section']}" for r in grp["items"]
+                      if r["id"] in labels and labels[r["id"]] != r["section"])
+
+    # 合并决策：首次运行没有规模记录（按覆盖率）；之后用两次抓取记录下的条目数
+    sizes = {**base["observed"], **grp["observed"]}
+    plans = {"coverage": fetch_plan.plan_fetch(cats, args.group_min),
+             "sizes": fetch_plan.plan_fetch(cats, args.group_min, sizes)}
+    costs = {k: crawl(papers, cats, args.group_min, args.show, None if k == "coverage" else sizes)
+             for k in plans}
+    print(f"📚 {os.path.basename(args.day)}：{len(papers)} 篇，命中请求分类 {len(truth)} 篇 | 分类 {len(cats)} 个")
+    print(f"🗺️ 归档级规划：{fetch_plan.describe(grp['plan'])}")
+    report = {"papers": len(papers), "kept": len(truth), "categories": len(cats), "problems": problems}
+    for name in ("per_category", "grouped", "per_category_paged", "grouped_paged"):
+        r = runs[name]
+        report[name] = {"requests": r["requests"], "bytes": r["bytes"], "entries_parsed": r["entries"],
+                        "kept": len(r["items"]), "sections": dict(Counter(i["section"] for i in r["items"]))}
+        print(f"  {name:<20} 请求 {r['requests']:>3} | {r['bytes'] / 1024:>7.1f} KB | 解析 {r['entries']:>4} 条 → "
+              f"保留 {len(r['items'])} | {report[name]['sections']}")
+    report["requests_saved"] = base["requests"] - grp["requests"]
+    report["bytes_saved"] = base["bytes"] - grp["bytes"]
+    report["relabels"] = dict(relabel)
+    print(f"💾 节省请求 {report['requests_saved']}/{base['requests']} | 节省下载 "
+          f"{report['bytes_saved'] / 1024:.1f} KB（{report['bytes_saved'] / max(1, base['bytes']):.0%}）| "
+          f"少解析 {base['entries'] - grp['entries']} 条")
+    print(f"🏷️ 小节标签差异（逐分类 → 归档级）：{dict(relabel) or '无'}")
+    if relabel:
+        problems.append(f"两种策略的小节标签不一致：{dict(relabel)}")
+    report["decision"] = {}
+    for k, plan in plans.items():
+        r = costs[k]
+        report["decision"][k] = {"plan": fetch_plan.describe(plan), "requests": r["requests"], "bytes": r["bytes"]}
+        print(f"⚖️ 合并决策（{'按覆盖率' if k == 'coverage' else '按记录的规模'}）：{fetch_plan.describe(plan)} | "
+              f"请求 {r['requests']} | {r['bytes'] / 1024:.1f} KB")
+    for p in problems:
+        print(f"✘ {p}")
+    if not problems:
+        print("✔ 两种策略输出的论文集合与字段一致，分页结果一致")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 结果保存至：{args.json}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_parser.py — 列表页解析器校验与基准：单遍 lxml 解析（listing_parser） vs 旧 Selector 解析（parse_selectors）
+
+用法：
+  python daily_arxiv/bench_parser.py                       # 校验 fixtures/ 并在 2000 条/页上测速
+  python daily_arxiv/bench_parser.py --entries 500 1000 2000 --repeat 5 --json parser_bench.json
+  python daily_arxiv/bench_parser.py --update-expected     # 用当前解析结果重写 fixtures/*.expected.jsonl
+
+校验内容（任一失败则退出码为 1）：
+- 两个解析器在每个 fixture 上逐字段输出一致；
+- 与 fixtures/<name>.expected.jsonl 中保存的期望输出一致；
+- 各小节解析到的 dt 数与小节标题中 “showing N of N entries” 一致。
+测速页面由 fixture 中的条目按 New / Cross / Replacement ≈ 4:2.5:3.5 复制生成（ID 各不相同），两种页面结构各测一次。
+"""
+
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+from scrapy.http import HtmlResponse
+
+import listing_parser
+from daily_arxiv import ArxivNewSpider
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+URL = "https://arxiv.org/list/cs.AI/new?show=2000"
+RE_SHOWING = re.compile(r"<h3>([^<]*?)\(showing (\d+) of \d+ entries\)</h3>")
+RE_ENTRY = re.compile(r"<dt>.*?</dt>\s*<dd>.*?</dd>\s*", re.S)
+RE_FIXTURE_ID = re.compile(r"\d{4}\.\d{5}")
+
+def legacy_items(html: bytes) -> List[Dict]:
+    spider = ArxivNewSpider(categories=["cs.AI"], window="new", show=2000,
+                            include_cross=True, include_repl=True, parser="selectors")
+    return list(spider.parse_selectors(HtmlResponse(URL, body=html, encoding="utf-8")))
+
+def lxml_items(html: bytes, stats: Counter | None = None) -> List[Dict]:
+    return list(listing_parser.parse_listing(html, stats=stats))
+
+def check(update: bool) -> bool:
+    ok = True
+    for name in sorted(f for f in os.listdir(FIXTURES) if f.endswith(".html")):
+        html = open(os.path.join(FIXTURES, name), "rb").read()
+        stats = Counter()
+        new, old = lxml_items(html, stats), legacy_items(html)
+        problems = []
+        if new != old:
+            diff = next((i for i, (a, b) in enumerate(zip(new, old)) if a != b), min(len(new), len(old)))
+            problems.append(f"与旧解析器不一致（{len(new)} vs {len(old)} 条，首个差异在第 {diff} 条）")
+        expected_path = os.path.join(FIXTURES, name[:-len(".html")] + ".expected.jsonl")
+        if update:
+            with open(expected_path, "w", encoding="utf-8") as f:
+                for r in new:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        elif os.path.exists(expected_path):
+            expected = [json.loads(l) for l in open(expected_path, encoding="utf-8") if l.strip()]
+            if new != expected:
+                problems.append(f"与 {os.path.basename(expected_path)} 不一致")
+        else:
+            problems.append(f"缺少 {os.path.basename(expected_path)}（--update-expected 生成）")
+        shown = {listing_parser.section_of(t): int(n) for t, n in RE_SHOWING.findall(html.decode("utf-8"))}
+        if shown != dict(stats):
+            problems.append(f"小节条数不符：标题 {shown} / 解析 {dict(stats)}")
+        ok &= not problems
+        sections = ", ".join(f"{k}={v}" for k, v in stats.items())
+        print(f"{'✔' if not problems else '✘'} {name:<26} {len(new)} 条（{sections}）" +
+              "".join(f"\n    - {p}" for p in problems))
+    return ok
+
+def synth_page(layout: str, n: int) -> bytes:
+    """用 fixture 中的条目生成含 n 条的页面（layout: shared / separate）。"""
+    html = open(os.path.join(FIXTURES, f"list_{layout}_dl.html"), encoding="utf-8").read()
+    entries = RE_ENTRY.findall(html)
+    head, tail = html[:html.index("<dl")], html[html.rindex("</dl>") + len("</dl>"):]
+    counts = {"New submissions": n * 40 // 100, "Cross submissions": n * 25 // 100}
+    counts["Replacement submissions"] = n - sum(counts.values())
+    blocks, k = [], 0
+    for title, c in counts.items():
+        body = []
+        for _ in range(c):
+            pid = f"26{k // 100000:02d}.{k % 100000:05d}"
+            body.append(RE_FIXTURE_ID.sub(pid, entries[k % len(entries)]))
+            k += 1
+        blocks.append((f"<h3>{title} (showing {c} of {c} entries)</h3>\n", "".join(body)))
+    if layout == "shared":
+        dls = "<dl id='articles'>\n" + "".join(h + b for h, b in blocks) + "</dl>"
+    else:
+        dls = "".join(f"<dl>\n{h}{b}</dl>\n" for h, b in blocks)
+    return (head + dls + tail).encode("utf-8")
+
+def timeit(fn, html: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate and benchmark the arXiv listing parsers")
+    ap.add_argument("--entries", type=int, nargs="+", default=[2000], help="测速页面的条目数")
+    ap.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    ap.add_argument("--update-expected", action="store_true", help="重写 fixtures/*.expected.jsonl")
+    ap.add_argument("--json", default=None, help="将测速结果另存为 JSON")
+    args = ap.parse_args()
+
+    print("🔎 fixtures 校验")
+    ok = check(args.update_expected)
+
+    print("\n⏱️ 解析速度（条/秒，取最快一次）")
+    report = []
+    for layout in ("shared", "separate"):
+        for n in args.entries:
+            html = synth_page(layout, n)
+            if len(lxml_items(html)) != n:
+                print(f"✘ 合成页面解析条数不符：{layout} {n}")
+                ok = False
+            t_new, t_old = timeit(lxml_items, html, args.repeat), timeit(legacy_items, html, args.repeat)
+            row = {"layout": layout, "entries": n, "lxml_seconds": round(t_new, 4), "selectors_seconds": round(t_old, 4),
+                   "lxml_per_second": round(n / t_new), "selectors_per_second": round(n / t_old),
+                   "speedup": round(t_old / t_new, 1)}
+            report.append(row)
+            print(f"  {layout:<9} {n:>5} 条 | lxml {row['lxml_per_second']:>8}/s | "
+                  f"selectors {row['selectors_per_second']:>7}/s | ×{row['speedup']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 结果保存至：{args.json}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,37 @@ ArXiv New Fetcher — 单文件可执行脚本（本地与 GitHub Runner 皆可
   2) 小节识别的正则更宽松，兼容上述变体；
   3) 日志增强，便于核对“标题显示的条数 vs 实际解析到的 `dt` 数”。
 
+流式落盘（抓取阶段不再在内存中收集条目）：
+- Scrapy 的 FEEDS 导出器把每条 item 即时追加到 `<out>.crawl.part`；爬虫正常结束后原子改名为 `<out>.crawl`；
+- 富化与抓取流水线并行：后台线程每攒够一批新 ID 就调用 arXiv API（按 --delay-sec 限速），
+  查到的元数据逐批追加到 `<out>.meta`；抓取结束后只为仍缺元数据的论文补查一轮（失败重试），
+  再按抓取顺序合并写出 `<out>`（原子替换），并删除 `<out>.crawl` / `<out>.meta`；
+- 中途崩溃可直接重跑：已完成的抓取结果（`<out>.crawl`）会被复用（`--recrawl` 强制重抓），
+  `<out>.meta` 中已查到的元数据不会重复请求；
+- 本地元数据库（meta_db.py，默认 `<out 所在目录>/meta.sqlite`）：运行前从该目录的原始 JSONL 增量同步，
+  库中已有且版本未变的论文（Cross-list、当天重跑的条目等）直接复用库中元数据、不再请求 API；
+  运行结束后把本次输出写回库中。
+- 持久化缓存（http_cache.py，--http-cache）：列表页 gzip 存储并按 If-Modified-Since / ETag 重新验证，
+  arXiv API 结果按论文逐篇缓存（与批次组成无关）；同日无上游变化的重跑几乎不产生网络请求。
+- 多日回填（--backfill START END）：抓取一次 pastweek 列表，按 `<h3>` 公告日期把条目分到各天；
+  某天在所有列表中都已翻过即交给线程池富化（各天共享 MetaStore，同一论文只请求一次）并原子写出
+  `<data-dir>/<日期>.jsonl`，各天并行、先完整先写；已存在的日期文件默认跳过（--overwrite 覆盖）。
+
+列表抓取规划（fetch_plan.py）：
+- 同一归档请求的分类不少于 --group-min（默认 2）个、且估计归档页不大于这些分类页之和时，改抓一次
+  归档级列表（如 /list/cs/new），条目按请求的分类集合过滤，避免交叉列入的论文在多个分类页上被重复下载、解析；
+  其余分类仍逐分类抓取。规模估计来自 `<out 所在目录>/.listing_sizes.json`（每次抓取后更新各列表的条目数），
+  没有记录时按请求分类占归档分类的比例估计；
+- 两种策略下小节标签一致：新论文的主分类在请求集合中记为 new，否则记为 cross；
+- 列表超过 --show 条时按 “Total of N entries” 顺序翻页；
+- 离线校验与对比：python daily_arxiv/bench_fetch_plan.py。
+
 字段 & 输出：
 - 与你的约定保持一致：`primary_category`/`cate` 输出 **代码**（如 `cs.CR`）；`url/pdf_url` 使用 **http**，`new` 段默认补 `v1`；不追加`.pdf`；
 - `include_cross` / `include_repl` 支持 **程序常量 / 环境变量 / CLI** 三层控制（优先级：CLI > ENV > 常量）。
 
 依赖：
-  pip install scrapy arxiv tqdm pydispatcher
+  pip install scrapy arxiv tqdm
 
 用法：
   本地：  python scripts/arxiv_new_fetch.py               # 输出到 ./arxiv_new_YYYYMMDD.jsonl
@@ -33,13 +58,25 @@ import sys
 import json
 import time
 import argparse
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Tuple
+import threading
+from queue import Queue
+from datetime import date, datetime, timezone, timedelta
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import scrapy
-from scrapy.crawler import CrawlerProcess
 from scrapy import signals
-from pydispatch import dispatcher
+from scrapy.crawler import CrawlerProcess
+
+import listing_parser
+import fetch_plan
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 仓库根目录：共享的 insightarxiv 包
+from insightarxiv import jsonl_io
+from http_cache import ApiCache, page_stats, scrapy_settings as cache_settings
+from meta_db import MetaDB, default_path as default_meta_db
 
 try:
     import arxiv  # 用于批量富化
@@ -84,18 +121,15 @@ def env_bool_multi(names, default: bool) -> bool:
     return default if hit is None else hit
 
 # ─────────────── Spider 定义 ───────────────
+DONE = ""   # 列表已抓完（ArxivNewSpider.progress / frontier）
+
 class ArxivNewSpider(scrapy.Spider):
     name = "arxiv_new"
     allowed_domains = ["arxiv.org"]
 
-    RE_CATEGORIES = re.compile(r"\(([a-z\-]+(?:\.[A-Za-z0-9\-]+)?)\)")
-    RE_ID_FROM_ABS = re.compile(r"/abs/(.+)$")
-    RE_STRIP_VER = re.compile(r"v\d+$")
-
-    # 段落识别正则（忽略大小写，兼容列表/提交多文案）
-    PAT_NEW   = re.compile(r"\bnew\s+submissions\b", re.I)
-    PAT_CROSS = re.compile(r"\bcross\b.*\b(lists?|submissions?)\b", re.I)
-    PAT_REPL  = re.compile(r"\breplacement(s)?\b(?:.*\bsubmissions?\b)?", re.I)
+    # 正则与小节识别规则定义在 listing_parser 中，新旧解析器共用
+    RE_ID_FROM_ABS = listing_parser.RE_ID_FROM_ABS
+    RE_STRIP_VER = listing_parser.RE_STRIP_VER
 
     BASE_SETTINGS = dict(
         ROBOTSTXT_OBEY=True,
@@ -116,19 +150,34 @@ class ArxivNewSpider(scrapy.Spider):
     )
 
     def __init__(self, *, categories: List[str], window: str, show: int,
-                 include_cross: bool, include_repl: bool):
+                 include_cross: bool, include_repl: bool, parser: str = "lxml",
+                 group_min: int = 0, sizes: Dict[str, int] | None = None,
+                 base_url: str = fetch_plan.ARXIV, sink=None):
         super().__init__()
+        self.parser = parser
         self.categories = categories
         self.window = window
         self.show = show
         self.include_cross = include_cross
         self.include_repl = include_repl
-        self.start_urls = [f"https://arxiv.org/list/{c}/{self.window}?show={self.show}" for c in self.categories]
-        self.seen_ids = set()  # 跨分类去重（按无版本 id）
+        # 归档级列表需要按分类过滤 / 跨页传递小节，只有 lxml 解析器支持
+        self.plan = fetch_plan.plan_fetch(categories, group_min if parser == "lxml" else 0, sizes)
+        self.observed: Dict[str, int] = {}  # 本次看到的列表规模（写回 .listing_sizes.json）
+        self.wanted = set(categories)
+        self.base_url = base_url
+        host = urlparse(base_url).hostname
+        self.allowed_domains = [host] if host else []   # 翻页请求要通过 Offsite 过滤
+        self.start_urls = [fetch_plan.listing_url(base_url, path, self.window, self.show) for path, _ in self.plan]
+        self.seen_ids = set()  # 跨分类去重（按无版本 id；按日期分段的列表为 (日期, id)）
+        # --backfill：条目同步交给 sink.add，每页解析完后用 sink.progress(frontier) 通知哪些日期已完整
+        self.sink = sink
+        self.progress: Dict[str, str | None] = {}
         self.logger.info(
             f"[init] cats={len(self.categories)} window={self.window} show={self.show} "
-            f"include_cross={self.include_cross} include_repl={self.include_repl}"
+            f"include_cross={self.include_cross} include_repl={self.include_repl} parser={self.parser}"
         )
+        self.logger.info(f"[plan] requests={len(self.plan)} (per-category={len(set(categories))}): "
+                         f"{fetch_plan.describe(self.plan)}")
 
     # 工具：安全取文本（保留基本空格，但压缩多空格）
     def _text(self, sel, css: str) -> str:
@@ -140,14 +189,7 @@ class ArxivNewSpider(scrapy.Spider):
         return t.strip()
 
     def _sec_flag_from_title(self, title: str) -> str | None:
-        low = " ".join(title.split()).lower()
-        if self.PAT_NEW.search(low):
-            return "new"
-        if self.PAT_CROSS.search(low):
-            return "cross"
-        if self.PAT_REPL.search(low):
-            return "repl"
-        return None
+        return listing_parser.section_of(title)
 
     def _iter_dt_dd_between_h3(self, h3) -> List[Tuple[scrapy.Selector, scrapy.Selector | None]]:
         """从当前 `<h3>` 起向后扫描同级兄弟，收集直到下一个 `<h3>`，返回 (dt, dd) 列表。"""
@@ -164,7 +206,63 @@ class ArxivNewSpider(scrapy.Spider):
                 out.append((sib, dd[0] if dd else None))
         return out
 
-    def parse(self, response):
+    def parse(self, response, skip: int = 0, state: Dict | None = None):
+        self.crawler.stats.inc_value("listing/pages")
+        self.crawler.stats.inc_value("listing/bytes", len(response.body))
+        if self.parser == "selectors":
+            yield from self.parse_selectors(response)
+            return
+        cat = response.url.split("/")[-2]
+        self.logger.info(f"[parse] {cat}: {response.url}")
+        stats = Counter()
+        state = {} if state is None else state
+        total_yield = 0
+        counts = Counter()
+        for item in listing_parser.parse_listing(response.body, include_cross=self.include_cross,
+                                                 include_repl=self.include_repl, seen=self.seen_ids, stats=stats,
+                                                 wanted=self.wanted, state=state, counts=counts):
+            total_yield += 1
+            if self.sink is not None:
+                self.sink.add(item)
+            yield item
+        for sec, n in stats.items():
+            self.logger.info(f"  section={sec} dt_nodes={n}")
+        self.logger.info(f"  yielded={total_yield}")
+        self.crawler.stats.inc_value("listing/entries", sum(stats.values()))
+        self.crawler.stats.inc_value("listing/yielded", total_yield)
+        self.observe(cat, response.body, skip, counts)
+
+        # 翻页：顺序请求下一页，并把当前小节带过去（下一页开头可能没有 <h3>）
+        nxt = fetch_plan.next_skip(response.body, skip, self.show)
+        self.progress[cat] = DONE if nxt is None else state.get("day")
+        if self.sink is not None:
+            self.sink.progress(self.frontier())
+        if nxt is not None:
+            yield scrapy.Request(fetch_plan.listing_url(self.base_url, cat, self.window, self.show, nxt),
+                                 callback=self.parse, cb_kwargs={"skip": nxt, "state": state})
+
+    def observe(self, path: str, html: bytes, skip: int, counts: Counter) -> None:
+        """记录列表规模：首页的 “Total of N entries”；归档页上另记各请求分类的条目数（即对应分类页的规模）。"""
+        if skip == 0:
+            total = listing_parser.total_entries(html)
+            if total is not None:
+                self.observed[path] = total
+        if fetch_plan.is_group(path):
+            for c in dict(self.plan)[path]:
+                self.observed[c] = self.observed.get(c, 0) + counts[c]
+
+    def frontier(self) -> str | None:
+        """按日期分段的列表从新到旧排列：比所有未抓完列表的当前日期都新的日期已经完整。
+        返回这一边界日期；全部抓完时返回 DONE，仍有列表未开始（或尚未见到日期）时返回 None。"""
+        if len(self.progress) < len(self.plan):
+            return None
+        pending = [d for d in self.progress.values() if d != DONE]
+        if None in pending:
+            return None
+        return max(pending) if pending else DONE
+
+    # 旧解析器（Scrapy Selector + 逐节点 following-sibling 扫描）：保留作对照与回退（--parser selectors）
+    def parse_selectors(self, response):
         cat = response.url.split("/")[-2]
         self.logger.info(f"[parse] {cat}: {response.url}")
 
@@ -232,138 +330,352 @@ class ArxivNewSpider(scrapy.Spider):
             return None
         self.seen_ids.add(base_id)
 
-        # 2) 标题 / 作者
+        # 2) 标题 / 作者 / 分类文本
         title_txt = (self._text(dd, ".list-title").replace("Title:", "").strip() if dd is not None else "")
         authors = (dd.css(".list-authors a::text").getall() if dd is not None else [])
+        subjects = self._text(dd, ".list-subjects") if dd is not None else ""
+        primary = self._text(dd, ".list-subjects .primary-subject") if dd is not None else ""
+        return listing_parser.make_item(full_id, title_txt, authors, subjects, primary, sec_flag)
 
-        # 3) 分类：所有代码 + 主类代码
-        subjects_text_for_codes = self._text(dd, ".list-subjects") if dd is not None else ""
-        all_cats = sorted(set(self.RE_CATEGORIES.findall(subjects_text_for_codes)))
-        primary_code = ""
-        if dd is not None:
-            primary_block = self._text(dd, ".list-subjects .primary-subject")
-            m2 = self.RE_CATEGORIES.search(primary_block)
-            if m2:
-                primary_code = m2.group(1)
-        if not primary_code and all_cats:
-            primary_code = all_cats[0]
-
-        # 4) 版本化链接
-        if "v" in full_id:
-            versioned = full_id
-        elif sec_flag == "new":
-            versioned = base_id + "v1"
-        else:
-            versioned = base_id
-
-        abs_url = f"http://arxiv.org/abs/{versioned}"
-        pdf_url = f"http://arxiv.org/pdf/{versioned}"
-
-        return {
-            "id": base_id,
-            "title": title_txt,
+# ─────────────── 批量元数据补齐（按批 200 条） ───────────────
+def chunked(it: Iterable, n: int) -> Iterator[List]:
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+def fetch_arxiv_meta(client, ids: List[str], retries: int) -> Dict[str, Dict]:
+    """查询一批 ID 的官方元数据，返回 无版本 id → 元数据；整批失败时返回空字典。"""
+    results = []
+    for attempt in range(retries):
+        try:
+            search = arxiv.Search(id_list=ids)
+            results = list(client.results(search))
+            break
+        except Exception:
+            if attempt == retries - 1:
+                results = []
+            else:
+                time.sleep(2)
+    meta: Dict[str, Dict] = {}
+    for r in results:
+        rid = getattr(r, "get_short_id", lambda: None)() or r.entry_id.split("/")[-1]
+        rid = re.sub(r"v\d+$", "", rid)
+        authors = [getattr(a, "name", str(a)) for a in (getattr(r, "authors", None) or [])]
+        cats = []
+        if getattr(r, "categories", None):
+            cats = sorted({str(c) for c in r.categories})
+        primary = ""
+        if getattr(r, "primary_category", None):
+            primary = str(r.primary_category)
+        meta[rid] = {
+            "title": (getattr(r, "title", "") or "").strip(),
             "authors": authors,
-            "categories": all_cats,
-            "primary_category": primary_code,   # 代码，如 cs.CR
-            "pdf_link": None,
-            "comments": "",
-            "url": abs_url,
-            "summary": "",
-            "comment": None,
-            "pdf_url": pdf_url,
-            "cate": primary_code,
-            "date": None,
-            "updated": None,
-            "section": sec_flag,
+            "abstract": getattr(r, "summary", None),
+            "comment": getattr(r, "comment", None) or None,
+            "categories": cats,
+            "primary_category": primary,
+            "abs_url": f"http://arxiv.org/abs/{r.entry_id.split('/')[-1]}",
+            "pdf_url": f"http://arxiv.org/pdf/{r.entry_id.split('/')[-1]}",
+            "published_at": getattr(r, "published", None).date().isoformat() if getattr(r, "published", None) else None,
+            "updated_at": getattr(r, "updated", None).date().isoformat() if getattr(r, "updated", None) else None,
         }
+    return meta
+
+def merge_meta(row: Dict, add: Dict) -> Dict:
+    merged = dict(row)
+    # 仅在缺失时补基础字段
+    for k, v in (
+        ("title", add.get("title")),
+        ("authors", add.get("authors")),
+        ("categories", add.get("categories")),
+        ("pdf_url", add.get("pdf_url")),
+    ):
+        if not merged.get(k) and v:
+            merged[k] = v
+    # 摘要/日期：按你的示例写入
+    if add.get("abstract") is not None:
+        merged["summary"] = add["abstract"] or ""
+    if add.get("published_at"):
+        merged["date"] = add["published_at"]  # YYYY-MM-DD
+    if add.get("updated_at"):
+        merged["updated"] = add["updated_at"]
+    return merged
+
+class Pacer:
+    """arXiv API 限速：相邻两次请求至少间隔 delay 秒（只补足差额，而不是每批后固定 sleep）。"""
+    def __init__(self, delay: float):
+        self.delay, self.last = delay, float("-inf")
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            gap = self.last + self.delay - time.monotonic()
+            if gap > 0:
+                time.sleep(gap)
+            self.last = time.monotonic()
+
+class MetaStore:
+    """无版本 id → 元数据；可选地逐批追加到 JSONL 文件，重跑时从中恢复，已查到的 ID 不再请求。
+    给出本地元数据库 `db` 时，库中已有且版本未变的论文同样不再请求，直接复用库中的元数据。"""
+    def __init__(self, path: str | None = None, db: MetaDB | None = None, reuse_replaced: bool = False):
+        self.meta: Dict[str, Dict] = {}
+        self.path, self.f = path, None
+        self.db, self.reuse_replaced = db, reuse_replaced
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        d = json.loads(line)
+                    except json.JSONDecodeError:   # 崩溃时留下的半行
+                        continue
+                    self.meta[d.pop("id")] = d
 
-# ─────────────── 批量元数据补齐（按批 200 条） ───────────────
-def enrich_with_arxiv_api(rows: List[Dict], batch_size: int, delay_sec: float, retries: int) -> List[Dict]:
-    """使用 arXiv 官方 API 批量补齐摘要、评论、时间等；失败不中断。"""
-    if not rows or not HAVE_ARXIV:
-        return rows
-
-    client = arxiv.Client(page_size=batch_size, delay_seconds=delay_sec, num_retries=retries)
+    def __contains__(self, pid) -> bool:
+        return pid in self.meta
 
-    ids = [r["id"] for r in rows if r.get("id")]
+    def needs(self, item: Dict) -> bool:
+        """该条目是否需要调用 API。"""
+        pid = item.get("id")
+        return pid not in self.meta and (self.db is None or self.db.stale(item, self.reuse_replaced))
 
-    def chunked(seq, n):
-        for i in range(0, len(seq), n):
-            yield seq[i:i+n]
+    def get(self, pid, default=None):
+        got = self.meta.get(pid)
+        if got is None and self.db is not None:
+            got = self.db.get(pid)
+        return default if got is None else got
 
-    meta: Dict[str, Dict] = {}
-    for chunk in tqdm(list(chunked(ids, batch_size)), desc="arXiv API", unit="batch"):
-        results = []
-        for attempt in range(retries):
-            try:
-                search = arxiv.Search(id_list=chunk)
-                results = list(client.results(search))
-                break
-            except Exception:
-                if attempt == retries - 1:
-                    results = []
-                else:
-                    time.sleep(2)
-        for r in results:
-            rid = getattr(r, "get_short_id", lambda: None)() or r.entry_id.split("/")[-1]
-            rid = re.sub(r"v\d+$", "", rid)
-            authors = [getattr(a, "name", str(a)) for a in (getattr(r, "authors", None) or [])]
-            cats = []
-            if getattr(r, "categories", None):
-                cats = sorted({str(c) for c in r.categories})
-            primary = ""
-            if getattr(r, "primary_category", None):
-                primary = str(r.primary_category)
-            meta[rid] = {
-                "title": (getattr(r, "title", "") or "").strip(),
-                "authors": authors,
-                "abstract": getattr(r, "summary", None),
-                "comment": getattr(r, "comment", None) or None,
-                "categories": cats,
-                "primary_category": primary,
-                "abs_url": f"http://arxiv.org/abs/{r.entry_id.split('/')[-1]}",
-                "pdf_url": f"http://arxiv.org/pdf/{r.entry_id.split('/')[-1]}",
-                "published_at": getattr(r, "published", None).date().isoformat() if getattr(r, "published", None) else None,
-                "updated_at": getattr(r, "updated", None).date().isoformat() if getattr(r, "updated", None) else None,
-            }
-        time.sleep(delay_sec)
-
-    out: List[Dict] = []
-    for row in rows:
-        iid = row.get("id")
-        add = meta.get(iid, {})
-        merged = dict(row)
-        # 仅在缺失时补基础字段
-        for k, v in (
-            ("title", add.get("title")),
-            ("authors", add.get("authors")),
-            ("categories", add.get("categories")),
-            ("pdf_url", add.get("pdf_url")),
-        ):
-            if not merged.get(k) and v:
-                merged[k] = v
-        # 摘要/日期：按你的示例写入
-        if add.get("abstract") is not None:
-            merged["summary"] = add["abstract"] or ""
-        if add.get("published_at"):
-            merged["date"] = add["published_at"]  # YYYY-MM-DD
-        if add.get("updated_at"):
-            merged["updated"] = add["updated_at"]
-        out.append(merged)
-    return out
-
-# ─────────────── 工具：写 JSONL（原子替换） ───────────────
-def write_jsonl(rows: List[Dict], path: str):
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
+    def versioned(self, rows: Iterable[Dict]) -> Iterator[Dict]:
+        """写回元数据库用：本次查到元数据的条目改用 API 返回的带版本链接，使库中版本号随之更新。"""
         for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-    os.replace(tmp, path)
+            got = self.meta.get(r.get("id"))
+            yield dict(r, url=got["abs_url"]) if got and got.get("abs_url") else r
+
+    def add(self, meta: Dict[str, Dict]):
+        with self.lock:
+            self.meta.update(meta)
+            if self.path and meta:
+                if self.f is None:
+                    self.f = open(self.path, "a", encoding="utf-8")
+                for pid, d in meta.items():
+                    self.f.write(json.dumps({"id": pid, **d}, ensure_ascii=False) + "\n")
+                self.f.flush()
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+def fetch_into(store: MetaStore, client, pacer: Pacer, ids: List[str], retries: int,
+               cache: ApiCache | None = None) -> float:
+    """限速后查询一批 ID 并写入 store，返回本批耗时（不含限速等待）；API 缓存中已有的 ID 不再请求，
+    整批命中时不请求、不等待。"""
+    got = cache.get(ids) if cache else {}
+    store.add(got)
+    ids = [pid for pid in ids if pid not in got]
+    if not ids:
+        return 0.0
+    pacer.wait()
+    t0 = time.monotonic()
+    meta = fetch_arxiv_meta(client, ids, retries)
+    store.add(meta)
+    if cache:
+        cache.put(meta)
+    return time.monotonic() - t0
+
+class EnrichWorker(threading.Thread):
+    """与爬虫并行的富化线程：接收 item_scraped 信号中的 ID，每攒够一批就查询一次 API。"""
+    def __init__(self, store: MetaStore, client, pacer: Pacer, batch_size: int, retries: int,
+                 cache: ApiCache | None = None):
+        super().__init__(name="arxiv-enrich", daemon=True)
+        self.store, self.client, self.pacer, self.cache = store, client, pacer, cache
+        self.batch_size, self.retries = batch_size, retries
+        self.queue: Queue = Queue()
+        self.batches, self.busy = 0, 0.0
+
+    def submit(self, item, response=None, spider=None):
+        pid = item.get("id")
+        if pid and self.store.needs(item):
+            self.queue.put(pid)
+
+    def run(self):
+        buf: List[str] = []
+        while True:
+            pid = self.queue.get()
+            if pid is not None:
+                buf.append(pid)
+            if buf and (pid is None or len(buf) >= self.batch_size):
+                self.busy += fetch_into(self.store, self.client, self.pacer, buf, self.retries, self.cache)
+                self.batches += 1
+                buf = []
+            if pid is None:
+                return
+
+    def finish(self):
+        """抓取结束：提交剩余不足一批的 ID 并等待线程退出。"""
+        self.queue.put(None)
+        self.join()
+
+def enrich_stream(src: str, out: str, store: MetaStore, client, pacer: Pacer,
+                  batch_size: int, retries: int, cache: ApiCache | None = None) -> Tuple[int, int, int, int]:
+    """为 `src` 中仍需请求的论文（流水线中失败的批次，或未启用流水线时的全部论文）补查一轮，
+    再按 `src` 顺序合并写出 `out`（原子替换）。返回 (总条数, 补查条数, 仍缺元数据的条数, 复用本地库的条数)。"""
+    missing = [r["id"] for r in iter_jsonl(src) if r.get("id") and store.needs(r)]
+    for chunk in tqdm(list(chunked(missing, batch_size)), desc="arXiv API", unit="batch"):
+        fetch_into(store, client, pacer, chunk, retries, cache)
+    retried, missing = len(missing), [pid for pid in missing if pid not in store]
+    counts = Counter()
+    def merged():
+        for r in iter_jsonl(src):
+            pid = r.get("id")
+            counts["reused"] += pid not in store and store.get(pid) is not None
+            counts["n"] += 1
+            yield merge_meta(r, store.get(pid, {}))
+    write_jsonl(merged(), out)
+    return counts["n"], retried, len(missing), counts["reused"]
+
+# ─────────────── 多日回填（--backfill） ───────────────
+class SharedEnricher:
+    """多个写出任务共享的富化：同一 ID 只请求一次，正被其他任务请求时等待其结果。"""
+    def __init__(self, store: MetaStore, client, pacer: Pacer, batch_size: int, retries: int,
+                 cache: ApiCache | None = None):
+        self.store, self.client, self.pacer, self.cache = store, client, pacer, cache
+        self.batch_size, self.retries = batch_size, retries
+        self.inflight: set = set()
+        self.cond = threading.Condition()
+        self.requested = 0
+
+    def ensure(self, rows: List[Dict]):
+        ids = list(dict.fromkeys(r["id"] for r in rows if r.get("id") and self.store.needs(r)))
+        with self.cond:
+            mine = [pid for pid in ids if pid not in self.inflight and pid not in self.store]
+            self.inflight.update(mine)
+            self.requested += len(mine)
+        try:
+            for chunk in chunked(mine, self.batch_size):
+                fetch_into(self.store, self.client, self.pacer, chunk, self.retries, self.cache)
+        finally:
+            with self.cond:
+                self.inflight.difference_update(mine)
+                self.cond.notify_all()
+        with self.cond:
+            self.cond.wait_for(lambda: self.inflight.isdisjoint(ids))
+
+class BackfillWriter:
+    """按公告日期收集条目；某天在所有列表中都已翻过即为完整，立刻交给线程池：
+    富化（SharedEnricher，跨天去重）后原子写出 <data_dir>/<day>.jsonl。"""
+    def __init__(self, days: List[str], data_dir: str, enricher: SharedEnricher | None, workers: int):
+        self.days, self.data_dir, self.enricher = set(days), data_dir, enricher
+        self.buckets: Dict[str, List[Dict]] = defaultdict(list)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
+        self.futures: Dict = {}
+        self.t0 = time.monotonic()
+
+    def add(self, item: Dict):
+        day = item.get("announced")
+        if day in self.days and day not in self.futures:
+            self.buckets[day].append(dict(item))
+
+    def progress(self, frontier: str | None):
+        if frontier is None:
+            return
+        for day in sorted(self.buckets):
+            if frontier == DONE or day > frontier:
+                self.futures[day] = self.pool.submit(self._write, day, self.buckets.pop(day))
+
+    def _write(self, day: str, rows: List[Dict]) -> Tuple[int, float]:
+        if self.enricher:
+            self.enricher.ensure(rows)
+            store = self.enricher.store
+            rows = [merge_meta(r, store.get(r.get("id"), {})) for r in rows]
+        for r in rows:
+            r.pop("announced", None)
+        write_jsonl(rows, os.path.join(self.data_dir, f"{day}.jsonl"))
+        return len(rows), time.monotonic() - self.t0
+
+    def finish(self, complete: bool) -> Dict[str, Tuple[int, float]]:
+        """抓取结束：列表全部抓完时写出剩余日期；等待所有写出任务，返回 日期 → (条数, 完成时刻)。"""
+        if complete:
+            self.progress(DONE)
+        self.pool.shutdown(wait=True)
+        return {day: f.result() for day, f in sorted(self.futures.items())}
+
+def day_range(start: str, end: str) -> List[str]:
+    a, b = date.fromisoformat(start), date.fromisoformat(end)
+    return [(a + timedelta(days=i)).isoformat() for i in range((b - a).days + 1)]
+
+def run_backfill(args, categories: List[str], settings: Dict, store: MetaStore | None, client, pacer: Pacer,
+                 api_cache: ApiCache | None, db: MetaDB | None):
+    """抓取一次 pastweek 列表，按公告日期拆成每日文件；已存在的日期文件默认跳过（--overwrite 覆盖）。"""
+    days = day_range(*args.backfill)
+    existing = [d for d in days if jsonl_io.exists(os.path.join(args.data_dir, f"{d}.jsonl"))]
+    if not args.overwrite:
+        days = [d for d in days if d not in existing]
+    if existing:
+        print(f"{'♻️ 覆盖' if args.overwrite else '⏭️ 跳过'}已存在的 {len(existing)} 天：{', '.join(existing)}")
+    if not days:
+        print("✅ 没有需要回填的日期")
+        return
+    os.makedirs(args.data_dir, exist_ok=True)
+    enricher = SharedEnricher(store, client, pacer, args.batch_size, args.retries, api_cache) if store else None
+    writer = BackfillWriter(days, args.data_dir, enricher, args.backfill_workers)
+    print(f"📅 回填 {days[0]} ~ {days[-1]}（{len(days)} 天），列表窗口 pastweek")
+
+    process = CrawlerProcess(settings=settings)
+    crawler = process.create_crawler(ArxivNewSpider)
+    sizes_path = os.path.join(args.data_dir, fetch_plan.SIZES_FILE)
+    process.crawl(crawler, categories=categories, window="pastweek", show=args.show,
+                  include_cross=args.include_cross, include_repl=args.include_repl,
+                  parser="lxml", group_min=args.group_min, sizes=fetch_plan.load_sizes(sizes_path, "pastweek"),
+                  sink=writer)
+    try:
+        process.start()
+    except Exception as e:
+        print(f"❌ Scrapy 运行失败：{e}", file=sys.stderr)
+        sys.exit(2)
+    spider = crawler.spider
+    complete = crawler.stats.get_value("finish_reason") == "finished" and spider.frontier() == DONE
+    if complete:
+        fetch_plan.save_sizes(sizes_path, "pastweek", spider.observed)
+    left = sorted(writer.buckets)
+    written = writer.finish(complete)
+    if store:
+        store.close()
+    for day, (n, t) in written.items():
+        print(f"  {day}：{n} 条 → {jsonl_io.resolve(os.path.join(args.data_dir, day + '.jsonl'))}（{t:.1f}s 时写完）")
+    if not complete and left:
+        print(f"⚠️ 列表未完整抓取，未写出：{', '.join(left)}", file=sys.stderr)
+    missing = [d for d in days if d not in written and d not in left]
+    if missing:
+        print(f"ℹ️ 列表中没有以下日期的公告（周末 / 节假日，或早于 pastweek 窗口）：{', '.join(missing)}")
+    if enricher:
+        total = sum(n for n, _ in written.values())
+        print(f"🧾 富化：{total} 条，去重后请求 API {enricher.requested} 篇"
+              + (f" | API 缓存：{api_cache.summary()}" if api_cache else ""))
+    if db:
+        for day in written:
+            db.ingest_file(os.path.join(args.data_dir, f"{day}.jsonl"))
+        db.close()
+    if not complete:
+        sys.exit(2)
+
+# ─────────────── 工具：流式 JSONL（.jsonl / .jsonl.gz / .jsonl.zst，见 insightarxiv/jsonl_io.py） ───────────────
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    return jsonl_io.iter_jsonl(path)
+
+def count_lines(path: str) -> int:
+    return jsonl_io.count_rows(path)
+
+# ─────────────── 工具：写 JSONL（原子替换；按扩展名 / JSONL_COMPRESSION 压缩） ───────────────
+def write_jsonl(rows: Iterable[Dict], path: str) -> str:
+    return jsonl_io.write_jsonl(rows, path)
 
 # ─────────────── CLI 与主流程 ───────────────
 
-def parse_args():
+def parse_args(argv=None):
     # 输出优先：OUT_PATH > RAW_JSONL_FILE > TARGET_DATE 推导 > ./arxiv_new_YYYYMMDD.jsonl
     env_out = os.getenv("OUT_PATH") or os.getenv("RAW_JSONL_FILE")
     if not env_out and os.getenv("TARGET_DATE"):
@@ -398,8 +710,20 @@ def parse_args():
     p.add_argument("--retry-times", type=int, default=int(os.getenv("RETRY_TIMES", 2)))
     p.add_argument("--at-start", type=float, default=float(os.getenv("AT_START", 0.25)))
     p.add_argument("--at-max", type=float, default=float(os.getenv("AT_MAX", 2.0)))
-    p.add_argument("--httpcache-ttl", type=int, default=int(os.getenv("CACHE_TTL", 1800)))
+    p.add_argument("--http-cache", action="store_true", default=env_bool_multi(["HTTP_CACHE"], False),
+                   help="持久化缓存列表页（gzip，过期后按 If-Modified-Since/ETag 重新验证）与 arXiv API 结果（ENV:HTTP_CACHE）")
+    p.add_argument("--cache-dir", default=os.getenv("HTTP_CACHE_DIR"),
+                   help="缓存目录（默认 <out 所在目录>/.httpcache；ENV:HTTP_CACHE_DIR）")
+    p.add_argument("--httpcache-ttl", type=int, default=int(os.getenv("CACHE_TTL", 1800)),
+                   help="列表页缓存的新鲜期（秒）：期内直接使用，之后做条件请求")
+    p.add_argument("--api-cache-ttl", type=int, default=int(os.getenv("API_CACHE_TTL", 86400)),
+                   help="arXiv API 结果缓存的有效期（秒，0 = 不过期；ENV:API_CACHE_TTL）")
     p.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"))
+    p.add_argument("--parser", choices=["lxml", "selectors"], default=os.getenv("LISTING_PARSER", "lxml"),
+                   help="列表页解析器：lxml 单遍解析（默认）或旧的 Selector 实现（ENV:LISTING_PARSER）")
+    p.add_argument("--group-min", type=int, default=int(os.getenv("GROUP_MIN", 2)),
+                   help="同一归档请求的分类不少于该数时才考虑改抓归档级列表（如 /list/cs/new），"
+                        "是否改抓再按列表规模决定；0 = 逐分类抓取（ENV:GROUP_MIN）")
 
     # 元数据富化（默认 True）
     p.add_argument("--enrich", dest="enrich", action="store_true", help="抓取后使用 arXiv API 批量补齐元数据")
@@ -409,12 +733,27 @@ def parse_args():
     p.add_argument("--batch-size", type=int, default=int(os.getenv("ARXIV_BATCH_SIZE", 200)), help="arXiv API 每批条数")
     p.add_argument("--delay-sec", type=float, default=float(os.getenv("ARXIV_DELAY_SEC", 3.0)), help="批间隔秒")
     p.add_argument("--retries", type=int, default=int(os.getenv("ARXIV_RETRIES", 5)), help="API 重试次数")
-
-    return p.parse_args()
-
-
-def main():
-    args = parse_args()
+    p.add_argument("--backfill", nargs=2, metavar=("START", "END"), default=None,
+                   help="回填 START~END（YYYY-MM-DD，含两端）：抓取一次 pastweek 列表，按公告日期写出 <data-dir>/<日期>.jsonl")
+    p.add_argument("--data-dir", default="data", help="--backfill 的输出目录")
+    p.add_argument("--overwrite", action="store_true", help="--backfill 时覆盖已存在的日期文件（默认跳过）")
+    p.add_argument("--backfill-workers", type=int, default=int(os.getenv("BACKFILL_WORKERS", 4)),
+                   help="并行富化 / 写出日期文件的线程数")
+    p.add_argument("--recrawl", action="store_true", help="忽略上次已完成的抓取结果（<out>.crawl），重新抓取")
+    p.add_argument("--meta-db", default=os.getenv("META_DB"),
+                   help="本地元数据库路径（默认 <out 所在目录>/meta.sqlite；ENV:META_DB）")
+    p.add_argument("--no-meta-db", dest="use_meta_db", action="store_false", help="不使用本地元数据库，全部请求 API")
+    p.add_argument("--reuse-replaced", action="store_true", default=env_bool_multi(["ENRICH_REUSE_REPL"], False),
+                   help="Replacement 条目只要库中已有就复用（更省请求，但摘要可能是旧版本；ENV:ENRICH_REUSE_REPL）")
+    p.add_argument("--pipeline", dest="pipeline", action="store_true", help="抓取过程中即开始富化（默认）")
+    p.add_argument("--no-pipeline", dest="pipeline", action="store_false", help="抓取完成后再统一富化")
+    p.set_defaults(pipeline=env_bool_multi(["ENRICH_PIPELINE"], True))
+
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
     categories = [c.strip() for c in args.categories.split(",") if c.strip()]
 
@@ -431,39 +770,114 @@ def main():
         LOG_LEVEL=args.log_level,
     ))
 
-    collected: List[Dict] = []
+    base_dir = args.data_dir if args.backfill else (os.path.dirname(args.out) or ".")
+    cache_dir = args.cache_dir or os.path.join(base_dir, ".httpcache")
+    if args.http_cache:
+        settings.update(cache_settings(cache_dir, args.httpcache_ttl))
+        print(f"🗄️ 持久化缓存：{cache_dir}（列表页新鲜期 {args.httpcache_ttl}s，API 结果有效期 {args.api_cache_ttl}s）")
+
+    enrich = args.enrich and HAVE_ARXIV
+    if args.enrich and not HAVE_ARXIV:
+        print("⚠️ 未安装 arxiv 库，跳过富化（pip install arxiv）")
+    db = None
+    if enrich and args.use_meta_db:
+        db = MetaDB(args.meta_db or default_meta_db(base_dir))
+        synced = db.sync_dir(base_dir)
+        print(f"🗃️ 本地元数据库 {db.path}：{len(db)} 篇（本次同步 {synced} 个文件）")
+    store = MetaStore(None if args.backfill else args.out + ".meta", db, args.reuse_replaced) if enrich else None
+    client = arxiv.Client(page_size=args.batch_size, delay_seconds=args.delay_sec, num_retries=args.retries) if enrich else None
+    pacer = Pacer(args.delay_sec)
+    api_cache = ApiCache(cache_dir, args.api_cache_ttl) if enrich and args.http_cache else None
+    worker = None
+    if args.backfill:
+        run_backfill(args, categories, settings, store, client, pacer, api_cache, db)
+        return
+
+    t_start = time.monotonic()
+    crawl_path = args.out + ".crawl"
+    if os.path.exists(crawl_path) and not args.recrawl:
+        print(f"↩️ 复用已完成的抓取结果：{crawl_path}（--recrawl 可强制重抓）")
+    else:
+        os.makedirs(os.path.dirname(crawl_path) or ".", exist_ok=True)
+        part = crawl_path + ".part"
+        sizes_path = os.path.join(base_dir, fetch_plan.SIZES_FILE)
+        settings["FEEDS"] = {part: {"format": "jsonlines", "encoding": "utf8", "overwrite": True}}
+        process = CrawlerProcess(settings=settings)
+        crawler = process.create_crawler(ArxivNewSpider)
+        if enrich and args.pipeline:
+            worker = EnrichWorker(store, client, pacer, args.batch_size, args.retries, api_cache)
+            crawler.signals.connect(worker.submit, signal=signals.item_scraped)
+            worker.start()
+        process.crawl(crawler,
+                      categories=categories,
+                      window=args.window,
+                      show=args.show,
+                      include_cross=args.include_cross,
+                      include_repl=args.include_repl,
+                      parser=args.parser,
+                      group_min=args.group_min,
+                      sizes=fetch_plan.load_sizes(sizes_path, args.window))
 
-    def _collect_item(item, response, spider):
         try:
-            collected.append(dict(item))
-        except Exception:
-            pass
-
-    dispatcher.connect(_collect_item, signal=signals.item_scraped)
-
-    process = CrawlerProcess(settings=settings)
-    process.crawl(ArxivNewSpider,
-                  categories=categories,
-                  window=args.window,
-                  show=args.show,
-                  include_cross=args.include_cross,
-                  include_repl=args.include_repl)
-
-    try:
-        process.start()  # 阻塞直到爬完
-    except Exception as e:
-        print(f"❌ Scrapy 运行失败：{e}", file=sys.stderr)
-        sys.exit(2)
-
-    rows = collected
-    if args.enrich:
-        if not HAVE_ARXIV:
-            print("⚠️ 未安装 arxiv 库，跳过富化（pip install arxiv）")
+            process.start()  # 阻塞直到爬完
+        except Exception as e:
+            print(f"❌ Scrapy 运行失败：{e}", file=sys.stderr)
+            sys.exit(2)
+        t_crawl = time.monotonic() - t_start
+        overlapped = worker.busy if worker else 0.0   # 抓取期间已完成的富化耗时
+        if worker:
+            worker.finish()
+        reason = crawler.stats.get_value("finish_reason")
+        if reason != "finished":
+            if store: store.close()
+            print(f"❌ 抓取未正常结束（{reason}），已抓到的条目保留在 {part}", file=sys.stderr)
+            sys.exit(2)
+        fetch_plan.save_sizes(sizes_path, args.window, crawler.spider.observed)
+        pages, size = crawler.stats.get_value("listing/pages", 0), crawler.stats.get_value("listing/bytes", 0)
+        entries, kept = crawler.stats.get_value("listing/entries", 0), crawler.stats.get_value("listing/yielded", 0)
+        print(f"📄 列表页 {pages} 个 / {size / 1e6:.2f} MB | 解析条目 {entries}，去重过滤后 {kept}"
+              f"（逐分类需 {len(set(categories))} 个列表）")
+        if args.http_cache:
+            print(f"🗄️ 列表页缓存：{page_stats(crawler.stats.get_stats())}")
+        if not os.path.exists(part):   # 没有任何条目时导出器不会创建文件
+            open(part, "w").close()
+        os.replace(part, crawl_path)
+
+    if enrich:
+        t_enrich = time.monotonic()
+        n, retried, failed, reused = enrich_stream(crawl_path, args.out, store, client, pacer,
+                                                   args.batch_size, args.retries, api_cache)
+        store.close()
+        if api_cache:
+            print(f"🗄️ API 缓存：{api_cache.summary()}")
+        if db:
+            db.ingest_rows(store.versioned(iter_jsonl(args.out)))
+            db.close()
+            fetched = n - reused
+            print(f"🗃️ 复用本地库 {reused}/{n} 篇，API 请求 {fetched} 篇 / "
+                  f"{(fetched + args.batch_size - 1) // args.batch_size} 批"
+                  f"（全部请求需 {(n + args.batch_size - 1) // args.batch_size} 批）")
+        os.remove(crawl_path)
+        if os.path.exists(store.path):
+            os.remove(store.path)
+        if worker:
+            total = time.monotonic() - t_start
+            tail = time.monotonic() - t_enrich
+            serial = t_crawl + worker.busy + tail
+            print(f"⏱️ 抓取 {t_crawl:.1f}s | 抓取期间富化 {worker.batches} 批 / {worker.busy:.1f}s"
+                  f"（与抓取重叠 {overlapped:.1f}s）| 收尾补查 {retried} 篇 / {tail:.1f}s"
+                  f" | 端到端 {total:.1f}s，较串行（≈{serial:.1f}s）节省 {serial - total:.1f}s")
+        if failed:
+            print(f"⚠️ {failed} 篇论文未取得元数据（保留抓取到的字段）")
+    else:
+        n = count_lines(crawl_path)
+        out = jsonl_io.resolve(args.out)
+        if jsonl_io.codec_of(out):   # 压缩输出：转写一遍；纯文本直接改名
+            write_jsonl(iter_jsonl(crawl_path), out)
+            os.remove(crawl_path)
         else:
-            rows = enrich_with_arxiv_api(collected, args.batch_size, args.delay_sec, args.retries)
-
-    write_jsonl(rows, args.out)
-    print(f"\n✅ 完成：{len(rows)} 条，输出文件：{args.out}")
+            os.replace(crawl_path, out)
+    print(f"\n✅ 完成：{n} 条，输出文件：{jsonl_io.resolve(args.out)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fetch_plan.py — 列表页抓取规划：能用归档级列表（/list/cs/new）就不逐分类抓取
+
+逐分类抓取 /list/<cat>/new 时，交叉列入多个分类的论文会在每个分类页上各出现一次，
+下载并解析后再被 `seen_ids` 丢弃。改为抓取一次归档级列表（cs、eess、math ……）时：
+- 归档页的 New 小节包含主分类属于该归档的全部新论文，Cross 小节包含从其他归档交叉列入的论文，
+  Replacement 小节包含涉及该归档的全部替换条目——覆盖这些分类页的并集；
+- 条目只保留分类与请求集合有交集的（`listing_parser.parse_listing(wanted=...)`）。
+
+但归档页包含整个归档的条目：cs 下只请求两三个分类时，/list/cs/new 远大于这几个分类页之和。
+是否合并按列表规模决定（`should_group`）：
+- 有规模记录（`SIZES_FILE`，爬虫每次运行后写入各列表的 “Total of N entries”，归档页上各请求分类的条目数
+  另行统计）时，归档页条目数不多于所请求分类页条目数之和才合并；
+- 没有记录时按覆盖率估计：请求分类数不少于归档分类数的 `GROUP_COVERAGE` 才合并；
+- `min_group` 仍是下限（同一归档只请求一个分类时没有重复可省）。
+
+小节标签与抓取策略无关：两种策略都传入 `wanted`，新论文按主分类是否在请求集合中记为 new / cross
+（逐分类抓取时不再取决于论文先在哪个分类页上出现）。
+
+列表页超过 `show` 条时按 “Total of N entries” 用 `skip` 顺序翻页（归档页常见，单个大分类页也可能）。
+
+用法：
+  python daily_arxiv/fetch_plan.py --categories cs.AI,cs.CL,eess.SP,math.NA   # 打印规划（读取 data/.listing_sizes.json）
+"""
+
+from __future__ import annotations
+import os
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import listing_parser
+
+ARXIV = "https://arxiv.org"
+SIZES_FILE = ".listing_sizes.json"
+GROUP_COVERAGE = 0.5
+# 含多个分类的归档及其分类数（arXiv 分类体系）；只有一个分类的归档（hep-th、quant-ph ……）不会合并
+ARCHIVE_CATEGORIES = {"cs": 40, "math": 32, "physics": 22, "q-bio": 10, "q-fin": 9, "cond-mat": 9,
+                      "astro-ph": 6, "stat": 6, "nlin": 5, "eess": 4, "econ": 3}
+
+def archive_of(cat: str) -> str:
+    """分类所属归档：cs.AI → cs，q-fin.MF → q-fin，hep-th → hep-th。"""
+    return cat.split(".", 1)[0]
+
+def should_group(archive: str, cats: List[str], sizes: Optional[Dict[str, int]] = None) -> bool:
+    """归档页与所请求的各分类页都有规模记录时比较条目数，否则按覆盖率估计。"""
+    if sizes and archive in sizes and all(c in sizes for c in cats):
+        return sizes[archive] <= sum(sizes[c] for c in cats)
+    total = ARCHIVE_CATEGORIES.get(archive)
+    return total is None or len(cats) >= GROUP_COVERAGE * total
+
+def plan_fetch(categories: List[str], min_group: int = 2,
+               sizes: Optional[Dict[str, int]] = None) -> List[Tuple[str, List[str]]]:
+    """返回 [(列表路径, 覆盖的请求分类)]，按分类首次出现的顺序排列；min_group <= 0 时全部逐分类抓取。
+    `sizes` 为 {列表路径: 条目数}（见 `load_sizes`）。"""
+    groups: Dict[str, List[str]] = {}
+    for c in categories:
+        members = groups.setdefault(archive_of(c), [])
+        if c not in members:
+            members.append(c)
+    plan: List[Tuple[str, List[str]]] = []
+    for arc, cats in groups.items():
+        if min_group > 0 and len(cats) >= min_group and should_group(arc, cats, sizes):
+            plan.append((arc, cats))
+        else:
+            plan.extend((c, [c]) for c in cats)
+    return plan
+
+def load_sizes(path: str, window: str) -> Dict[str, int]:
+    """读取某个列表窗口（new / pastweek ……）的规模记录；文件不存在或损坏时返回空。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return dict(json.load(f).get(window, {}))
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def save_sizes(path: str, window: str, observed: Dict[str, int]) -> None:
+    """把本次观察到的条目数并入记录（同一列表以最新一次为准），原子替换。"""
+    if not observed:
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault(window, {}).update(observed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def is_group(path: str) -> bool:
+    return "." not in path
+
+def listing_url(base: str, path: str, window: str, show: int, skip: int = 0) -> str:
+    # 首页保持原有 URL 形式（?show=N），翻页时才带 skip
+    query = f"skip={skip}&show={show}" if skip else f"show={show}"
+    return f"{base}/list/{path}/{window}?{query}"
+
+def next_skip(html, skip: int, show: int) -> Optional[int]:
+    """还有下一页时返回下一页的 skip，否则 None。"""
+    total = listing_parser.total_entries(html)
+    return skip + show if total is not None and skip + show < total else None
+
+def describe(plan: List[Tuple[str, List[str]]]) -> str:
+    return ", ".join(p if c == [p] else f"{p}（{len(c)} 类）" for p, c in plan)
+
+def main():
+    p = argparse.ArgumentParser(description="Print the listing fetch plan for a category set")
+    p.add_argument("--categories", required=True, help="逗号分隔的分类列表")
+    p.add_argument("--group-min", type=int, default=2, help="同一归档至少请求几个分类才考虑改抓归档页（0 = 不合并）")
+    p.add_argument("--sizes", default=os.path.join("data", SIZES_FILE), help="列表规模记录（爬虫运行后写入）")
+    p.add_argument("--window", default="new", help="列表窗口（new / recent / pastweek）")
+    args = p.parse_args()
+    cats = [c.strip() for c in args.categories.split(",") if c.strip()]
+    sizes = load_sizes(args.sizes, args.window)
+    plan = plan_fetch(cats, args.group_min, sizes)
+    print(f"📏 规模记录：{len(sizes)} 个列表（{args.sizes}）" if sizes else "📏 无规模记录，按覆盖率估计")
+    print(f"🗺️ {len(plan)} 个列表（逐分类需 {len(set(cats))} 个）：{describe(plan)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+http_cache.py — 抓取阶段的持久化缓存（--http-cache）
+
+同一天内重跑（enhance / 部署失败后常见）时，列表页与 arXiv API 结果都不必重新下载：
+- 列表页：Scrapy HttpCacheMiddleware + FilesystemCacheStorage（gzip 压缩存储），策略为 `ListingCachePolicy`：
+  缓存时间在 HTTPCACHE_FRESH_SECS 秒内的页面直接使用，不发请求；超过后按 RFC 2616 带上
+  If-Modified-Since / If-None-Match 重新验证，服务端返回 304 时沿用缓存，否则下载新页面并更新缓存；
+  只缓存 200 响应，缓存不设硬过期（HTTPCACHE_EXPIRATION_SECS=0），以便过期后仍能做条件请求；
+- arXiv API：`ApiCache` 按无版本 ID 逐篇存放元数据（每篇一个小 JSON 文件），一批 ID 中 ttl 秒内命中的直接取用，
+  只为其余 ID 请求 API；整批都命中时不请求（也不占用限速间隔）。富化线程按抓取的并发顺序凑批，
+  重跑时批次组成几乎总会变化，按整批做键的缓存难以命中，逐篇存放则与批次组成无关。API 没有返回的 ID 不缓存。
+命中 / 未命中数分别来自 Scrapy 统计（httpcache/*）与 `ApiCache.stats`，在运行结束时打印。
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from scrapy.extensions.httpcache import FilesystemCacheStorage, RFC2616Policy
+
+STORED_HEADER = b"X-Cache-Stored"
+
+class StampedCacheStorage(FilesystemCacheStorage):
+    """取出缓存时把写入时刻放进响应头，供策略计算缓存年龄（不依赖服务端的 Date 头）。"""
+    def retrieve_response(self, spider, request):
+        response = super().retrieve_response(spider, request)
+        if response is not None:
+            meta = self._read_meta(spider, request)
+            response.headers[STORED_HEADER] = str(meta["timestamp"])
+        return response
+
+class ListingCachePolicy(RFC2616Policy):
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.fresh_secs = settings.getint("HTTPCACHE_FRESH_SECS", 0)
+
+    def should_cache_response(self, response, request) -> bool:
+        return response.status == 200 and super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request) -> bool:
+        stored = cachedresponse.headers.get(STORED_HEADER)
+        if self.fresh_secs and stored and time.time() - float(stored) < self.fresh_secs:
+            return True
+        # 超出新鲜期：交给 RFC 2616 规则；判为过期时总是带上条件验证头
+        # （父类遇到 Cache-Control: no-cache 会直接返回而不加验证头，但 no-cache 的含义正是“先验证再用”）
+        if super().is_cached_response_fresh(cachedresponse, request):
+            return True
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+def scrapy_settings(cache_dir: str, fresh_secs: int) -> Dict:
+    """开启持久化列表页缓存所需的 Scrapy 设置。"""
+    return dict(
+        HTTPCACHE_ENABLED=True,
+        HTTPCACHE_DIR=os.path.abspath(os.path.join(cache_dir, "pages")),
+        HTTPCACHE_GZIP=True,
+        HTTPCACHE_EXPIRATION_SECS=0,
+        HTTPCACHE_ALWAYS_STORE=True,   # 服务端不给验证头时也存，至少在新鲜期内可直接复用
+        HTTPCACHE_POLICY="http_cache.ListingCachePolicy",
+        HTTPCACHE_STORAGE="http_cache.StampedCacheStorage",
+        HTTPCACHE_FRESH_SECS=fresh_secs,
+    )
+
+def page_stats(stats: Dict) -> str:
+    return " | ".join(f"{k} {stats.get('httpcache/' + k, 0)}" for k in ("hit", "revalidate", "miss", "store"))
+
+class ApiCache:
+    """arXiv API 结果缓存：无版本 id → 元数据，每篇一个文件（线程安全）。stats 按 ID 计数。"""
+    def __init__(self, cache_dir: str, ttl: int):
+        self.root = os.path.join(cache_dir, "arxiv_api")
+        self.ttl = ttl
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def _path(self, pid: str) -> str:
+        key = hashlib.sha1(pid.encode("utf-8")).hexdigest()[:2]   # 分散到 256 个子目录
+        return os.path.join(self.root, key, pid.replace("/", "_") + ".json")
+
+    def _count(self, what: str, n: int = 1):
+        with self.lock:
+            self.stats[what] += n
+
+    def _load(self, pid: str) -> Optional[Dict]:
+        path = self._path(pid)
+        try:
+            if self.ttl and time.time() - os.stat(path).st_mtime > self.ttl:
+                self._count("expired")
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):   # 不存在或写到一半的文件
+            self._count("miss")
+            return None
+
+    def get(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """返回缓存中（未过期）的那部分 ID 的元数据。"""
+        found = {}
+        for pid in dict.fromkeys(ids):
+            meta = self._load(pid)
+            if meta is not None:
+                found[pid] = meta
+        self._count("hit", len(found))
+        return found
+
+    def put(self, meta: Dict[str, Dict]):
+        for pid, d in meta.items():
+            path = self._path(pid)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(d, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        self._count("store", len(meta))
+
+    def summary(self) -> str:
+        looked = sum(self.stats.get(k, 0) for k in ("hit", "miss", "expired"))
+        rate = f" | 命中率 {self.stats.get('hit', 0) / looked:.0%}" if looked else ""
+        return " | ".join(f"{k} {self.stats.get(k, 0)}" for k in ("hit", "miss", "expired", "store")) + rate
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+listing_parser.py — arXiv 列表页（/list/<cat>/new）的单遍 lxml 解析器
+
+对每个 `<dl>` 只顺序遍历一次直接子节点：遇到 `<h3>` 切换当前小节，遇到 `<dt>` 暂存，
+遇到紧随其后的 `<dd>` 即与暂存的 `<dt>` 配对生成条目。两种页面结构由同一循环处理：
+  1) 每个小节（New / Cross / Replacement）各在独立的 `<dl>` 中；
+  2) 三个小节共用同一个 `<dl>`，由多个 `<h3>` 分段。
+不再对每个 `<h3>` / `<dt>` 做 `following-sibling` 扫描，整页解析为线性时间。
+
+输出字段与 `ArxivNewSpider` 的旧解析（`parse_selectors`）逐字段一致，
+可用 `python daily_arxiv/bench_parser.py` 在 fixtures/ 上校验并对比速度。
+"""
+
+from __future__ import annotations
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set
+
+from lxml import etree
+
+RE_CATEGORIES  = re.compile(r"\(([a-z\-]+(?:\.[A-Za-z0-9\-]+)?)\)")
+RE_ID_FROM_ABS = re.compile(r"/abs/(.+)$")
+RE_STRIP_VER   = re.compile(r"v\d+$")
+RE_SPACES      = re.compile(r" {2,}")
+RE_TOTAL       = re.compile(rb"Total of (\d+) entries")
+RE_DAY         = re.compile(r"\b(\d{1,2}) ([A-Z][a-z]{2}) (\d{4})\b")
+MONTHS = {m: i for i, m in enumerate("Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), 1)}
+
+# 段落识别正则（忽略大小写，兼容列表/提交多文案）
+PAT_NEW   = re.compile(r"\bnew\s+submissions\b", re.I)
+PAT_CROSS = re.compile(r"\bcross\b.*\b(lists?|submissions?)\b", re.I)
+PAT_REPL  = re.compile(r"\breplacement(s)?\b(?:.*\bsubmissions?\b)?", re.I)
+
+def section_of(title: str) -> Optional[str]:
+    low = " ".join(title.split()).lower()
+    if PAT_NEW.search(low):
+        return "new"
+    if PAT_CROSS.search(low):
+        return "cross"
+    if PAT_REPL.search(low):
+        return "repl"
+    return None
+
+def day_of(title: str) -> Optional[str]:
+    """recent / pastweek 列表按公告日期分段（如 “Mon, 18 Aug 2025 (showing …)”），返回 YYYY-MM-DD。"""
+    m = RE_DAY.search(title)
+    if not m or m.group(2) not in MONTHS:
+        return None
+    return f"{m.group(3)}-{MONTHS[m.group(2)]:02d}-{int(m.group(1)):02d}"
+
+def squash(text: str) -> str:
+    """与旧 `_text` 相同的空白处理：换行变空格、连续空格压成一个（一次正则替换代替 while 循环）。"""
+    return RE_SPACES.sub(" ", text.replace("\n", " ")).strip()
+
+def make_item(full_id: str, title: str, authors: List[str], subjects: str, primary: str, sec_flag: str) -> Dict:
+    """由列表页中抽出的原始文本构造条目（新旧解析器共用）。"""
+    base_id = RE_STRIP_VER.sub("", full_id)
+    all_cats = sorted(set(RE_CATEGORIES.findall(subjects)))
+    m = RE_CATEGORIES.search(primary)
+    primary_code = m.group(1) if m else (all_cats[0] if all_cats else "")
+
+    # 版本化链接：new 段默认补 v1
+    if "v" in full_id:
+        versioned = full_id
+    elif sec_flag == "new":
+        versioned = base_id + "v1"
+    else:
+        versioned = base_id
+
+    return {
+        "id": base_id,
+        "title": title,
+        "authors": authors,
+        "categories": all_cats,
+        "primary_category": primary_code,   # 代码，如 cs.CR
+        "pdf_link": None,
+        "comments": "",
+        "url": f"http://arxiv.org/abs/{versioned}",
+        "summary": "",
+        "comment": None,
+        "pdf_url": f"http://arxiv.org/pdf/{versioned}",
+        "cate": primary_code,
+        "date": None,
+        "updated": None,
+        "section": sec_flag,
+    }
+
+HTML_PARSER = etree.HTMLParser(encoding="utf-8")   # 普通 etree 元素：免去 lxml.html 逐节点的元素类查找开销
+A_TEXT = etree.XPath("text()")
+WANTED = ("list-title", "list-authors", "list-subjects", "primary-subject")
+
+def _classes(dd) -> Dict[str, object]:
+    """一次遍历 dd 子树，取每个目标 class 的第一个元素。"""
+    found: Dict[str, object] = {}
+    for el in dd.iter("div", "span"):
+        cls = el.get("class")
+        if cls:
+            for c in cls.split():
+                if c in WANTED and c not in found:
+                    found[c] = el
+    return found
+
+def _text(el) -> str:
+    return squash(" ".join(el.itertext())) if el is not None else ""
+
+def _item_from(dt, dd, sec_flag: str) -> Optional[Dict]:
+    href = next((h for h in (a.get("href") or "" for a in dt.iter("a")) if "/abs/" in h), None)
+    if not href:
+        return None
+    m = RE_ID_FROM_ABS.search(href)
+    if not m:
+        return None
+    found = _classes(dd) if dd is not None else {}
+    authors_el = found.get("list-authors")
+    authors = [t for a in authors_el.iter("a") for t in A_TEXT(a)] if authors_el is not None else []
+    return make_item(m.group(1), _text(found.get("list-title")).replace("Title:", "").strip(), authors,
+                     _text(found.get("list-subjects")), _text(found.get("primary-subject")), sec_flag)
+
+def total_entries(html) -> Optional[int]:
+    """列表页分页信息中的总条数（“Total of N entries”）；没有时返回 None。"""
+    m = RE_TOTAL.search(html if isinstance(html, bytes) else html.encode("utf-8"))
+    return int(m.group(1)) if m else None
+
+def parse_listing(html, *, include_cross: bool = True, include_repl: bool = True,
+                  seen: Optional[Set[str]] = None, stats: Optional[Counter] = None,
+                  wanted: Optional[Set[str]] = None, state: Optional[Dict] = None,
+                  counts: Optional[Counter] = None) -> Iterator[Dict]:
+    """解析一页列表 HTML（bytes 或 str），按页面顺序产出条目。
+    - `seen`：跨页共享的无版本 ID 集合（用于跨分类去重）；`stats`：记录各小节的 dt 数；
+    - `wanted`：请求的分类集合。只保留分类与之有交集的条目（归档级页面如 /list/cs/new 上才会过滤掉条目）；
+      New / Cross 小节的条目按主分类是否在其中记为 new / cross，使标签与抓的是分类页还是归档页无关；
+    - `counts`：配合 `wanted`，统计本页各请求分类的条目数（去重前），用于估算对应分类页的规模；
+    - `state`：分页时在页间传递当前小节（`state["section"]`）与公告日期（`state["day"]`），下一页开头没有 `<h3>` 时沿用。
+    recent / pastweek 列表的 `<h3>` 是公告日期：其下条目记为 new（配合 `wanted` 时同样可改记为 cross），
+    并带上 `announced`（YYYY-MM-DD）；此时按（日期, ID）去重，同一论文可出现在不同日期下。"""
+    seen = set() if seen is None else seen
+    stats = Counter() if stats is None else stats
+    state = {} if state is None else state
+    skip = lambda s: s is None or (s == "cross" and not include_cross) or (s == "repl" and not include_repl)
+
+    def emit(dt, dd, sec):
+        item = _item_from(dt, dd, sec)
+        if item is None:
+            return None
+        if counts is not None and wanted is not None:
+            counts.update(wanted.intersection(item["categories"]))
+        key = item["id"] if day is None else (day, item["id"])
+        if key in seen:
+            return None
+        if wanted is not None:
+            if wanted.isdisjoint(item["categories"]):
+                return None
+            if sec in ("new", "cross"):
+                item["section"] = "new" if item["primary_category"] in wanted else "cross"
+        if day is not None:
+            item["announced"] = day
+        seen.add(key)
+        return item
+
+    root = etree.fromstring(html if isinstance(html, bytes) else html.encode("utf-8"), HTML_PARSER)
+    sec, day = state.get("section"), state.get("day")
+    for dl in root.xpath("//div[@id='dlpage']//dl"):
+        pending = None
+        for el in dl:
+            tag = el.tag if isinstance(el.tag, str) else ""
+            if tag == "h3":
+                if pending is not None and not skip(sec):
+                    item = emit(pending, None, sec)
+                    if item: yield item
+                pending = None
+                title = " ".join(el.itertext())
+                sec = section_of(title)
+                if sec is None and day_of(title):
+                    sec, day = "new", day_of(title)
+            elif skip(sec):
+                continue
+            elif tag == "dt":
+                if pending is not None:
+                    item = emit(pending, None, sec)
+                    if item: yield item
+                pending = el
+                stats[sec] += 1
+            elif tag == "dd" and pending is not None:
+                item = emit(pending, el, sec)
+                pending = None
+                if item: yield item
+        if pending is not None and not skip(sec):
+            item = emit(pending, None, sec)
+            if item: yield item
+    state["section"], state["day"] = sec, day
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+meta_db.py — 本地论文元数据库（SQLite，按无版本 ID 索引）
+
+/new 页面中的 Replacement / Cross-list 条目大多是前几天已经抓取并富化过的论文，
+其摘要、发表 / 更新日期早已写在 data/*.jsonl 中。本库把这些元数据按无版本 ID 建立索引：
+- 首次使用时从 data/*.jsonl（不含 *_AI_enhanced_* 文件）构建，之后只增量导入新增 / 变更的文件；
+- 每次抓取富化完成后，把输出文件写回本库；
+- 富化时只为“库中没有”或“版本变新”的论文调用 arXiv API。
+
+用法：
+  python daily_arxiv/meta_db.py --data data            # 构建 / 同步 data/meta.sqlite 并打印统计
+"""
+
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 仓库根目录：共享的 insightarxiv 包
+from insightarxiv import jsonl_io
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id               TEXT PRIMARY KEY,   -- 无版本 ID，如 2508.00906
+    version          INTEGER,            -- 已知的最新版本号（来自 url / pdf_url）
+    title            TEXT,
+    authors          TEXT,               -- JSON 数组
+    categories       TEXT,               -- JSON 数组
+    primary_category TEXT,
+    summary          TEXT,
+    comment          TEXT,
+    pdf_url          TEXT,
+    date             TEXT,               -- 首次发表日期 YYYY-MM-DD
+    updated          TEXT                -- 最近更新日期 YYYY-MM-DD
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path  TEXT PRIMARY KEY,
+    mtime REAL,
+    size  INTEGER,
+    rows  INTEGER
+);
+"""
+
+RE_VERSION = re.compile(r"v(\d+)$")
+REPL_FRESH_DAYS = 3   # 替换条目的列表日期与其更新日期之间的最大间隔（含周末）
+
+def version_of(row: Dict) -> Optional[int]:
+    for k in ("url", "pdf_url"):
+        m = RE_VERSION.search((row.get(k) or "").rstrip("/"))
+        if m:
+            return int(m.group(1))
+    return None
+
+class MetaDB:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    # ── 写入 ──
+    def ingest_rows(self, rows: Iterable[Dict]) -> int:
+        """写入有摘要的条目；同一 ID 只在版本不旧（未知版本视为不旧）、更新日期不早时覆盖。"""
+        n = 0
+        with self.conn:
+            for r in rows:
+                if not r.get("id") or not (r.get("summary") or "").strip():
+                    continue
+                self.conn.execute(
+                    """INSERT INTO papers VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                       ON CONFLICT(id) DO UPDATE SET
+                         title=excluded.title, authors=excluded.authors,
+                         categories=excluded.categories, primary_category=excluded.primary_category,
+                         summary=excluded.summary, comment=excluded.comment, pdf_url=excluded.pdf_url,
+                         date=COALESCE(excluded.date, papers.date), updated=excluded.updated,
+                         version=COALESCE(excluded.version, papers.version)
+                       WHERE (excluded.version IS NULL OR excluded.version >= COALESCE(papers.version, 0))
+                         AND COALESCE(excluded.updated, '') >= COALESCE(papers.updated, '')""",
+                    (r["id"], version_of(r), r.get("title"),
+                     json.dumps(r.get("authors") or [], ensure_ascii=False),
+                     json.dumps(r.get("categories") or [], ensure_ascii=False),
+                     r.get("primary_category") or r.get("cate"), r.get("summary"),
+                     r.get("comment") or r.get("comments") or None, r.get("pdf_url"),
+                     r.get("date"), r.get("updated")))
+                n += 1
+        return n
+
+    def ingest_file(self, path: str) -> int:
+        path = jsonl_io.resolve(path)
+        st = os.stat(path)
+        n = self.ingest_rows(jsonl_io.iter_jsonl(path, skip_bad=True))
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?,?,?,?)",
+                              (os.path.abspath(path), st.st_mtime, st.st_size, n))
+        return n
+
+    def sync_dir(self, data_dir: str) -> int:
+        """导入 data_dir 下新增或变更过的原始 JSONL（按文件名即日期顺序），返回导入的文件数。"""
+        known = {p: (m, s) for p, m, s in self.conn.execute("SELECT path, mtime, size FROM sources")}
+        done = 0
+        for path in jsonl_io.glob_jsonl(os.path.join(data_dir, "*.jsonl")):
+            if "_AI_enhanced_" in os.path.basename(path):
+                continue
+            st = os.stat(path)
+            if known.get(os.path.abspath(path)) == (st.st_mtime, st.st_size):
+                continue
+            self.ingest_file(path)
+            done += 1
+        return done
+
+    # ── 查询 ──
+    def get(self, pid: str) -> Optional[Dict]:
+        """返回与 fetch_arxiv_meta 相同形状的元数据；库中没有时返回 None。"""
+        row = self.conn.execute(
+            "SELECT title, authors, categories, primary_category, summary, comment, pdf_url, date, updated, version "
+            "FROM papers WHERE id = ?", (pid,)).fetchone()
+        if row is None:
+            return None
+        title, authors, cats, primary, summary, comment, pdf_url, published, updated, version = row
+        return {
+            "title": title, "authors": json.loads(authors or "[]"), "abstract": summary, "comment": comment,
+            "categories": json.loads(cats or "[]"), "primary_category": primary or "",
+            "pdf_url": pdf_url, "published_at": published, "updated_at": updated, "version": version,
+        }
+
+    def stale(self, item: Dict, reuse_replaced: bool = False) -> bool:
+        """是否需要调用 API：
+        - 库中没有，或缺发表日期（早期数据格式）；
+        - 列表给出的版本号比库中新；
+        - Replacement 条目：列表页不给版本号，但出现在替换小节即说明有了新版本，
+          除非库中的更新日期已在 REPL_FRESH_DAYS 天内（新版本已经查过），或显式 reuse_replaced。"""
+        known = self.get(item.get("id") or "")
+        if known is None or not known["published_at"]:
+            return True
+        v = version_of(item)
+        if v is not None and known["version"] is not None and v > known["version"]:
+            return True
+        if item.get("section") == "repl" and not reuse_replaced:
+            return (known["updated_at"] or "") < (date.today() - timedelta(days=REPL_FRESH_DAYS)).isoformat()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+def default_path(data_dir: str) -> str:
+    return os.path.join(data_dir, "meta.sqlite")
+
+def main():
+    p = argparse.ArgumentParser(description="Build / sync the local arXiv metadata store from data/*.jsonl")
+    p.add_argument("--data", default="data", help="原始 JSONL 所在目录")
+    p.add_argument("--db", default=None, help="数据库路径（默认 <data>/meta.sqlite）")
+    args = p.parse_args()
+    db = MetaDB(args.db or default_path(args.data))
+    n = db.sync_dir(args.data)
+    print(f"✅ {db.path}：导入 {n} 个文件，共 {len(db)} 篇")
+    db.close()
+
+if __name__ == "__main__":
+    main()
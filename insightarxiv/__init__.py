@@ -0,0 +1,9 @@
+"""
+insightarxiv — 在一个进程内按 DAG 运行每日流水线（抓取 → AI 增强 → 数据库 / 报告 → README）
+
+  python -m insightarxiv run --date 2025-08-01
+
+各阶段仍是原来的脚本（daily_arxiv/daily_arxiv.py、ai/enhance.py、build_database.py、to_md/convert.py、
+update_readme.py），可以照旧单独运行；这里只是在同一进程中依次调用它们，把上一阶段的记录直接交给下一阶段，
+并按输入哈希缓存各阶段的结果，重跑时跳过已经完成的阶段。见 pipeline.py 与 stages.py。
+"""
@@ -0,0 +1,75 @@
+"""
+python -m insightarxiv run --date YYYY-MM-DD — 在一个进程内运行每日流水线
+
+  python -m insightarxiv run                                  # 今天（UTC），全部阶段
+  python -m insightarxiv run --date 2025-08-01 --stages report,readme
+  python -m insightarxiv run --date 2025-08-01 --force enhance --backend mock
+  python -m insightarxiv run --dry-run                        # 只显示哪些阶段需要运行
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+
+from .pipeline import Context, StageError, run_pipeline
+from .stages import ROOT, default_stages
+
+def parse_arguments(argv=None):
+    names = [s.name for s in default_stages()]
+    parser = argparse.ArgumentParser(prog="python -m insightarxiv", description="在一个进程内按依赖顺序运行每日流水线，跳过输入未变的阶段。")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="运行流水线")
+    today = datetime.now(timezone.utc).date().isoformat()
+    run.add_argument("--date", default=os.getenv("TARGET_DATE") or today, help="处理的日期（默认今天，UTC；ENV:TARGET_DATE）")
+    run.add_argument("--stages", default=",".join(names), help=f"要运行的阶段（逗号分隔，默认全部：{','.join(names)}）")
+    run.add_argument("--force", default="", help="忽略缓存重跑的阶段（逗号分隔，all = 全部）")
+    run.add_argument("--dry-run", action="store_true", help="只检查各阶段是否需要运行")
+    run.add_argument("--language", default=None, help="增强语言（默认 ENV:LANGUAGE 或 Chinese）")
+    run.add_argument("--categories", default=None, help="抓取分类（默认 ENV:CATEGORIES）")
+    run.add_argument("--backend", default=None, help="传给 enhance.py 的 --backend（gemini / mock）")
+    run.add_argument("--sinks", default="markdown,summary", help="报告阶段的输出（见 to_md/sinks.py）")
+    run.add_argument("--fetch-args", default="", help="原样追加给 daily_arxiv.py 的参数（如 \"--http-cache --no-meta-db\"）")
+    run.add_argument("--enhance-args", default="", help="原样追加给 enhance.py 的参数（如 \"--concurrency 20\"）")
+    run.add_argument("--timings", default=None, help="将各阶段状态与耗时另存为 JSON")
+    args = parser.parse_args(argv)
+    args.today = today
+    return args
+
+def split(value):
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    # 各脚本都以仓库根目录为工作目录（data/、docs/、README.md 均为相对路径）
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    stages = default_stages()
+    unknown = [s for s in split(args.stages) + split(args.force) if s != "all" and s not in {st.name for st in stages}]
+    if unknown:
+        print(f"错误: 未知的阶段 {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    ctx = Context(ROOT, args.date, args, stages)
+    print(f"🚀 {args.date} | 阶段 {args.stages}" + (f" | 强制重跑 {args.force}" if args.force else ""))
+    try:
+        report = run_pipeline(ctx, split(args.stages), split(args.force), dry_run=args.dry_run)
+    except StageError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print("\n📊 阶段耗时：")
+    for row in report:
+        print(f"  {row['stage']:<10} {row['status']:<10} {row['seconds']:8.1f}s")
+    print(f"  {'total':<10} {'':<10} {sum(r['seconds'] for r in report):8.1f}s")
+    if args.timings:
+        with open(args.timings, "w", encoding="utf-8") as f:
+            json.dump({"date": args.date, "stages": report}, f, ensure_ascii=False, indent=2)
+        print(f"📁 耗时保存至：{args.timings}")
+    if any(row["status"] in ("failed", "blocked") for row in report):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
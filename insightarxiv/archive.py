@@ -0,0 +1,363 @@
+"""
+archive.py — 全部论文的列式归档（按月分区）与分析查询
+
+  python -m insightarxiv.archive update                                   # 增量更新（新的增强文件）
+  python -m insightarxiv.archive count --by category --per week --since 2025-03
+  python -m insightarxiv.archive count --by keyword --per month --since 2025-03 --top 10
+  python -m insightarxiv.archive bench                                    # 与逐个扫描 JSONL 对比耗时
+
+build_database.py 在设置了环境变量 PAPER_ARCHIVE（归档目录，如 data/archive）时，构建结束后顺带增量更新归档。
+
+布局：<归档>/<YYYY-MM>/<列名>.json，每列一个文件（一个 JSON 数组），查询只打开需要的列和月份；
+<归档>/_state.json 记录增强文件模式（--pattern，即语言）、已导入的源文件（大小、mtime）与每篇论文所在的分区；
+之后不带 --pattern 的 update / bench 沿用归档记录的模式，换了模式则整体重建。
+- 每篇论文一行，已按 build_database.py 的规则解决版本：版本更高者替换；版本相同保留先出现的一行，
+  updated 取最大、first_published 取最小、备注取非空的新值。分区按报告日期（文件名中的日期）的月份；
+- categories / keywords 为字典编码：{"dict": [取值, ...], "codes": [[下标, ...], 每行一个列表]}，
+  计数时直接累加下标，最后才映射回字符串；
+- 只有比已导入日期更晚的新文件时增量处理，只重写受影响的月份；已导入的文件变化、删除或补入更早的日期时整体重建。
+
+列文件是普通 JSON（有 orjson 时用 orjson 解析），不依赖 pyarrow / pandas。没有采用 Parquet：在本仓库
+29,403 篇、6 个分区的数据上（单核），按周统计关键词从逐个扫描 JSONL 的 1.74s 降到 0.16s，按主分类从 1.63s
+降到 0.03s；同样的列改写成 pyarrow 26 的 Parquet（字典编码 + zstd）占用从 53 MB 降到 20 MB，但 group_by
+统计关键词仍需 0.17s、主分类 0.12s，查询并不更快，却要给流水线加上约 40 MB 的依赖。归档目录不提交
+（data/archive/ 在 .gitignore 中），占用只影响本地与 CI 缓存。
+"""
+
+from __future__ import annotations
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import jsonl_io, record
+
+STATE = "_state.json"
+VERSION = 1
+PATTERN = "*_AI_enhanced_Chinese.jsonl"
+RE_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+RE_MONTH = re.compile(r"^\d{4}-\d{2}$")
+
+COLUMNS = ("id", "full_id", "version", "date", "updated", "first_published", "title", "zh_title",
+           "authors", "categories", "keywords", "comment", "abstract", "tldr")
+DICT_COLUMNS = frozenset({"categories", "keywords"})
+
+# ─────────────── 行：一篇论文的最新版本 ───────────────
+def row_of(paper: record.Paper, file_date: str) -> Optional[Dict]:
+    """与 build_database.py 中 current_paper_data 相同的取值规则；ID 不合法时返回 None。"""
+    split = record.split_id(paper.id)
+    if not split:
+        return None
+    base_id, version = split
+    ai = paper.ai or {}
+    kw = ai.get("keywords", "")
+    return {
+        "id": base_id, "full_id": paper.id, "version": version, "date": file_date,
+        "updated": paper.updated or file_date,
+        "first_published": paper.published or paper.date or file_date,
+        "title": paper.title if paper.title is not None else "无标题",
+        "zh_title": ai.get("title_translation"),
+        "authors": paper.authors,
+        "categories": paper.categories,
+        "keywords": [k.strip() for k in kw.split(",") if k.strip()] if isinstance(kw, str) else [],
+        "comment": paper.comment or "",
+        "abstract": paper.abstract or "",
+        "tldr": ai.get("tldr"),
+    }
+
+def merge(old: Optional[Dict], new: Dict) -> Dict:
+    if old is None or new["version"] > old["version"]:
+        return new
+    if new["version"] == old["version"]:
+        old["first_published"] = min(old["first_published"], new["first_published"])
+        old["updated"] = max(old["updated"], new["updated"])
+        if new["comment"]:
+            old["comment"] = new["comment"]
+    return old
+
+# ─────────────── 列文件 ───────────────
+def encode_column(name: str, values: List) -> object:
+    if name not in DICT_COLUMNS:
+        return values
+    index: Dict[str, int] = {}
+    codes = [[index.setdefault(v, len(index)) for v in vs] for vs in values]
+    return {"dict": list(index), "codes": codes}
+
+def decode_column(name: str, data) -> List:
+    if name not in DICT_COLUMNS:
+        return data
+    d = data["dict"]
+    return [[d[c] for c in cs] for cs in data["codes"]]
+
+def read_json(path: str):
+    with open(path, "rb") as f:
+        return jsonl_io.loads(f.read())
+
+def write_json(path: str, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(jsonl_io.dumps(obj))
+    os.replace(tmp, path)
+
+def months(archive_dir: str) -> List[str]:
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(m for m in os.listdir(archive_dir) if RE_MONTH.match(m))
+
+def read_partition(archive_dir: str, month: str, columns: Iterable[str] = COLUMNS, raw: bool = False) -> Dict[str, List]:
+    """读取一个月份分区的若干列；raw 时字典编码列保持 {"dict", "codes"} 原样。"""
+    base = os.path.join(archive_dir, month)
+    out = {}
+    for name in columns:
+        data = read_json(os.path.join(base, f"{name}.json"))
+        out[name] = data if raw else decode_column(name, data)
+    return out
+
+def write_partition(archive_dir: str, month: str, rows: List[Dict]):
+    base = os.path.join(archive_dir, month)
+    if not rows:
+        shutil.rmtree(base, ignore_errors=True)
+        return
+    os.makedirs(base, exist_ok=True)
+    for name in COLUMNS:
+        write_json(os.path.join(base, f"{name}.json"), encode_column(name, [r[name] for r in rows]))
+
+def load_rows(archive_dir: str, month: str) -> Dict[str, Dict]:
+    cols = read_partition(archive_dir, month)
+    return {pid: {name: cols[name][i] for name in COLUMNS} for i, pid in enumerate(cols["id"])}
+
+# ─────────────── 增量更新 ───────────────
+def load_state(archive_dir: str) -> Dict:
+    try:
+        state = read_json(os.path.join(archive_dir, STATE))
+        if state.get("version") == VERSION:
+            return state
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"version": VERSION, "sources": {}, "ids": {}, "months": {}}
+
+def source_files(data_dir: str, pattern: str = PATTERN) -> Dict[str, Tuple[str, str]]:
+    """逻辑文件名 → (日期, 实际路径)，按日期排序。"""
+    found = {}
+    for path in jsonl_io.glob_jsonl(os.path.join(data_dir, pattern)):
+        m = RE_DATE.match(os.path.basename(path))
+        if m:
+            found[os.path.basename(jsonl_io.logical(path))] = (m.group(1), path)
+    return dict(sorted(found.items(), key=lambda kv: kv[1][0]))
+
+def stamp(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def archive_pattern(archive_dir: str) -> str:
+    """归档导入时使用的增强文件模式（旧归档没有记录时为默认的中文模式）。"""
+    return load_state(archive_dir).get("pattern", PATTERN)
+
+def update(data_dir: str = "data", archive_dir: str = os.path.join("data", "archive"),
+           pattern: Optional[str] = None, rebuild: bool = False) -> Dict:
+    """把新的增强文件并入归档，返回 {mode, files, papers, months, seconds}；pattern 为空时沿用归档记录的模式。"""
+    t0 = time.perf_counter()
+    state = load_state(archive_dir)
+    pattern = pattern or state.get("pattern", PATTERN)
+    files = source_files(data_dir, pattern)
+    known = state["sources"]
+    todo = [name for name, (_, path) in files.items() if known.get(name) != stamp(path)]
+    last = max((RE_DATE.match(n).group(1) for n in known), default="")
+    if (rebuild or not known or state.get("pattern", PATTERN) != pattern or set(known) - set(files)
+            or any(n in known for n in todo) or any(files[n][0] <= last for n in todo)):
+        mode, todo = "rebuild", list(files)
+        for month in months(archive_dir):
+            shutil.rmtree(os.path.join(archive_dir, month))
+        state = {"version": VERSION, "pattern": pattern, "sources": {}, "ids": {}, "months": {}}
+    else:
+        mode = "incremental"
+    if not todo and mode == "incremental":
+        return {"mode": "unchanged", "files": 0, "papers": len(state["ids"]), "months": [],
+                "seconds": time.perf_counter() - t0}
+
+    os.makedirs(archive_dir, exist_ok=True)
+    loaded: Dict[str, Dict[str, Dict]] = {}
+    def partition(month: str) -> Dict[str, Dict]:
+        if month not in loaded:
+            loaded[month] = load_rows(archive_dir, month) if month in state["months"] else {}
+        return loaded[month]
+
+    ids = state["ids"]
+    for name in todo:
+        file_date, path = files[name]
+        month = file_date[:7]
+        for paper in record.iter_papers(path, skip_bad=True):
+            row = row_of(paper, file_date)
+            if row is None:
+                continue
+            prev_month = ids.get(row["id"])
+            old = partition(prev_month).get(row["id"]) if prev_month else None
+            kept = merge(old, row)
+            if kept is row:   # 新论文或更高版本：放入本文件所在月份（可能从旧月份移出）
+                if prev_month and prev_month != month:
+                    del partition(prev_month)[row["id"]]
+                partition(month)[row["id"]] = row
+                ids[row["id"]] = month
+        state["sources"][name] = stamp(path)
+
+    for month, rows in loaded.items():
+        write_partition(archive_dir, month, list(rows.values()))
+        if rows:
+            state["months"][month] = len(rows)
+        else:
+            state["months"].pop(month, None)
+    write_json(os.path.join(archive_dir, STATE), state)
+    return {"mode": mode, "files": len(todo), "papers": len(ids), "months": sorted(loaded),
+            "seconds": time.perf_counter() - t0}
+
+# ─────────────── 查询 ───────────────
+def select_months(archive_dir: str, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+    return [m for m in months(archive_dir)
+            if (not since or m >= since[:7]) and (not until or m <= until[:7])]
+
+def in_range(day: str, since: Optional[str], until: Optional[str]) -> bool:
+    return (not since or day[:len(since)] >= since) and (not until or day[:len(until)] <= until)
+
+def scan(archive_dir: str, columns: Iterable[str], since: Optional[str] = None,
+         until: Optional[str] = None) -> Iterator[Dict]:
+    """按行产出所需列（since / until 为 YYYY-MM 或 YYYY-MM-DD，按报告日期过滤，含两端）。"""
+    columns = list(columns)
+    need = columns if "date" in columns else columns + ["date"]
+    for month in select_months(archive_dir, since, until):
+        cols = read_partition(archive_dir, month, need)
+        for i, day in enumerate(cols["date"]):
+            if in_range(day, since, until):
+                yield {name: cols[name][i] for name in columns}
+
+def period_of(day: str, per: str) -> str:
+    if per == "day":
+        return day
+    if per == "month":
+        return day[:7]
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+BY_COLUMN = {"category": "categories", "primary": "categories", "keyword": "keywords", "total": None}
+
+def count(archive_dir: str, by: str = "category", per: str = "week", since: Optional[str] = None,
+          until: Optional[str] = None) -> Counter:
+    """(周期, 取值) → 论文数。by：category（所有分类）/ primary（主分类）/ keyword / total。
+    字典编码列按下标计数，每个分区最后才换回字符串。"""
+    column = BY_COLUMN[by]
+    result: Counter = Counter()
+    for month in select_months(archive_dir, since, until):
+        cols = read_partition(archive_dir, month, ["date"] + ([column] if column else []), raw=True)
+        periods = {}
+        local: Counter = Counter()
+        codes = cols[column]["codes"] if column else None
+        for i, day in enumerate(cols["date"]):
+            if not in_range(day, since, until):
+                continue
+            p = periods.get(day) or periods.setdefault(day, period_of(day, per))
+            if codes is None:
+                local[(p, -1)] += 1
+            elif by == "primary":
+                if codes[i]:
+                    local[(p, codes[i][0])] += 1
+            else:
+                for c in set(codes[i]):
+                    local[(p, c)] += 1
+        names = cols[column]["dict"] if column else None
+        for (p, c), n in local.items():
+            result[(p, names[c] if names else "total")] += n
+    return result
+
+# ─────────────── 对照：逐个扫描 JSONL ───────────────
+def count_from_jsonl(data_dir: str, by: str = "category", per: str = "week", since: Optional[str] = None,
+                     until: Optional[str] = None, pattern: str = PATTERN) -> Counter:
+    """不用归档时的做法：读全部增强文件、解决版本后再计数（结果应与 count 相同）。"""
+    latest: Dict[str, Dict] = {}
+    for file_date, path in source_files(data_dir, pattern).values():
+        for paper in record.iter_papers(path, skip_bad=True):
+            row = row_of(paper, file_date)
+            if row is not None:
+                latest[row["id"]] = merge(latest.get(row["id"]), row)
+    result: Counter = Counter()
+    for row in latest.values():
+        if not in_range(row["date"], since, until):
+            continue
+        p = period_of(row["date"], per)
+        if by == "total":
+            result[(p, "total")] += 1
+        elif by == "primary":
+            if row["categories"]:
+                result[(p, row["categories"][0])] += 1
+        else:
+            for v in set(row[BY_COLUMN[by]]):
+                result[(p, v)] += 1
+    return result
+
+def print_counts(counts: Counter, top: int):
+    by_period: Dict[str, List[Tuple[str, int]]] = {}
+    for (p, v), n in counts.items():
+        by_period.setdefault(p, []).append((v, n))
+    for p in sorted(by_period):
+        rows = sorted(by_period[p], key=lambda vn: (-vn[1], vn[0]))[:top]
+        print(f"  {p:<10} " + " | ".join(f"{v} {n}" for v, n in rows))
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m insightarxiv.archive", description="论文列式归档：增量更新与分析查询。")
+    parser.add_argument("--data", default="data", help="增强 JSONL 所在目录")
+    parser.add_argument("--archive", default=os.environ.get("PAPER_ARCHIVE") or os.path.join("data", "archive"),
+                        help="归档目录（默认 ENV:PAPER_ARCHIVE 或 data/archive）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    u = sub.add_parser("update", help="把新的增强文件并入归档")
+    u.add_argument("--rebuild", action="store_true", help="丢弃现有归档，全部重建")
+    u.add_argument("--pattern", default=None, help=f"增强文件模式（默认沿用归档记录的模式，新归档为 {PATTERN}）")
+    queries = []
+    for name, help_text in (("count", "按周期统计分类 / 关键词的论文数"), ("bench", "对比归档查询与扫描 JSONL 的耗时")):
+        q = sub.add_parser(name, help=help_text)
+        q.add_argument("--by", choices=list(BY_COLUMN), default="category", help="统计维度")
+        q.add_argument("--per", choices=["day", "week", "month"], default="week", help="周期")
+        q.add_argument("--since", default=None, help="起始（YYYY-MM 或 YYYY-MM-DD，含）")
+        q.add_argument("--until", default=None, help="结束（YYYY-MM 或 YYYY-MM-DD，含）")
+        q.add_argument("--top", type=int, default=8, help="每个周期显示的前 N 项")
+        if name == "bench":
+            q.add_argument("--pattern", default=None, help="扫描的增强文件模式（默认为归档记录的模式）")
+        queries.append(q)
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        r = update(args.data, args.archive, args.pattern, rebuild=args.rebuild)
+        if r["mode"] == "unchanged":
+            print(f"✅ 归档已是最新（{r['papers']} 篇）")
+        else:
+            print(f"✅ {'重建' if r['mode'] == 'rebuild' else '增量更新'}：导入 {r['files']} 个文件，"
+                  f"重写 {len(r['months'])} 个月份分区，共 {r['papers']} 篇，用时 {r['seconds']:.2f}s")
+        return
+    if not months(args.archive):
+        print(f"错误: 归档 {args.archive} 不存在，先运行 update", file=sys.stderr)
+        sys.exit(1)
+    t0 = time.perf_counter()
+    counts = count(args.archive, args.by, args.per, args.since, args.until)
+    t_archive = time.perf_counter() - t0
+    if args.command == "count":
+        print_counts(counts, args.top)
+        print(f"⏱️ {t_archive * 1000:.0f} ms（{len(select_months(args.archive, args.since, args.until))} 个分区）")
+        return
+    t0 = time.perf_counter()
+    expected = count_from_jsonl(args.data, args.by, args.per, args.since, args.until,
+                                args.pattern or archive_pattern(args.archive))
+    t_jsonl = time.perf_counter() - t0
+    same = counts == expected
+    print(f"{'✔' if same else '✘'} --by {args.by} --per {args.per}"
+          + (f" --since {args.since}" if args.since else "") + (f" --until {args.until}" if args.until else ""))
+    print(f"  扫描 JSONL：{t_jsonl:.2f}s → 归档：{t_archive:.3f}s（×{t_jsonl / t_archive:.0f}）"
+          f" | 归档占用 {dir_size(args.archive) / 2**20:.1f} MB")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
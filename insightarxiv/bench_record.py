@@ -0,0 +1,95 @@
+"""
+bench_record.py — 论文记录解码基准：标准库 json / orjson × 原始 dict / 规范 Paper
+
+先把 data/ 中匹配的 JSONL 全部解压读入内存（不计 I/O），再分别计时：
+  json      json.loads → dict
+  orjson    orjson.loads → dict（未安装 orjson 时跳过）
+  json+Paper / orjson+Paper   再经 Paper.from_dict 统一字段变体
+并用 tracemalloc 统计保留全部记录时每条记录占用的内存（dict vs Paper，字符串本身两者相同）。
+
+用法：
+  python -m insightarxiv.bench_record                          # 全部增强文件
+  python -m insightarxiv.bench_record --pattern "*.jsonl" --repeat 5 --json record_bench.json
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from . import jsonl_io
+from .record import Paper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def load_lines(paths):
+    lines = []
+    for p in paths:
+        with jsonl_io.open_text(p) as f:
+            lines.extend(line for line in f if line.strip())
+    return lines
+
+def decoders():
+    yield "json", lambda lines: [json.loads(l) for l in lines]
+    if orjson is not None:
+        yield "orjson", lambda lines: [orjson.loads(l) for l in lines]
+    yield "json+Paper", lambda lines: [Paper.from_dict(json.loads(l)) for l in lines]
+    if orjson is not None:
+        yield "orjson+Paper", lambda lines: [Paper.from_dict(orjson.loads(l)) for l in lines]
+
+def best_time(fn, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()   # 上一轮的记录先回收，避免把回收时间计入本轮
+        t0 = time.perf_counter()
+        fn(lines)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def retained_bytes(fn, lines):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    rows = fn(lines)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del rows
+    return used
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark paper record decoding (json / orjson, dict / Paper)")
+    ap.add_argument("--data", default="data", help="数据目录")
+    ap.add_argument("--pattern", default="*_AI_enhanced_Chinese.jsonl", help="文件模式（含压缩变体）")
+    ap.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    ap.add_argument("--json", default=None, help="将结果另存为 JSON")
+    args = ap.parse_args()
+
+    paths = jsonl_io.glob_jsonl(os.path.join(args.data, args.pattern))
+    if not paths:
+        sys.exit(f"⚠️ {args.data} 中没有 {args.pattern}")
+    lines = load_lines(paths)
+    size = sum(len(l.encode("utf-8")) for l in lines)
+    print(f"📚 {len(paths)} 个文件，{len(lines)} 条记录，{size / 2**20:.1f} MB（已解压读入内存）")
+
+    report = []
+    for name, fn in decoders():
+        secs = best_time(fn, lines, args.repeat)
+        mem = retained_bytes(fn, lines)
+        row = {"decoder": name, "records": len(lines), "seconds": round(secs, 3),
+               "records_per_second": round(len(lines) / secs), "mb_per_second": round(size / 2**20 / secs, 1),
+               "bytes_per_record": round(mem / len(lines))}
+        report.append(row)
+        print(f"  {name:<13} {secs:6.2f}s | {row['records_per_second']:>8} 条/s | {row['mb_per_second']:6.1f} MB/s"
+              f" | 每条 {row['bytes_per_record']:>6} B")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 结果保存至：{args.json}")
+
+if __name__ == "__main__":
+    main()
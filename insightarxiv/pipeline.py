@@ -0,0 +1,253 @@
+"""
+pipeline.py — 进程内 DAG 执行器与阶段缓存
+
+每个阶段（Stage 子类）声明：依赖的上游阶段、影响结果的代码文件与参数、额外的输入文件、产出的文件。
+阶段键 = sha256(阶段名 + 参数 + 代码文件内容 + 上游产出文件内容 + 额外输入文件内容)；
+代码文件除了声明的脚本与提示词，还包括这些脚本递归 import 的全部仓库内模块（按源码解析得到）。
+与上次运行记录（<data>/.pipeline/<日期>.json）中的键相同、且产出文件都还在时跳过该阶段；
+否则运行并记录新键与耗时。阶段返回 complete=False（如仍有论文未增强成功）时不记录键，下次照常重跑。
+
+阶段之间直接传递内存中的记录（`ctx.records(名字)`）；上游被跳过时才从它的产出文件读取一次。
+某阶段失败时，依赖它的下游阶段不再运行，其余阶段照常执行。
+"""
+
+from __future__ import annotations
+import os
+import sys
+import ast
+import json
+import time
+import hashlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class StageError(Exception):
+    pass
+
+class Stage(ABC):
+    name = ""
+    deps: tuple = ()
+    code: tuple = ()   # 相对仓库根目录的源码 / 提示词文件，内容变化即视为结果失效（.py 连同其 import 的本地模块）
+
+    def outputs(self, ctx: "Context") -> List[str]:
+        return []
+
+    def params(self, ctx: "Context") -> Dict:
+        return {}
+
+    def inputs(self, ctx: "Context") -> List[str]:
+        """上游产出之外、影响结果的输入文件。"""
+        return []
+
+    @abstractmethod
+    def run(self, ctx: "Context"):
+        """执行阶段，返回 (记录, complete)；记录供下游直接使用，可为 None。"""
+
+    def load(self, ctx: "Context"):
+        """阶段被跳过时，从产出文件读回记录（默认无记录）。"""
+        return None
+
+class Context:
+    def __init__(self, root: str, date: str, args, stages: List[Stage]):
+        self.root = root
+        self.date = date
+        self.args = args
+        self.data_dir = os.path.join(root, "data")
+        self.stages = {s.name: s for s in stages}
+        self._records: Dict[str, object] = {}
+        self._hashes: Dict[tuple, str] = {}
+        self._code: Dict[tuple, List[str]] = {}
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def records(self, name: str):
+        if name not in self._records:
+            self._records[name] = self.stages[name].load(self)
+        return self._records[name]
+
+    def keep(self, name: str, records):
+        self._records[name] = records
+
+    def file_hash(self, path: str) -> str:
+        """文件内容的 sha256；同一次运行内按 (路径, 大小, mtime) 记忆，不存在的文件记为 "-"。"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return "-"
+        memo = (path, st.st_size, st.st_mtime_ns)
+        if memo not in self._hashes:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            self._hashes[memo] = h.hexdigest()
+        return self._hashes[memo]
+
+    def code_files(self, stage: Stage) -> List[str]:
+        if stage.code not in self._code:
+            self._code[stage.code] = local_imports(self.root, stage.code)
+        return self._code[stage.code]
+
+    def stage_key(self, stage: Stage) -> str:
+        files = [self.path(p) for p in self.code_files(stage)] + stage.inputs(self)
+        for dep in stage.deps:
+            files += self.stages[dep].outputs(self)
+        material = {
+            "stage": stage.name,
+            "params": stage.params(self),
+            "files": {os.path.relpath(p, self.root): self.file_hash(p) for p in files},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def imported_names(tree) -> List[tuple]:
+    """源码中的全部 import（包括函数内的延迟导入）→ [(相对层级, 模块名, [导入的名字])]。"""
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found += [(0, alias.name, []) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            found.append((node.level, node.module or "", [alias.name for alias in node.names]))
+    return found
+
+def module_files(root: str, base: str, module: str, names: List[str]) -> List[str]:
+    """在 base 目录下解析模块（及 from 导入的子模块）对应的文件；不在仓库内的模块返回空。"""
+    parts = [p for p in module.split(".") if p]
+    candidates = []
+    for sub in [parts] + [parts + [name] for name in names]:
+        path = os.path.join(base, *sub)
+        candidates += [path + ".py", os.path.join(path, "__init__.py")]
+    return [os.path.relpath(p, root) for p in candidates if os.path.isfile(p)]
+
+def local_imports(root: str, code) -> List[str]:
+    """code 及其中 .py 文件递归 import 的仓库内模块（相对路径，排序）。
+    绝对导入依次在脚本所在目录（脚本以同目录直接 import 的方式组织）与仓库根目录中查找，相对导入按包目录解析。"""
+    seen, todo = set(code), [p for p in code if p.endswith(".py")]
+    while todo:
+        rel = todo.pop()
+        path = os.path.join(root, rel)
+        try:
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), rel)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        here = os.path.dirname(path)
+        for level, module, names in imported_names(tree):
+            if level:
+                bases = [here]
+                for _ in range(level - 1):
+                    bases = [os.path.dirname(bases[0])]
+            else:
+                bases = [here, root]
+            for base in bases:
+                files = module_files(root, base, module, names)
+                if files:
+                    for f in files:
+                        if f not in seen:
+                            seen.add(f)
+                            todo.append(f)
+                    break
+    return sorted(seen)
+
+def topo_order(stages: List[Stage]) -> List[Stage]:
+    by_name = {s.name: s for s in stages}
+    order, state = [], {}
+    def visit(s: Stage):
+        if state.get(s.name) == "done":
+            return
+        if state.get(s.name) == "visiting":
+            raise StageError(f"阶段依赖成环：{s.name}")
+        state[s.name] = "visiting"
+        for dep in s.deps:
+            if dep not in by_name:
+                raise StageError(f"阶段 {s.name} 依赖未知阶段 {dep}")
+            visit(by_name[dep])
+        state[s.name] = "done"
+        order.append(s)
+    for s in stages:
+        visit(s)
+    return order
+
+def manifest_path(ctx: Context) -> str:
+    return os.path.join(ctx.data_dir, ".pipeline", f"{ctx.date}.json")
+
+def load_manifest(path: str) -> Dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path: str, manifest: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def run_pipeline(ctx: Context, selected: Optional[List[str]] = None, force: Optional[List[str]] = None,
+                 dry_run: bool = False) -> List[Dict]:
+    """按拓扑序运行所选阶段（默认全部），返回每个阶段的 {stage, status, seconds}。
+
+    未选中的阶段不运行，其产出视为现成的输入；force 中的阶段忽略缓存（"all" 表示全部）。"""
+    order = topo_order(list(ctx.stages.values()))
+    selected = set(selected or ctx.stages)
+    force = set(force or ())
+    mpath = manifest_path(ctx)
+    manifest = load_manifest(mpath)
+    failed, report = set(), []
+
+    for stage in order:
+        if stage.name not in selected:
+            continue
+        row = {"stage": stage.name, "status": "", "seconds": 0.0}
+        report.append(row)
+        broken = [d for d in stage.deps if d in failed]
+        if broken:
+            failed.add(stage.name)
+            row["status"] = "blocked"
+            print(f"⛔ [{stage.name}] 上游失败（{', '.join(broken)}），跳过")
+            continue
+
+        key = ctx.stage_key(stage)
+        prev = manifest.get(stage.name, {})
+        fresh = (prev.get("key") == key and all(os.path.exists(p) for p in stage.outputs(ctx))
+                 and not ({stage.name, "all"} & force))
+        if fresh:
+            row["status"] = "cached"
+            print(f"⏭️ [{stage.name}] 已是最新（上次用时 {prev.get('seconds', 0):.1f}s），跳过")
+            continue
+        if dry_run:
+            row["status"] = "would-run"
+            print(f"▶️ [{stage.name}] 需要运行" + ("（输入已变化）" if prev.get("key") else ""))
+            continue
+
+        print(f"\n▶️ [{stage.name}] 开始")
+        t0 = time.perf_counter()
+        try:
+            records, complete = stage.run(ctx)
+        except SystemExit as e:   # 各脚本出错时以 sys.exit 退出
+            records, complete, error = None, False, f"退出码 {e.code}" if e.code not in (None, 0) else None
+        except Exception as e:
+            records, complete, error = None, False, f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        row["seconds"] = time.perf_counter() - t0
+        if error:
+            failed.add(stage.name)
+            row["status"] = "failed"
+            manifest.pop(stage.name, None)
+            print(f"❌ [{stage.name}] 失败：{error}（{row['seconds']:.1f}s）", file=sys.stderr)
+        else:
+            ctx.keep(stage.name, records)
+            row["status"] = "done" if complete else "partial"
+            if complete:
+                # 键按运行前的输入计算：运行期间输入若被改动，下次会因键不同而重跑
+                manifest[stage.name] = {"key": key, "seconds": round(row["seconds"], 3),
+                                        "finished": datetime.now().isoformat(timespec="seconds")}
+            else:
+                manifest.pop(stage.name, None)
+            print(f"⏱️ [{stage.name}] {'完成' if complete else '部分完成（下次重跑）'}，用时 {row['seconds']:.1f}s")
+        save_manifest(mpath, manifest)
+    return report
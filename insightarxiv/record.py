@@ -0,0 +1,189 @@
+"""
+record.py — 论文记录的规范类型：各阶段共用的 Paper 与其容错解码
+
+历史数据里同一字段有多种写法（按年代混在 data/ 中）：
+  摘要      summary / abstract
+  作者备注  comment / comments（旧抓取两者并存，其中一个常为空）
+  分类      categories（列表）/ cate（单个主分类）/ primary_category
+  链接      url / abs，pdf_url / pdf / pdf_link
+  AI 结果   AI.result / AI.results
+Paper.from_dict 一次性吸收这些变体，各阶段只按属性读取，不再各写一串 `.get()`。
+from_dict 同时记下原记录的键顺序与每个字段取自哪个键（source），未采用的别名与未识别的键原样保留在 extra 中；
+to_dict 按原来的键名与顺序写回（null 字段照旧写出），解码再编码不会改变已有文件的格式，
+之后新设置的字段（如 AI）追加在末尾。代码中新建的 Paper（没有 source）按规范字段名写出。
+
+Paper 用 __slots__ 存放字段（无实例 __dict__），解析走 jsonl_io.loads（有 orjson 时用 orjson）。
+吞吐与内存对比见 insightarxiv/bench_record.py。
+"""
+
+from __future__ import annotations
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from . import jsonl_io
+
+RE_VERSION = re.compile(r"v(\d+)$")
+RE_ARXIV_ID = re.compile(r"(\d+\.\d+)(v\d+)?")
+
+# 各字段可能出现的键（按优先级）；不在其中的键进入 extra
+ALIASES = {
+    "abstract": ("summary", "abstract"),
+    "comment": ("comment", "comments"),
+    "url": ("url", "abs"),
+    "pdf_url": ("pdf_url", "pdf", "pdf_link"),
+    "primary_category": ("primary_category", "cate"),
+}
+DIRECT = {"id": "id", "title": "title", "authors": "authors", "categories": "categories", "date": "date",
+          "updated": "updated", "published": "published", "section": "section", "AI": "ai"}
+KNOWN = frozenset(DIRECT) | {k for keys in ALIASES.values() for k in keys}
+# 规范格式：(键, 属性, 为 None 时是否省略)
+CANONICAL = (("id", "id", False), ("title", "title", False), ("authors", "authors", False),
+             ("categories", "categories", False), ("primary_category", "primary_category", True),
+             ("url", "url", True), ("summary", "abstract", False), ("comment", "comment", False),
+             ("pdf_url", "pdf_url", True), ("date", "date", True), ("updated", "updated", True),
+             ("published", "published", True), ("section", "section", True), ("AI", "ai", True))
+_SOURCES: Dict[tuple, tuple] = {}   # 同一种键布局共用一个 source 元组
+
+def first(d: Dict, keys) -> Optional[str]:
+    """按顺序取第一个非空值；都为空时返回首选键的值（"" 或 None）。"""
+    return d.get(chosen_key(d, keys))
+
+def chosen_key(d: Dict, keys) -> str:
+    """first 取值所用的键：第一个值非空的键；都为空时为首选键。"""
+    for k in keys:
+        if d.get(k):
+            return k
+    return keys[0]
+
+def source_of(d: Dict) -> tuple:
+    """原记录的键顺序 → ((键, 属性), ...)；属性为 None 的键（未采用的别名、未识别的键）取自 extra。"""
+    chosen = tuple(chosen_key(d, keys) for keys in ALIASES.values())
+    layout = (tuple(d), chosen)
+    source = _SOURCES.get(layout)
+    if source is None:
+        field_of = dict(DIRECT)
+        field_of.update(zip(chosen, ALIASES))
+        source = _SOURCES.setdefault(layout, tuple((k, field_of.get(k)) for k in d))
+    return source
+
+def as_list(value, sep: str = ",") -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):   # 个别旧记录把作者 / 分类存成一个字符串
+        return [s.strip() for s in re.split(sep, value) if s.strip()]
+    return list(value)
+
+def normalize_ai(ai) -> Optional[Dict]:
+    if not isinstance(ai, dict):
+        return None
+    if "results" in ai and "result" not in ai:
+        ai = dict(ai)
+        ai["result"] = ai.pop("results")
+    return ai
+
+class Paper:
+    __slots__ = ("id", "title", "authors", "abstract", "comment", "categories", "primary_category",
+                 "url", "pdf_url", "date", "updated", "published", "section", "ai", "extra", "source")
+
+    def __init__(self, id: str, title: Optional[str] = None, authors: Optional[List[str]] = None,
+                 abstract: Optional[str] = None, comment: Optional[str] = None,
+                 categories: Optional[List[str]] = None, primary_category: Optional[str] = None,
+                 url: Optional[str] = None, pdf_url: Optional[str] = None, date: Optional[str] = None,
+                 updated: Optional[str] = None, published: Optional[str] = None, section: Optional[str] = None,
+                 ai: Optional[Dict] = None, extra: Optional[Dict] = None, source: Optional[tuple] = None):
+        self.id = id
+        self.title = title
+        self.authors = authors if authors is not None else []
+        self.abstract = abstract
+        self.comment = comment
+        self.categories = categories if categories is not None else []
+        self.primary_category = primary_category
+        self.url = url
+        self.pdf_url = pdf_url
+        self.date = date
+        self.updated = updated
+        self.published = published
+        self.section = section
+        self.ai = ai
+        self.extra = extra
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Paper":
+        """容错解码：吸收历史字段变体。d 不是 JSON 对象时抛 TypeError。"""
+        if not isinstance(d, dict):
+            raise TypeError(f"论文记录应为 JSON 对象，得到 {type(d).__name__}")
+        get = d.get
+        primary = first(d, ALIASES["primary_category"])
+        categories = as_list(get("categories"), r"[,\s]+")
+        if not categories and primary:
+            categories = [primary]
+        source = source_of(d)
+        extra = {k: d[k] for k, field in source if field is None} or None
+        return cls(get("id"), get("title"), as_list(get("authors")), first(d, ALIASES["abstract"]),
+                   first(d, ALIASES["comment"]), categories, primary, first(d, ALIASES["url"]),
+                   first(d, ALIASES["pdf_url"]), get("date"), get("updated"), get("published"),
+                   get("section"), normalize_ai(get("AI")), extra, source)
+
+    def to_dict(self) -> Dict:
+        """解码而来的记录按原键名与顺序写回，之后新设置的字段追加在末尾；
+        代码中新建的记录按规范格式写出（可选字段为 None 时省略）。"""
+        extra = self.extra or {}
+        if self.source is None:
+            d = {key: getattr(self, field) for key, field, optional in CANONICAL[:-1]
+                 if not optional or getattr(self, field) is not None}
+            d.update(extra)
+            if self.ai is not None:
+                d["AI"] = self.ai
+            return d
+        d = {key: extra[key] if field is None else getattr(self, field) for key, field in self.source}
+        covered = {field for _, field in self.source}
+        if "categories" not in covered and self.categories == [self.primary_category]:
+            covered.add("categories")   # 由 cate 推出的分类列表，原记录里没有
+        for key, field, _ in CANONICAL:
+            value = getattr(self, field)
+            if field not in covered and value is not None and value != [] and key not in d:
+                d[key] = value
+        for key, value in extra.items():
+            d.setdefault(key, value)
+        return d
+
+    @property
+    def primary(self) -> Optional[str]:
+        """报告分组所用的主分类：分类列表的第一个。"""
+        return self.categories[0] if self.categories else None
+
+    @property
+    def base_id(self) -> str:
+        return RE_VERSION.sub("", self.id or "")
+
+    @property
+    def version(self) -> int:
+        m = RE_VERSION.search(self.id or "")
+        return int(m.group(1)) if m else 1
+
+    def __repr__(self) -> str:
+        return f"Paper({self.id!r}, {(self.title or '')[:40]!r})"
+
+def split_id(full_id: str) -> Optional[tuple]:
+    """2508.00351v2 → ("2508.00351", 2)；没有版本号时为 1；不是 arXiv 新式 ID 时返回 None。"""
+    m = RE_ARXIV_ID.match(full_id or "")
+    if not m:
+        return None
+    return m.group(1), int(m.group(2)[1:]) if m.group(2) else 1
+
+def decode(line: str) -> Paper:
+    return Paper.from_dict(jsonl_io.loads(line))
+
+def iter_papers(path: str, skip_bad: bool = False) -> Iterator[Paper]:
+    """流式读取（.jsonl / .jsonl.gz / .jsonl.zst）；skip_bad 时跳过无法解析或不是对象的行。"""
+    for row in jsonl_io.iter_jsonl(path, skip_bad):
+        if isinstance(row, dict) or not skip_bad:
+            yield Paper.from_dict(row)
+
+def read_papers(path: str, skip_bad: bool = False) -> List[Paper]:
+    return list(iter_papers(path, skip_bad))
+
+def write_papers(papers: Iterable[Paper], path: str) -> str:
+    """按 to_dict 写出（原子替换，按扩展名压缩），返回实际路径。"""
+    return jsonl_io.write_jsonl((p.to_dict() for p in papers), path)
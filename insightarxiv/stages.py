@@ -0,0 +1,173 @@
+"""
+stages.py — 每日流水线的各个阶段
+
+  fetch ──▶ enhance ──▶ report ──▶ readme
+                   └──▶ database
+
+各阶段直接调用原脚本中的函数（脚本本身仍可单独运行），重依赖（Scrapy、LangChain、jieba / NLTK）
+只在该阶段真正运行时才导入。原脚本以“同目录直接 import”的方式组织，这里把它们所在目录加入 sys.path。
+"""
+
+from __future__ import annotations
+import os
+import sys
+import shlex
+import asyncio
+from datetime import date
+from typing import List
+
+from . import jsonl_io, record, related, trends
+from .pipeline import Stage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_DIRS = ("daily_arxiv", "ai", "to_md")
+
+def use_script_dirs():
+    for sub in SCRIPT_DIRS:
+        path = os.path.join(ROOT, sub)
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+def language(ctx) -> str:
+    return ctx.args.language or os.getenv("LANGUAGE") or "Chinese"
+
+def categories(ctx) -> str:
+    return ctx.args.categories or os.getenv("CATEGORIES", "")
+
+class FetchStage(Stage):
+    name = "fetch"
+    code = ("daily_arxiv/daily_arxiv.py", "daily_arxiv/listing_parser.py", "daily_arxiv/fetch_plan.py")
+
+    def raw_path(self, ctx) -> str:
+        return jsonl_io.resolve(os.path.join(ctx.data_dir, f"{ctx.date}.jsonl"))
+
+    def outputs(self, ctx):
+        return [self.raw_path(ctx)]
+
+    def params(self, ctx):
+        return {"date": ctx.date, "categories": categories(ctx), "today": self.is_today(ctx),
+                "args": ctx.args.fetch_args}
+
+    def is_today(self, ctx) -> bool:
+        return ctx.date == ctx.args.today
+
+    def run(self, ctx):
+        use_script_dirs()
+        import daily_arxiv
+        argv = ["--categories", categories(ctx)] if categories(ctx) else []
+        if self.is_today(ctx):
+            argv += ["--out", self.raw_path(ctx)]
+        else:   # 过去的日期：从 pastweek 列表中按公告日期回填这一天
+            argv += ["--backfill", ctx.date, ctx.date, "--data-dir", ctx.data_dir, "--overwrite"]
+        daily_arxiv.main(argv + shlex.split(ctx.args.fetch_args))
+        if not os.path.exists(self.raw_path(ctx)):
+            raise FileNotFoundError(f"抓取没有产出 {self.raw_path(ctx)}（当天可能没有公告）")
+        return record.read_papers(self.raw_path(ctx)), True
+
+    def load(self, ctx):
+        return record.read_papers(self.raw_path(ctx))
+
+class EnhanceStage(Stage):
+    name = "enhance"
+    deps = ("fetch",)
+    code = ("ai/enhance.py", "ai/structure.py", "ai/template.txt", "ai/system.txt")
+
+    def enhanced_path(self, ctx) -> str:
+        return jsonl_io.resolve(os.path.join(ctx.data_dir, f"{ctx.date}_AI_enhanced_{language(ctx)}.jsonl"))
+
+    def outputs(self, ctx):
+        return [self.enhanced_path(ctx)]
+
+    def params(self, ctx):
+        return {"language": language(ctx), "backend": ctx.args.backend, "args": ctx.args.enhance_args}
+
+    def run(self, ctx):
+        use_script_dirs()
+        import enhance
+        argv = ["--data", jsonl_io.logical(FetchStage().raw_path(ctx)), "--language", language(ctx)]
+        if ctx.args.backend:
+            argv += ["--backend", ctx.args.backend]
+        rows = asyncio.run(enhance.main(argv + shlex.split(ctx.args.enhance_args), papers=ctx.records("fetch")))
+        if rows is None:
+            raise RuntimeError("没有可增强的论文")
+        # 仍有 ERROR 占位（超时 / 配额耗尽）时不记为完成，下次重跑只补这些论文
+        complete = all(all(enhance.valid((p.ai or {}).get(f)) for f in enhance.FIELDS) for p in rows)
+        return rows, complete
+
+    def load(self, ctx):
+        return record.read_papers(self.enhanced_path(ctx))
+
+class DatabaseStage(Stage):
+    name = "database"
+    deps = ("enhance",)
+    code = ("build_database.py", "insightarxiv/jsonl_io.py", "insightarxiv/record.py", "insightarxiv/archive.py",
+            "insightarxiv/trends.py", "insightarxiv/related.py")
+
+    def outputs(self, ctx):
+        return [ctx.path("docs", "data", "index.json"), ctx.path("docs", "data", "search_index_manifest.json"),
+                ctx.path("docs", "data", "trends", "index.json")]
+
+    def params(self, ctx):
+        return {"archive": os.getenv("PAPER_ARCHIVE", ""), "trends": [trends.FLOOR, trends.TOP_K],
+                "related": related.K}
+
+    def inputs(self, ctx):
+        # 网站数据库由全部增强文件汇总而成
+        return jsonl_io.glob_jsonl(os.path.join(ctx.data_dir, f"*_AI_enhanced_{language(ctx)}.jsonl"))
+
+    def run(self, ctx):
+        import build_database
+        # 其余日期仍从增强文件读取（网站数据库是全部日期的汇总），当天直接用 enhance 阶段的内存记录
+        build_database.build_database_from_jsonl_fixed(ctx.data_dir, ctx.path("docs", "data"), language(ctx),
+                                                       {ctx.date: ctx.records("enhance")})
+        return None, True
+
+class ReportStage(Stage):
+    name = "report"
+    deps = ("enhance",)
+    code = ("to_md/convert.py", "to_md/report_model.py", "to_md/sinks.py",
+            "to_md/template_engine.py", "to_md/catalog.py", "to_md/paper_template.md")
+
+    def outputs(self, ctx):
+        paths = [os.path.join(ctx.data_dir, f"{ctx.date}.md")]
+        if "summary" in ctx.args.sinks:
+            paths.append(os.path.join(ctx.data_dir, f"{ctx.date}.summary.json"))
+        return paths
+
+    def params(self, ctx):
+        return {"sinks": ctx.args.sinks, "categories": os.getenv("CATEGORIES", ""),
+                "site_url": os.getenv("SITE_URL", "")}
+
+    def run(self, ctx):
+        use_script_dirs()
+        import convert
+        names = [s.strip() for s in ctx.args.sinks.split(",") if s.strip()]
+        template = convert.load_template(ctx.path("to_md", "paper_template.md"))
+        output = self.outputs(ctx)[0]
+        for name, paths, secs in convert.render(ctx.records("enhance"), template, ctx.date, output, names,
+                                                site_url=os.getenv("SITE_URL", "")):
+            target = os.path.relpath(paths[0], ctx.root) if len(paths) == 1 else f"{len(paths)} 个文件"
+            print(f"  ✍️ {name}: {target}（{secs * 1000:.0f} ms）")
+        return None, True
+
+class ReadmeStage(Stage):
+    name = "readme"
+    deps = ("report",)
+    code = ("update_readme.py", "readme_content_template.md")
+
+    def outputs(self, ctx):
+        return [ctx.path("README.md")]
+
+    def inputs(self, ctx):
+        return [os.path.join(ctx.data_dir, "catalog.json")]
+
+    def params(self, ctx):
+        return {"today": date.today().isoformat()}   # 日历以运行当天为准
+
+    def run(self, ctx):
+        import update_readme
+        update_readme.main()
+        return None, True
+
+def default_stages() -> List[Stage]:
+    return [FetchStage(), EnhanceStage(), DatabaseStage(), ReportStage(), ReadmeStage()]
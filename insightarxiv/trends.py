@@ -0,0 +1,279 @@
+"""
+trends.py — 分类与关键词的趋势聚合：按日 / 按月计数，增量维护，输出给网站的小分片 JSON
+
+记录里的 AI 关键词和分类此前只用于搜索，画一条趋势线需要客户端下载全部月份分片。这里由构建过程预先聚合：
+
+- 每个增强文件 data/<日期>_AI_enhanced_<语言>.jsonl 对应一个同名 sidecar data/<日期>_AI_enhanced_<语言>.trends.json，
+  保存当天的总篇数、各分类篇数、各关键词篇数（全部计数，不截断），以及源文件的 sha1；
+  源文件内容不变的日期直接复用 sidecar（CI 检出后 mtime 不可靠，因此按内容校验），
+  每天只解析新增 / 变化的那一个文件，源文件被删除时一并删除 sidecar；
+  增强文件模式（--pattern，build_database.py 按配置的语言传入）决定读哪些文件，也只清理与该模式对应的
+  sidecar，不同语言的 sidecar 互不覆盖；
+- 输出由 sidecar 合并而成（只读几 KB 的计数，不再解析 JSONL），写到 docs/data/trends/：
+    index.json              月份列表、各月总数与 top-K 分类 / 关键词（几 KB）
+    months.json             每个分类、每个总篇数不低于 floor 的关键词的逐月计数（按总篇数排序）
+    days-<YYYY-MM>.json     该月逐日总数、各分类与该月篇数不低于 floor 的关键词的逐日计数，以及每天的 top-K
+  序列都是与 months / days 对齐的整数数组；月份分片只由该月的 sidecar 决定，新的一天只改动所在月份的分片
+  与两个汇总文件，内容没有变化的文件不重写（避免无意义的提交）。
+
+计数口径：同一天内按论文基础 ID 去重；分类取论文的全部分类（交叉列出的分类也计入）；
+关键词取 AI.keywords 按逗号切分后归一化（NFKC、小写、合并空白、去掉首尾标点），同一论文内去重，
+AI 失败的占位（ERROR / 错误：AI分析失败。）不计入；分类只统计 arXiv 分类（不含 ACM / MSC 分类号）。
+floor 只决定哪些关键词输出序列，各期 top-K 列表不受其限制。
+
+用法：
+  python -m insightarxiv.trends update                    # 增量更新（build_database.py 末尾也会调用）
+  python -m insightarxiv.trends update --rebuild          # 忽略现有 sidecar，全部重算
+  python -m insightarxiv.trends show 大型语言模型          # 打印某个关键词 / 分类的逐月计数（读输出文件）
+"""
+
+from __future__ import annotations
+import os
+import re
+import sys
+import glob
+import json
+import time
+import fnmatch
+import hashlib
+import argparse
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from . import jsonl_io, record
+
+VERSION = 1
+SIDECAR_SUFFIX = ".trends.json"
+PATTERN = "*_AI_enhanced_Chinese.jsonl"
+RE_DAY = re.compile(r"^(\d{4}-\d{2}-\d{2})_")   # 增强文件名以日期开头
+RE_CATEGORY = re.compile(r"^[a-z]+(?:-[a-z]+)?\.[A-Za-z-]+$|^[a-z]+-[a-z]+$")   # cs.CL、cond-mat.other、hep-th；排除 ACM / MSC 分类号
+FLOOR = int(os.getenv("TRENDS_FLOOR", 20))
+TOP_K = int(os.getenv("TRENDS_TOP_K", 20))
+PLACEHOLDERS = ("ERROR", "错误：AI分析失败。")
+EDGE_PUNCT = " \t.,;:!?。，、；：！？\"'“”‘’()（）[]【】"
+
+def normalize_keyword(keyword: str) -> str:
+    keyword = unicodedata.normalize("NFKC", keyword)
+    return " ".join(keyword.split()).strip(EDGE_PUNCT).lower()
+
+def keywords_of(paper: record.Paper) -> List[str]:
+    raw = (paper.ai or {}).get("keywords")
+    if not isinstance(raw, str) or raw.strip() in PLACEHOLDERS:
+        return []
+    # 先做 NFKC，全角逗号也能切开
+    found = (normalize_keyword(k) for k in unicodedata.normalize("NFKC", raw).split(","))
+    return list(dict.fromkeys(k for k in found if k))
+
+def count_day(path: str) -> Dict:
+    """一个增强文件 → {"total", "categories": {分类: 篇数}, "keywords": {关键词: 篇数}}（按计数降序）。"""
+    seen = set()
+    categories, keywords = Counter(), Counter()
+    for paper in record.iter_papers(path, skip_bad=True):
+        if not paper.id or paper.base_id in seen:
+            continue
+        seen.add(paper.base_id)
+        categories.update({c for c in paper.categories if RE_CATEGORY.match(c)})
+        keywords.update(keywords_of(paper))
+    return {"total": len(seen), "categories": ranked(categories), "keywords": ranked(keywords)}
+
+def ranked(counts: Dict[str, int]) -> Dict[str, int]:
+    return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+def top(counts: Dict[str, int], k: int) -> List[list]:
+    return [[term, n] for term, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]]
+
+def digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ─────────────── 每日 sidecar ───────────────
+def sidecar_path(data_dir: str, source: str) -> str:
+    """增强文件名（不含压缩扩展名）→ 同名 sidecar：2025-07-30_AI_enhanced_Chinese.jsonl → ….trends.json。"""
+    return os.path.join(data_dir, source[:-len(".jsonl")] + SIDECAR_SUFFIX)
+
+def source_of_sidecar(path: str) -> str:
+    return os.path.basename(path)[:-len(SIDECAR_SUFFIX)] + ".jsonl"
+
+def load_sidecar(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") == VERSION:
+            return sidecar
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return None
+
+def write_json(path: str, obj, **kwargs) -> bool:
+    """内容与现有文件相同时不写；返回是否写出。"""
+    text = json.dumps(obj, ensure_ascii=False, **kwargs) + "\n"
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+def source_files(data_dir: str, pattern: str = PATTERN) -> Dict[str, str]:
+    """日期 → 实际文件（含 .gz / .zst）。"""
+    found = {}
+    for path in jsonl_io.glob_jsonl(os.path.join(data_dir, pattern)):
+        m = RE_DAY.match(os.path.basename(jsonl_io.logical(path)))
+        if m:
+            found[m.group(1)] = path
+    return found
+
+def refresh(data_dir: str, pattern: str = PATTERN, rebuild: bool = False) -> tuple:
+    """让 sidecar 与增强文件一致：只重算新增或内容变化的日期。返回 ({日期: 计数}, 重算的日期, 删除的日期)。"""
+    sources = source_files(data_dir, pattern)
+    names = {os.path.basename(jsonl_io.logical(path)) for path in sources.values()}
+    days, counted = {}, []
+    for day, path in sources.items():
+        sha1 = digest(path)
+        name = os.path.basename(jsonl_io.logical(path))
+        sidecar = None if rebuild else load_sidecar(sidecar_path(data_dir, name))
+        if sidecar is None or sidecar.get("source", {}).get("sha1") != sha1:
+            sidecar = {"version": VERSION, "date": day, "source": {"file": name, "sha1": sha1}}
+            sidecar.update(count_day(path))
+            write_json(sidecar_path(data_dir, name), sidecar, indent=0)
+            counted.append(day)
+        days[day] = sidecar
+    removed = []
+    for path in glob.glob(os.path.join(data_dir, "*" + SIDECAR_SUFFIX)):
+        name = source_of_sidecar(path)   # 只清理本模式（本语言）的 sidecar
+        m = RE_DAY.match(name)
+        if m and fnmatch.fnmatchcase(name, os.path.basename(pattern)) and name not in names:
+            os.remove(path)
+            removed.append(m.group(1))
+    return days, counted, sorted(removed)
+
+# ─────────────── 合并与输出 ───────────────
+def merge(counts: Iterable[Dict[str, int]]) -> Counter:
+    total = Counter()
+    for c in counts:
+        total.update(c)
+    return total
+
+def series(terms: Iterable[str], periods: List[Dict[str, int]]) -> Dict[str, List[int]]:
+    return {term: [p.get(term, 0) for p in periods] for term in terms}
+
+def build_outputs(days: Dict[str, Dict], floor: int = FLOOR, top_k: int = TOP_K) -> Dict[str, Dict]:
+    """{日期: sidecar} → {文件名: 内容}。"""
+    by_month: Dict[str, List[str]] = {}
+    for day in sorted(days):
+        by_month.setdefault(day[:7], []).append(day)
+    months = sorted(by_month)
+    month_cats = [merge(days[d]["categories"] for d in by_month[m]) for m in months]
+    month_kws = [merge(days[d]["keywords"] for d in by_month[m]) for m in months]
+    all_cats, all_kws = merge(month_cats), merge(month_kws)
+    categories = [c for c, _ in top(all_cats, len(all_cats))]
+    tracked = [k for k, n in top(all_kws, len(all_kws)) if n >= floor]
+
+    outputs = {}
+    outputs["index.json"] = {
+        "version": VERSION, "floor": floor, "top_k": top_k,
+        "first_day": min(days) if days else None, "last_day": max(days) if days else None,
+        "months": months, "shards": {m: f"days-{m}.json" for m in months},
+        "total": [sum(days[d]["total"] for d in by_month[m]) for m in months],
+        "top": {m: {"categories": top(month_cats[i], top_k), "keywords": top(month_kws[i], top_k)}
+                for i, m in enumerate(months)},
+    }
+    outputs["months.json"] = {"version": VERSION, "months": months,
+                              "categories": series(categories, month_cats), "keywords": series(tracked, month_kws)}
+    for i, m in enumerate(months):
+        outputs[f"days-{m}.json"] = day_shard(m, {d: days[d] for d in by_month[m]}, month_cats[i], month_kws[i],
+                                              floor, top_k)
+    return outputs
+
+def day_shard(month: str, days: Dict[str, Dict], cats: Counter, kws: Counter, floor: int, top_k: int) -> Dict:
+    """月份分片只取决于该月各天：分类与关键词按该月计数排序，关键词取该月不低于 floor 的。
+    新的一天只改动所在月份的分片，其他月份的文件保持不变。"""
+    ds = sorted(days)
+    tracked = [k for k, n in top(kws, len(kws)) if n >= floor]
+    return {
+        "version": VERSION, "month": month, "days": ds,
+        "total": [days[d]["total"] for d in ds],
+        "categories": series((c for c, _ in top(cats, len(cats))), [days[d]["categories"] for d in ds]),
+        "keywords": series(tracked, [days[d]["keywords"] for d in ds]),
+        "top": {d: {"categories": top(days[d]["categories"], top_k), "keywords": top(days[d]["keywords"], top_k)}
+                for d in ds},
+    }
+
+def emit(outputs: Dict[str, Dict], out_dir: str) -> List[str]:
+    """写出有变化的文件，删除已不再产出的月份分片；返回写出的文件名。"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = [name for name, obj in outputs.items()
+               if write_json(os.path.join(out_dir, name), obj, separators=(",", ":"))]
+    for path in glob.glob(os.path.join(out_dir, "days-*.json")):
+        if os.path.basename(path) not in outputs:
+            os.remove(path)
+    return written
+
+def update(data_dir: str = "data", out_dir: str = "docs/data/trends", pattern: str = PATTERN,
+           floor: int = FLOOR, top_k: int = TOP_K, rebuild: bool = False) -> Dict:
+    t0 = time.perf_counter()
+    days, counted, removed = refresh(data_dir, pattern, rebuild)
+    outputs = build_outputs(days, floor, top_k)
+    written = emit(outputs, out_dir)
+    size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in outputs)
+    return {"days": len(days), "counted": counted, "removed": removed, "written": written,
+            "files": len(outputs), "bytes": size, "seconds": round(time.perf_counter() - t0, 3)}
+
+def print_update(result: Dict, out_dir: str):
+    print(f"📈 趋势聚合：{result['days']} 天，重新计数 {len(result['counted'])} 天"
+          + (f"，移除 {len(result['removed'])} 天" if result["removed"] else "")
+          + f"，写出 {len(result['written'])}/{result['files']} 个文件"
+          f"（共 {result['bytes'] / 1024:.1f} KB）→ {out_dir}，{result['seconds']:.2f}s")
+
+def show(out_dir: str, term: str):
+    with open(os.path.join(out_dir, "months.json"), encoding="utf-8") as f:
+        months = json.load(f)
+    key = normalize_keyword(term)
+    for kind, name, label in (("categories", term, "分类"), ("keywords", key, "关键词")):
+        if name in months[kind]:
+            counts = months[kind][name]
+            peak = max(counts) or 1
+            print(f"{label}: {name}")
+            for m, n in zip(months["months"], counts):
+                print(f"  {m}  {n:>6}  {'█' * (n * 40 // peak)}")
+            return True
+    return False
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m insightarxiv.trends", description="分类与关键词趋势聚合。")
+    parser.add_argument("--data", default="data", help="数据目录（增强文件与 sidecar 所在）")
+    parser.add_argument("--out", default="docs/data/trends", help="网站输出目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+    u = sub.add_parser("update", help="增量更新 sidecar 与网站输出")
+    u.add_argument("--pattern", default=PATTERN, help="增强文件模式")
+    u.add_argument("--floor", type=int, default=FLOOR, help="输出序列的关键词最低总篇数")
+    u.add_argument("--top-k", type=int, default=TOP_K, help="每期 top-K 列表长度")
+    u.add_argument("--rebuild", action="store_true", help="忽略现有 sidecar，全部重算")
+    s = sub.add_parser("show", help="打印某个分类 / 关键词的逐月计数")
+    s.add_argument("term", help="分类（如 cs.CL）或关键词")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        result = update(args.data, args.out, args.pattern, args.floor, args.top_k, args.rebuild)
+        print_update(result, args.out)
+        return
+    try:
+        found = show(args.out, args.term)
+    except FileNotFoundError:
+        print(f"错误: {args.out} 中没有趋势输出，请先运行 update", file=sys.stderr)
+        sys.exit(1)
+    if not found:
+        print(f"错误: 没有 {args.term!r} 的序列（关键词需达到 floor 才会输出）", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,3 @@
 today=`date -u "+%Y-%m-%d"`
-cd daily_arxiv
-scrapy crawl arxiv -o ../data/${today}.jsonl
-
-cd ../ai
-python enhance.py --data ../data/${today}.jsonl
-
-cd ../to_md
-python convert.py --data ../data/${today}_AI_enhanced_${LANGUAGE}.jsonl
-
-cd ..
-python update_readme.py
+# 抓取 → AI 增强 → 数据库 / 报告 → README，在一个进程内按依赖顺序运行；已完成且输入未变的阶段自动跳过
+python -m insightarxiv run --date ${today}
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from insightarxiv import archive, jsonl_io
+
+def paper(pid, cats, keywords="", comment=None, updated=None):
+    return {"id": pid, "title": f"T {pid}", "authors": ["A"], "categories": cats, "summary": "s",
+            "comment": comment, "updated": updated, "AI": {"tldr": "t", "keywords": keywords}}
+
+DAYS = {
+    "2025-07-30": [paper("2507.00001v1", ["cs.CV"], "NeRF, 3DGS"), paper("2507.00002v1", ["cs.CL", "cs.AI"], "LLM")],
+    "2025-08-01": [paper("2507.00001v2", ["cs.CV", "cs.GR"], "3DGS"), paper("2508.00003v1", ["cs.LG"], "RL")],
+    "2025-08-04": [paper("2508.00003v1", ["cs.LG"], "RL", comment="ICML", updated="2025-08-03"),
+                   paper("2508.00004v1", ["cs.CV"], "3DGS, LLM"), paper("2507.00002v3", ["cs.CL"], "LLM, RL")],
+}
+
+def write_day(data_dir, day, language="Chinese"):
+    jsonl_io.write_jsonl(DAYS[day], os.path.join(data_dir, f"{day}_AI_enhanced_{language}.jsonl"))
+
+def snapshot(archive_dir):
+    return {m: archive.read_partition(archive_dir, m) for m in archive.months(archive_dir)}
+
+def by_id(snap):
+    rows = {}
+    for cols in snap.values():
+        for i, pid in enumerate(cols["id"]):
+            rows[pid] = {name: cols[name][i] for name in archive.COLUMNS}
+    return rows
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    data, inc, full = str(tmp_path / "data"), str(tmp_path / "inc"), str(tmp_path / "full")
+    for day in ("2025-07-30", "2025-08-01"):
+        write_day(data, day)
+    assert archive.update(data, inc)["mode"] == "rebuild"
+    write_day(data, "2025-08-04")
+    r = archive.update(data, inc)
+    assert (r["mode"], r["files"], r["months"]) == ("incremental", 1, ["2025-07", "2025-08"])
+    assert archive.update(data, inc)["mode"] == "unchanged"
+    archive.update(data, full, rebuild=True)
+    assert by_id(snapshot(inc)) == by_id(snapshot(full))
+    rows = by_id(snapshot(full))
+    assert set(rows) == {"2507.00001", "2507.00002", "2508.00003", "2508.00004"}
+    assert (rows["2507.00002"]["version"], rows["2507.00002"]["date"]) == (3, "2025-08-04")   # 移到新版本所在月份
+    assert (rows["2508.00003"]["comment"], rows["2508.00003"]["updated"]) == ("ICML", "2025-08-03")
+    assert rows["2508.00003"]["date"] == "2025-08-01"   # 同版本保留先出现的一行
+    for by in archive.BY_COLUMN:
+        assert archive.count(inc, by, "week") == archive.count_from_jsonl(data, by, "week")
+
+def test_changed_or_earlier_file_triggers_rebuild(tmp_path):
+    data, out = str(tmp_path / "data"), str(tmp_path / "archive")
+    write_day(data, "2025-08-01")
+    archive.update(data, out)
+    write_day(data, "2025-07-30")   # 补入更早的日期
+    assert archive.update(data, out)["mode"] == "rebuild"
+    path = jsonl_io.resolve(os.path.join(data, "2025-08-01_AI_enhanced_Chinese.jsonl"))
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    assert archive.update(data, out)["mode"] == "rebuild"
+    os.remove(path)
+    assert archive.update(data, out)["papers"] == 2
+
+def test_archive_remembers_its_pattern(tmp_path, capsys):
+    data, out = str(tmp_path / "data"), str(tmp_path / "archive")
+    write_day(data, "2025-07-30", "English")
+    write_day(data, "2025-08-01", "English")
+    write_day(data, "2025-08-04")   # 另一种语言的文件不应混入
+    english = "*_AI_enhanced_English.jsonl"
+    assert archive.update(data, out, english)["papers"] == 3
+    write_day(data, "2025-08-04", "English")
+    r = archive.update(data, out)   # 不带模式：沿用归档记录的模式，增量导入
+    assert (r["mode"], r["files"], archive.archive_pattern(out)) == ("incremental", 1, english)
+    with pytest.raises(SystemExit) as e:
+        archive.main(["--data", data, "--archive", out, "bench", "--by", "keyword"])
+    assert e.value.code == 0, capsys.readouterr().out
+    assert archive.update(data, out, archive.PATTERN)["mode"] == "rebuild"   # 换模式整体重建
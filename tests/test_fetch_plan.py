@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "daily_arxiv"))
+pytest.importorskip("lxml")
+
+import fetch_plan
+import bench_fetch_plan
+
+def test_few_categories_of_a_large_archive_stay_per_category():
+    # 没有规模记录：cs 只请求 2/40 个分类时不合并，eess 请求 4/4 时合并
+    plan = fetch_plan.plan_fetch(["cs.AI", "cs.CL", "eess.SP", "eess.IV", "eess.AS", "eess.SY"])
+    assert plan == [("cs.AI", ["cs.AI"]), ("cs.CL", ["cs.CL"]), ("eess", ["eess.SP", "eess.IV", "eess.AS", "eess.SY"])]
+    # 有规模记录时按条目数决定
+    sizes = {"cs": 900, "cs.AI": 280, "cs.CL": 150}
+    assert fetch_plan.plan_fetch(["cs.AI", "cs.CL"], sizes=sizes) == [("cs.AI", ["cs.AI"]), ("cs.CL", ["cs.CL"])]
+    sizes["cs.CL"] = 700
+    assert fetch_plan.plan_fetch(["cs.AI", "cs.CL"], sizes=sizes) == [("cs", ["cs.AI", "cs.CL"])]
+    assert fetch_plan.plan_fetch(["cs.AI", "cs.CL"], 0, sizes) == [("cs.AI", ["cs.AI"]), ("cs.CL", ["cs.CL"])]
+
+def test_sizes_file_round_trip(tmp_path):
+    path = str(tmp_path / fetch_plan.SIZES_FILE)
+    assert fetch_plan.load_sizes(path, "new") == {}
+    fetch_plan.save_sizes(path, "new", {"cs": 10, "cs.AI": 3})
+    fetch_plan.save_sizes(path, "pastweek", {"cs": 50})
+    fetch_plan.save_sizes(path, "new", {"cs.AI": 4})
+    assert fetch_plan.load_sizes(path, "new") == {"cs": 10, "cs.AI": 4}
+    assert fetch_plan.load_sizes(path, "pastweek") == {"cs": 50}
+
+def test_sections_do_not_depend_on_strategy():
+    papers = bench_fetch_plan.load_day()
+    cats = ["cs.CL", "cs.AI", "cs.LG", "eess.IV"]   # 先抓 cs.CL：cs.AI 主分类的论文先在其 Cross 小节出现
+    forced = {**dict.fromkeys(cats, 1), "cs": 0, "eess": 0}
+    per = bench_fetch_plan.crawl(papers, cats, 0, 2000)
+    grouped = bench_fetch_plan.crawl(papers, cats, 2, 5, forced)
+    assert grouped["plan"][0][0] == "cs"
+    assert {r["id"]: r["section"] for r in per["items"]} == {r["id"]: r["section"] for r in grouped["items"]}
+    # 记录的规模等于对应列表页的条目数（归档页上统计的分类条目数也是）
+    for path, n in {**per["observed"], **grouped["observed"]}.items():
+        assert n == len(bench_fetch_plan.listed(papers, path))
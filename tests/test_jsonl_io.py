@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from insightarxiv import jsonl_io
+
+ROWS = [{"id": "2508.00001v1", "title": "Gaussian Splatting 综述", "score": 1.5, "tags": ["cs.CV", "cs.GR"]},
+        {"id": "2508.00002v2", "title": None, "AI": {"tldr": "一句话总结"}}]
+
+CODECS = ["", "gz", pytest.param("zst", marks=pytest.mark.skipif(jsonl_io.zstandard is None,
+                                                                  reason="zstandard 未安装"))]
+MAGIC = {"": b"{", "gz": b"\x1f\x8b", "zst": b"\x28\xb5\x2f\xfd"}
+
+def touch(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(tmp_path, codec):
+    path = str(tmp_path / ("day" + jsonl_io.SUFFIXES[codec]))
+    assert jsonl_io.write_jsonl(ROWS, path) == path
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC[codec])) == MAGIC[codec]
+    assert jsonl_io.read_jsonl(path) == ROWS
+    assert jsonl_io.read_jsonl(str(tmp_path / "day.jsonl")) == ROWS   # 逻辑路径解析到实际文件
+    assert jsonl_io.count_rows(path) == len(ROWS)
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_append_reads_across_frames(tmp_path, codec):
+    path = str(tmp_path / ("day" + jsonl_io.SUFFIXES[codec]))
+    for row in ROWS:
+        with jsonl_io.open_text(path, "a") as f:
+            f.write(jsonl_io.dumps(row) + "\n")
+    assert jsonl_io.read_jsonl(path) == ROWS
+
+def test_new_files_follow_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("JSONL_COMPRESSION", "gz")
+    written = jsonl_io.write_jsonl(ROWS, str(tmp_path / "day.jsonl"))
+    assert written.endswith(".jsonl.gz")
+    assert jsonl_io.exists(str(tmp_path / "day.jsonl"))
+    monkeypatch.setenv("JSONL_COMPRESSION", "bz2")
+    with pytest.raises(ValueError):
+        jsonl_io.resolve(str(tmp_path / "other.jsonl"))
+
+def test_skip_bad_lines(tmp_path):
+    path = tmp_path / "day.jsonl"
+    path.write_text(jsonl_io.dumps(ROWS[0]) + "\n\n" + '{"id": "2508.0', encoding="utf-8")
+    assert jsonl_io.read_jsonl(str(path), skip_bad=True) == ROWS[:1]
+    with pytest.raises(ValueError):   # json.JSONDecodeError / orjson.JSONDecodeError
+        jsonl_io.read_jsonl(str(path))
+
+def test_mixed_formats_resolve_to_newest(tmp_path):
+    plain, gz = str(tmp_path / "a.jsonl"), str(tmp_path / "a.jsonl.gz")
+    jsonl_io.write_jsonl(ROWS[:1], plain)
+    with jsonl_io.open_text(gz, "w") as f:   # 直接写入，不经 write_jsonl，模拟迁移中途两种格式并存
+        f.write(jsonl_io.dumps(ROWS[1]) + "\n")
+    touch(plain, 1_000_000)
+    touch(gz, 2_000_000)
+    assert jsonl_io.resolve(plain) == gz
+    assert jsonl_io.read_jsonl(plain) == ROWS[1:]
+    touch(plain, 3_000_000)
+    assert jsonl_io.resolve(plain) == plain
+
+def test_glob_returns_one_file_per_logical_path(tmp_path):
+    jsonl_io.write_jsonl(ROWS, str(tmp_path / "2025-08-04.jsonl.gz"))
+    jsonl_io.write_jsonl(ROWS, str(tmp_path / "2025-08-01.jsonl"))
+    with jsonl_io.open_text(str(tmp_path / "2025-08-01.jsonl.gz"), "w") as f:
+        f.write(jsonl_io.dumps(ROWS[0]) + "\n")
+    touch(str(tmp_path / "2025-08-01.jsonl"), 1_000_000)
+    found = jsonl_io.glob_jsonl(str(tmp_path / "*.jsonl"))
+    assert [os.path.basename(p) for p in found] == ["2025-08-01.jsonl.gz", "2025-08-04.jsonl.gz"]
+
+def test_write_removes_other_variants(tmp_path):
+    jsonl_io.write_jsonl(ROWS, str(tmp_path / "a.jsonl"))
+    jsonl_io.write_jsonl(ROWS[:1], str(tmp_path / "a.jsonl.gz"))
+    assert sorted(os.listdir(tmp_path)) == ["a.jsonl.gz"]
+    assert jsonl_io.read_jsonl(str(tmp_path / "a.jsonl")) == ROWS[:1]
+
+@pytest.mark.parametrize("codec", CODECS[1:])
+def test_migrate_then_read(tmp_path, codec):
+    lines = [jsonl_io.dumps(r) for r in ROWS]
+    for day in ("2025-08-01", "2025-08-04"):
+        path = tmp_path / f"{day}_AI_enhanced_Chinese.jsonl"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        touch(str(path), 1_700_000_000)
+    result = jsonl_io.migrate(str(tmp_path), codec)
+    assert result["files"] == 2 and result["bytes_after"] > 0
+    suffix = jsonl_io.SUFFIXES[codec]
+    assert sorted(os.listdir(tmp_path)) == [f"2025-08-01_AI_enhanced_Chinese{suffix}",
+                                            f"2025-08-04_AI_enhanced_Chinese{suffix}"]
+    for path in jsonl_io.glob_jsonl(str(tmp_path / "*_AI_enhanced_Chinese.jsonl")):
+        assert path.endswith(suffix)
+        assert os.stat(path).st_mtime == 1_700_000_000
+        assert jsonl_io.read_jsonl(path) == ROWS
+        assert jsonl_io.decompressed(path) == ("\n".join(lines) + "\n").encode("utf-8")
+    assert jsonl_io.migrate(str(tmp_path), codec) == {"files": 0}
+
+def test_migrate_keep_leaves_original(tmp_path):
+    path = tmp_path / "day.jsonl"
+    jsonl_io.write_jsonl(ROWS, str(path))
+    jsonl_io.migrate(str(tmp_path), "gz", keep=True)
+    assert sorted(os.listdir(tmp_path)) == ["day.jsonl", "day.jsonl.gz"]
+    assert jsonl_io.read_jsonl(str(path)) == ROWS
@@ -0,0 +1,50 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from insightarxiv import pipeline, stages
+
+def write(root, rel, text):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+class ScriptStage(pipeline.Stage):
+    name = "script"
+    code = ("tool/main.py", "tool/prompt.txt")
+
+    def run(self, ctx):
+        return None, True
+
+def test_editing_an_imported_module_changes_the_key(tmp_path):
+    root = str(tmp_path)
+    write(root, "tool/main.py", "import json\nimport helper\n\ndef run():\n    from pkg import sub\n")
+    write(root, "tool/helper.py", "from pkg.util import X\n")
+    write(root, "tool/prompt.txt", "p")
+    write(root, "pkg/__init__.py", "")
+    write(root, "pkg/sub.py", "from . import util\n")
+    write(root, "pkg/util.py", "X = 1\n")
+    write(root, "pkg/unused.py", "")
+    assert pipeline.local_imports(root, ScriptStage.code) == [
+        "pkg/__init__.py", "pkg/sub.py", "pkg/util.py", "tool/helper.py", "tool/main.py", "tool/prompt.txt"]
+
+    def key():
+        return pipeline.Context(root, "2025-08-01", SimpleNamespace(), [ScriptStage()]).stage_key(ScriptStage())
+    before = key()
+    write(root, "pkg/unused.py", "Y = 2\n")
+    assert key() == before
+    write(root, "pkg/util.py", "X = 2\n")   # 只被间接导入的模块
+    assert key() != before
+
+def test_stage_code_covers_script_imports():
+    files = {s.name: pipeline.local_imports(stages.ROOT, s.code) for s in stages.default_stages()}
+    assert {"daily_arxiv/http_cache.py", "daily_arxiv/meta_db.py", "insightarxiv/jsonl_io.py"} <= set(files["fetch"])
+    assert {"ai/telemetry.py", "ai/planner.py", "insightarxiv/jsonl_io.py", "insightarxiv/record.py"} <= set(files["enhance"])
+
+def test_stage_without_run_cannot_be_instantiated():
+    class Incomplete(pipeline.Stage):
+        name = "incomplete"
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+
+import pytest
+
+from insightarxiv import jsonl_io, record
+from insightarxiv.record import Paper
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ai"))
+
+# data/ 中按年代出现过的几种记录布局
+OLD = {"id": "2503.13531", "pdf": "https://arxiv.org/pdf/2503.13531", "abs": "https://arxiv.org/abs/2503.13531",
+       "authors": ["Jin Kim"], "title": "Art Evolution", "categories": ["cs.CV", "cs.AI"], "comment": None,
+       "summary": "abstract text", "AI": {"tldr": "一句话"}}
+FEED = {"id": "2506.07001v1", "title": "Splatting", "authors": ["A", "B"], "categories": ["cs.GR", "cs.CV"],
+        "primary_category": "cs.GR", "pdf_link": "http://arxiv.org/pdf/2506.07001v1", "comments": "10 pages",
+        "url": "http://arxiv.org/abs/2506.07001v1", "summary": "text", "comment": "", "pdf_url": None,
+        "cate": "cs.GR", "date": "2025-06-09", "updated": "2025-06-08T17:59:59Z"}
+CATE = {"id": "2506.07002", "title": "T", "authors": ["C"], "summary": "s", "comment": None, "cate": "cs.CL",
+        "url": "https://arxiv.org/abs/2506.07002"}
+
+def test_from_dict_aliases():
+    p = Paper.from_dict(OLD)
+    assert (p.url, p.pdf_url, p.abstract, p.comment) == (OLD["abs"], OLD["pdf"], "abstract text", None)
+    p = Paper.from_dict(FEED)
+    assert p.comment == "10 pages"   # comment 为空时取 comments
+    assert p.pdf_url == FEED["pdf_link"]
+    assert (p.primary_category, p.primary) == ("cs.GR", "cs.GR")
+    p = Paper.from_dict(CATE)
+    assert (p.categories, p.primary_category) == (["cs.CL"], "cs.CL")
+    p = Paper.from_dict({"id": "x", "abstract": "a", "authors": "A, B", "categories": "cs.CV cs.LG",
+                         "AI": {"results": "r"}})
+    assert (p.abstract, p.authors, p.categories, p.ai) == ("a", ["A", "B"], ["cs.CV", "cs.LG"], {"result": "r"})
+    with pytest.raises(TypeError):
+        Paper.from_dict(["not", "an", "object"])
+
+@pytest.mark.parametrize("row", [OLD, FEED, CATE])
+def test_to_dict_keeps_original_keys(row):
+    line = json.dumps(row, ensure_ascii=False)
+    assert json.dumps(record.decode(line).to_dict(), ensure_ascii=False) == line
+    assert jsonl_io.dumps(record.decode(line).to_dict()) == line
+
+def test_new_fields_are_appended():
+    raw = dict(CATE)
+    p = Paper.from_dict(raw)
+    p.ai = {"tldr": "t"}
+    p.comment = "updated"
+    d = p.to_dict()
+    assert list(d) == list(raw) + ["AI"]
+    assert d["comment"] == "updated" and d["cate"] == "cs.CL" and "categories" not in d
+
+def test_constructed_paper_is_canonical():
+    p = Paper("2508.00001v2", "T", ["A"], "abs", None, ["cs.CV"], url="u", ai={"tldr": "t"})
+    assert p.to_dict() == {"id": "2508.00001v2", "title": "T", "authors": ["A"], "categories": ["cs.CV"],
+                           "url": "u", "summary": "abs", "comment": None, "AI": {"tldr": "t"}}
+    assert (p.base_id, p.version) == ("2508.00001", 2)
+
+def test_unchanged_enhanced_file_is_not_rewritten(tmp_path):
+    enhance = pytest.importorskip("enhance")
+    path = tmp_path / "2025-03-19_AI_enhanced_Chinese.jsonl"
+    rows = [OLD, dict(CATE, AI={"tldr": "二"})]
+    # 历史文件有的按 ensure_ascii=True 写出，行序也与原始数据不同
+    path.write_text("".join(json.dumps(r) + "\n" for r in reversed(rows)), encoding="utf-8")
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    before = path.read_bytes()
+    papers = [Paper.from_dict({k: v for k, v in r.items() if k != "AI"}) for r in rows]
+    for p, r in zip(papers, rows):
+        p.ai = r["AI"]
+    assert enhance.write_jsonl(papers, str(path)) == str(path)
+    assert path.read_bytes() == before and os.stat(path).st_mtime == 1_700_000_000
+    papers[1].ai = {"tldr": "改"}
+    enhance.write_jsonl(papers, str(path))
+    assert [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines()] == [p.to_dict() for p in papers]
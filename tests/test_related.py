@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from insightarxiv import related
+
+@pytest.fixture(scope="module")
+def corpus():
+    X, terms, df = related.term_matrix(*related.synthetic_hashes(3000, seed=1))
+    return X, terms, df
+
+def brute_topk(n, i, j, score, k):
+    idx, out = related.empty_topk(n, k)
+    lists = [[] for _ in range(n)]
+    for a, b, s in zip(i, j, score):
+        lists[a].append((-s, b))
+        lists[b].append((-s, a))
+    for r, items in enumerate(lists):
+        items = [t for t in sorted(items) if t[0] < 0][:k]
+        idx[r, :len(items)] = [b for _, b in items]
+        out[r, :len(items)] = [-s for s, _ in items]
+    return idx, out
+
+def test_candidate_pairs_are_unique_and_ordered(corpus):
+    X, terms, df = corpus
+    i, j = related.candidate_pairs(*related.signatures(X, df), X.shape[0])
+    key = i.astype(np.int64) * X.shape[0] + j
+    assert len(i) > 0 and (i < j).all() and (np.diff(key) > 0).all()
+
+def test_pairs_topk_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(related, "ROW_CHUNK", 7)   # 跨多个论文区间
+    rng = np.random.default_rng(0)
+    key = np.unique(rng.integers(0, 40 * 40, 300))
+    i, j = key // 40, key % 40
+    keep = i < j
+    i, j = i[keep].astype(np.int32), j[keep].astype(np.int32)
+    score = (rng.permutation(len(i)) / len(i)).astype(np.float32)
+    score[::9] = 0               # 零分不算近邻
+    idx, out = related.pairs_topk(40, i, j, score, 5)
+    want_idx, want_out = brute_topk(40, i, j, score, 5)
+    assert (idx == want_idx).all() and (out == want_out).all()
+
+def test_lsh_recall_and_incremental_rows(corpus):
+    X, terms, df = corpus
+    n, k = X.shape[0], 10
+    exact_idx, exact_score = related.exact_topk(X, np.arange(n), k, 1)
+    lsh_idx, _ = related.lsh_topk(X, terms, df, k, 1)
+    hits = sum(len(set(a[a >= 0]) & set(b[b >= 0])) for a, b in zip(exact_idx, lsh_idx))
+    assert hits / (exact_idx >= 0).sum() > 0.7
+
+    # 已有论文只与彼此比较过；并入 100 篇新论文后应与全量精确结果相同
+    old = 2900
+    head = X[:old]
+    idx, score = related.exact_topk(head, np.arange(old), k, 1)
+    pad_idx, pad_score = related.empty_topk(n - old, k)
+    idx, score = related.add_rows(X, np.concatenate([idx, pad_idx]), np.concatenate([score, pad_score]),
+                                  np.arange(old, n), k)
+    assert (idx == exact_idx).all() and np.allclose(score, exact_score)
@@ -0,0 +1,85 @@
+import os
+import shutil
+
+from insightarxiv import jsonl_io, trends
+
+def paper(pid, cats, keywords):
+    return {"id": pid, "title": "T", "authors": ["A"], "categories": cats, "summary": "s",
+            "AI": {"tldr": "t", "keywords": keywords}}
+
+DAYS = {
+    "2025-07-30": [paper("2507.00001v1", ["cs.CV", "I.4.8"], "3D Gaussian Splatting, NeRF"),
+                   paper("2507.00002v1", ["cs.CL"], "大型语言模型，RL"),
+                   paper("2507.00002v2", ["cs.CL"], "大型语言模型")],   # 同一天同一论文只计先出现的一行
+    "2025-08-01": [paper("2508.00003v1", ["cs.LG", "cs.AI"], "rl, 大型语言模型."),
+                   paper("2508.00004v1", ["cs.CV"], "ERROR")],
+    "2025-08-04": [paper("2508.00005v1", ["cs.CV"], "3d gaussian  splatting")],
+}
+
+def write_day(data_dir, day, rows=None, language="Chinese"):
+    jsonl_io.write_jsonl(rows or DAYS[day], os.path.join(data_dir, f"{day}_AI_enhanced_{language}.jsonl"))
+
+def contents(out_dir):
+    out = {}
+    for name in sorted(os.listdir(out_dir)):
+        with open(os.path.join(out_dir, name), "rb") as f:
+            out[name] = f.read()
+    return out
+
+def test_incremental_output_matches_rebuild(tmp_path):
+    data, inc, full = str(tmp_path / "data"), str(tmp_path / "inc"), str(tmp_path / "full")
+    for day in ("2025-07-30", "2025-08-01"):
+        write_day(data, day)
+    trends.update(data, inc, floor=1)
+    july = contents(inc)["days-2025-07.json"]
+
+    write_day(data, "2025-08-04")
+    r = trends.update(data, inc, floor=1)
+    assert r["counted"] == ["2025-08-04"]
+    assert "days-2025-07.json" not in r["written"] and contents(inc)["days-2025-07.json"] == july
+    assert trends.update(data, inc, floor=1)["written"] == []
+
+    rebuilt = str(tmp_path / "rebuilt")
+    shutil.copytree(data, rebuilt)
+    for path in os.listdir(rebuilt):
+        if path.endswith(trends.SIDECAR_SUFFIX):
+            os.remove(os.path.join(rebuilt, path))
+    assert len(trends.update(rebuilt, full, floor=1, rebuild=True)["counted"]) == 3
+    assert contents(inc) == contents(full)
+
+    sidecar = trends.load_sidecar(trends.sidecar_path(data, "2025-07-30_AI_enhanced_Chinese.jsonl"))
+    assert sidecar["total"] == 2
+    assert sidecar["categories"] == {"cs.CL": 1, "cs.CV": 1}   # I.4.8 不是 arXiv 分类
+    assert sidecar["keywords"] == {"3d gaussian splatting": 1, "nerf": 1, "rl": 1, "大型语言模型": 1}
+
+def test_changed_and_removed_days_match_rebuild(tmp_path):
+    data, inc, full = str(tmp_path / "data"), str(tmp_path / "inc"), str(tmp_path / "full")
+    for day in DAYS:
+        write_day(data, day)
+    trends.update(data, inc, floor=1)
+    write_day(data, "2025-08-01", DAYS["2025-08-01"][:1])
+    os.remove(jsonl_io.resolve(os.path.join(data, "2025-07-30_AI_enhanced_Chinese.jsonl")))
+    r = trends.update(data, inc, floor=1)
+    assert (r["counted"], r["removed"]) == (["2025-08-01"], ["2025-07-30"])
+    assert not os.path.exists(os.path.join(inc, "days-2025-07.json"))
+    trends.update(data, full, floor=1, rebuild=True)
+    assert contents(inc) == contents(full)
+
+def test_languages_keep_separate_sidecars(tmp_path):
+    data = str(tmp_path / "data")
+    for day in ("2025-07-30", "2025-08-01"):
+        write_day(data, day)
+    write_day(data, "2025-08-01", DAYS["2025-08-01"][:1], language="English")
+    english = "*_AI_enhanced_English.jsonl"
+    r = trends.update(data, str(tmp_path / "en"), english, floor=1)
+    assert (r["days"], r["counted"], r["removed"]) == (1, ["2025-08-01"], [])
+    chinese = sorted(p for p in os.listdir(data) if p.endswith("_Chinese" + trends.SIDECAR_SUFFIX))
+    assert chinese == []         # 英文更新不读中文文件
+    assert trends.update(data, str(tmp_path / "zh"), floor=1)["counted"] == ["2025-07-30", "2025-08-01"]
+    assert trends.update(data, str(tmp_path / "en"), english, floor=1)["counted"] == []
+    en = trends.load_sidecar(trends.sidecar_path(data, "2025-08-01_AI_enhanced_English.jsonl"))
+    zh = trends.load_sidecar(trends.sidecar_path(data, "2025-08-01_AI_enhanced_Chinese.jsonl"))
+    assert (en["total"], zh["total"]) == (1, 2)
+    os.remove(jsonl_io.resolve(os.path.join(data, "2025-08-01_AI_enhanced_English.jsonl")))
+    assert trends.update(data, str(tmp_path / "en"), english, floor=1)["removed"] == ["2025-08-01"]
+    assert trends.update(data, str(tmp_path / "zh"), floor=1)["counted"] == []   # 中文 sidecar 未被删除
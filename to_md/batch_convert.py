@@ -0,0 +1,188 @@
+"""
+batch_convert.py — 批量重渲染每日报告（进程池 + 变更检测）
+
+修改 paper_template.md 等之后，不必逐天调用 convert.py：
+- 按日期范围（--dates START END）或 glob（--glob）选取 data/<日期>_AI_enhanced_<语言>.jsonl，
+  在进程池中并行渲染为 <out-dir>/<日期>.md（各进程只编译一次模板）；
+- 每天的渲染键 = 输入 JSONL 的哈希 + 模板哈希 + 渲染器（convert / convert_revised）及其版本 RENDERER_VERSION
+  + 影响分类排序的 CATEGORIES；与上次记录（<out-dir>/.render_manifest.json）相同且输出文件仍在时直接跳过，
+  输入文件的 size / mtime 未变时连哈希都不重算；
+- 渲染结果与已有文件内容相同时不写盘（文件 mtime 不变，git 也不会看到改动），否则原子替换；
+- 渲染过的日期同时写出摘要 sidecar 并合并进 <out-dir>/catalog.json（见 catalog.py）；缺 sidecar 的日期不跳过。
+
+用法：
+  python to_md/batch_convert.py                                   # data/ 下全部日期
+  python to_md/batch_convert.py --dates 2025-07-01 2025-07-31 --workers 8
+  python to_md/batch_convert.py --glob "data/2025-08-*_AI_enhanced_Chinese.jsonl" --force
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
+
+import catalog
+from report_model import summarize
+from template_engine import RENDERER_VERSION, compile_template
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 仓库根目录：共享的 insightarxiv 包
+from insightarxiv import jsonl_io
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RE_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+MANIFEST = ".render_manifest.json"
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="批量渲染每日 Markdown 报告（并行，未变化的日期跳过）。")
+    parser.add_argument("--data", default="data", help="JSONL 所在目录")
+    parser.add_argument("--out-dir", default=None, help="报告输出目录（默认与 --data 相同）")
+    parser.add_argument("--dates", nargs=2, metavar=("START", "END"), help="日期范围（YYYY-MM-DD，含两端）")
+    parser.add_argument("--glob", default=None, help="直接给出输入文件的 glob（优先于 --dates）")
+    parser.add_argument("--language", default=os.environ.get("LANGUAGE", "Chinese"), help="增强文件的语言后缀")
+    parser.add_argument("--template", default=os.path.join(HERE, "paper_template.md"), help="单篇论文的模板文件路径")
+    parser.add_argument("--renderer", choices=["convert", "convert_revised"], default="convert", help="使用的报告格式")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="进程数")
+    parser.add_argument("--force", action="store_true", help="忽略渲染记录，全部重新渲染（内容未变的文件仍不写盘）")
+    return parser.parse_args()
+
+def select_inputs(args):
+    """返回 [(日期, 输入路径)]，按日期排序。"""
+    if args.glob:
+        paths = jsonl_io.glob_jsonl(args.glob)
+    else:
+        paths = jsonl_io.glob_jsonl(os.path.join(args.data, f"*_AI_enhanced_{args.language}.jsonl"))
+    found = {}
+    for p in paths:
+        m = RE_DATE.search(os.path.basename(p))
+        if m:
+            found[m.group(1)] = p
+    if args.dates and not args.glob:
+        start, end = (date.fromisoformat(d) for d in args.dates)
+        wanted = {(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)}
+        found = {d: p for d, p in found.items() if d in wanted}
+    return sorted(found.items())
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+# ─────────────── 工作进程 ───────────────
+_RENDERER = None
+_TEMPLATE = None
+
+def _init_worker(renderer, template_text):
+    global _RENDERER, _TEMPLATE
+    _RENDERER = __import__(renderer)
+    _TEMPLATE = compile_template(template_text)
+
+def render_day(date_str, input_path, output_path):
+    """渲染一天；内容与现有文件相同则不写。返回 (日期, 状态, 论文数, 耗时, 摘要)。"""
+    t0 = time.perf_counter()
+    data = _RENDERER.load_jsonl_data(input_path)
+    buf = StringIO()
+    if data:
+        _RENDERER.write_report(buf, data, _TEMPLATE, date_str)
+    else:
+        buf.write(_RENDERER.empty_report(date_str))
+    content = buf.getvalue()
+    try:
+        with open(output_path, encoding="utf-8", newline="") as f:
+            unchanged = f.read() == content
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        tmp = output_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp, output_path)
+    summary = summarize(date_str, os.path.basename(output_path), data)
+    return date_str, "unchanged" if unchanged else "written", len(data or []), time.perf_counter() - t0, summary
+
+def main():
+    args = parse_arguments()
+    out_dir = args.out_dir or args.data
+    os.makedirs(out_dir, exist_ok=True)
+    inputs = select_inputs(args)
+    if not inputs:
+        print("信息: 没有匹配的输入文件")
+        return
+
+    with open(args.template, encoding="utf-8") as f:
+        template_text = f.read()
+    # 渲染键的公共部分：模板、渲染器及其版本、分类排序偏好
+    common = hashlib.sha256("\0".join([
+        template_text, args.renderer, RENDERER_VERSION,
+        os.environ.get('CATEGORIES', 'cs.CV,cs.CL,cs.LG,cs.AI,stat.ML,eess.IV'),
+    ]).encode("utf-8")).hexdigest()
+
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = load_manifest(manifest_path)
+    todo, skipped = [], 0
+    for date_str, path in inputs:
+        st = os.stat(path)
+        prev = manifest.get(date_str, {})
+        stamp = [st.st_size, st.st_mtime_ns]
+        input_hash = prev["input_hash"] if prev.get("stamp") == stamp and prev.get("input_hash") else file_hash(path)
+        key = hashlib.sha256(f"{input_hash}:{common}".encode()).hexdigest()
+        output_path = os.path.join(out_dir, f"{date_str}.md")
+        if (not args.force and prev.get("key") == key and os.path.exists(output_path)
+                and os.path.exists(catalog.summary_path(out_dir, date_str))):
+            skipped += 1
+            continue
+        todo.append((date_str, path, output_path, {"input": os.path.basename(path), "stamp": stamp,
+                                                   "input_hash": input_hash, "key": key}))
+
+    print(f"📚 {len(inputs)} 天：跳过 {skipped} 天（输入 / 模板 / 渲染器均未变），待渲染 {len(todo)} 天"
+          f"（{args.renderer} v{RENDERER_VERSION}，{min(args.workers, max(1, len(todo)))} 进程）")
+    t0 = time.perf_counter()
+    written = unchanged = failed = 0
+    summaries = []
+    if todo:
+        pending = {entry[0]: entry[3] for entry in todo}
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.renderer, template_text)) as pool:
+            futures = [pool.submit(render_day, d, p, o) for d, p, o, _ in todo]
+            for fut in as_completed(futures):
+                try:
+                    date_str, status, n, secs, summary = fut.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"错误: 渲染失败：{e}", file=sys.stderr)
+                    continue
+                manifest[date_str] = pending[date_str]
+                summaries.append(summary)
+                if status == "written":
+                    written += 1
+                    print(f"  ✍️ {date_str}: {n} 篇（{secs * 1000:.0f} ms）")
+                else:
+                    unchanged += 1
+        save_manifest(manifest_path, manifest)
+        catalog.record(out_dir, summaries)
+    print(f"✅ 写入 {written} 个，内容未变 {unchanged} 个，跳过 {skipped} 个"
+          + (f"，失败 {failed} 个" if failed else "") + f"，用时 {time.perf_counter() - t0:.1f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
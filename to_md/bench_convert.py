@@ -0,0 +1,190 @@
+"""
+bench_convert.py — 报告渲染基准：编译模板 + 按分类流式写出（convert.py / convert_revised.py）vs 旧实现
+
+旧实现（逐个 str.replace 填模板、`+=` 拼接整份报告、最后 strip 再一次写出）原样保留在本文件中作为对照。
+对 data/ 中最大的若干个 *_AI_enhanced_*.jsonl：
+- 校验新旧输出逐字节一致（任一不一致则退出码为 1）；
+- 分别计时（取最快一次），--memory 时另用 tracemalloc 统计峰值内存。
+
+用法：
+  python to_md/bench_convert.py                     # 最大的 3 天
+  python to_md/bench_convert.py --top 5 --repeat 5 --memory --json convert_bench.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+import convert
+import convert_revised
+from insightarxiv import jsonl_io
+from insightarxiv.record import Paper
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ─────────────── 旧实现（对照） ───────────────
+def legacy_fill(template, context):
+    content = template
+    for key, value in context.items():
+        content = content.replace(f"{{{key}}}", str(value or ''))
+    return content
+
+def legacy_context(idx, paper, ai_data, cate):
+    return {
+        "idx": idx + 1, "id": paper.get("id", "N/A"), "title": paper.get("title", "N/A"),
+        "authors": ", ".join(paper.get("authors", ["N/A"])), "comment": paper.get("comment", "无"),
+        "categories": paper.get('all_categories_str', 'N/A'), "pdf_url": paper.get("pdf_url", "N/A"),
+        "cate": cate, "url": f"https://arxiv.org/abs/{paper.get('id', '')}", "updated": paper.get("updated", "N/A"),
+        "title_translation": ai_data.get('title_translation', 'N/A'), "keywords": ai_data.get('keywords', 'N/A'),
+        "tldr": ai_data.get('tldr', 'N/A'), "motivation": ai_data.get('motivation', 'N/A'),
+        "method": ai_data.get('method', 'N/A'), "conclusion": ai_data.get('conclusion', 'N/A'),
+        "ai_comment": ai_data.get('comments', 'N/A'), "results": ai_data.get('result', 'N/A'),
+        "ai_Abstract": ai_data.get('summary', 'N/A'), "abstract_translation": ai_data.get('translation', 'N/A'),
+    }
+
+def legacy_rank(preference):
+    return lambda c: preference.index(c) if c in preference else len(preference)
+
+def legacy_convert(data, template, date_str):
+    preference = [c.strip() for c in os.environ.get('CATEGORIES', 'cs.CV,cs.CL,cs.LG,cs.AI,stat.ML,eess.IV').split(',')]
+    papers_by_category = defaultdict(list)
+    for paper in data:
+        papers_by_category[(paper.get("categories") or [paper.get("cate")])[0] or "Uncategorized"].append(paper)
+    sorted_categories = sorted(papers_by_category.keys(), key=legacy_rank(preference))
+    rendered_papers = {}
+    for idx, paper in enumerate(data):
+        primary = (paper.get("categories") or [paper.get("cate")])[0] or "Uncategorized"
+        categories = paper.get("categories") or ([paper.get("cate")] if paper.get("cate") else []) or ["Uncategorized"]
+        paper['all_categories_str'] = ", ".join(categories)
+        rendered_papers[paper.get("id")] = legacy_fill(template, legacy_context(idx, paper, paper.get('AI', {}), primary))
+    toc_parts = [f"## 今日总计: {len(data)} 篇论文", "### 目录"]
+    for cate in sorted_categories:
+        toc_parts.append(f"- [{cate}](#{convert.slugify(cate)}) ({len(papers_by_category[cate])} 篇)")
+    content = ""
+    for cate in sorted_categories:
+        slug = convert.slugify(cate)
+        content += f"<a id='{slug}'></a>\n## {cate} \n\n"
+        for paper_data in papers_by_category[cate]:
+            if paper_data.get("id") in rendered_papers:
+                content += rendered_papers[paper_data.get("id")]
+                content += f"\n[⬆️ 返回分类顶部](#{slug}) | [⬆️ 返回总目录](#toc)\n\n---\n\n"
+    return (f"# AI-Enhanced arXiv Daily {date_str}\n\n" + "<a id='toc'></a>\n" + "\n".join(toc_parts) + "\n\n---\n"
+            + content.strip().removesuffix('---'))
+
+def legacy_revised(data, template, date_str):
+    preference = [c.strip() for c in os.environ.get('CATEGORIES', 'cs.CV,cs.CL,cs.LG,cs.AI,stat.ML,eess.IV').split(',')]
+    primary_papers, cross_references, all_categories = defaultdict(list), defaultdict(list), set()
+    for paper in data:
+        categories = paper.get("categories") or ([paper.get("cate")] if paper.get("cate") else []) or ["Uncategorized"]
+        paper['all_categories_str'] = ", ".join(categories)
+        primary_papers[categories[0]].append(paper)
+        all_categories.add(categories[0])
+        for secondary in categories[1:]:
+            cross_references[secondary].append({"id": paper.get("id"), "title": paper.get("title")})
+            all_categories.add(secondary)
+    sorted_categories = sorted(list(all_categories), key=legacy_rank(preference))
+    rendered_papers = {}
+    for idx, paper in enumerate(data):
+        card = legacy_fill(template, legacy_context(idx, paper, paper.get('AI', {}), paper.get("categories", ["N/A"])[0]))
+        rendered_papers[paper.get("id")] = f"<a id='{convert.slugify(paper.get('id'))}'></a>\n" + card
+    toc_parts = [f"## 今日总计: {len(data)} 篇独立论文", "### 目录"]
+    for cate in sorted_categories:
+        count = f"{len(primary_papers[cate])}"
+        if cross_references[cate]:
+            count += f" (+{len(cross_references[cate])} 篇交叉引用)"
+        toc_parts.append(f"- [{cate}](#{convert.slugify(cate)}) ({count})")
+    content = ""
+    for cate in sorted_categories:
+        slug = convert.slugify(cate)
+        content += f"<a id='{slug}'></a>\n## {cate} \n\n"
+        if primary_papers[cate]:
+            for paper_data in primary_papers[cate]:
+                if paper_data.get("id") in rendered_papers:
+                    content += rendered_papers[paper_data.get("id")]
+                    content += f"\n[⬆️ 返回分类顶部](#{slug}) | [⬆️ 返回总目录](#toc)\n\n---\n\n"
+        else:
+            content += "本分类下无主论文。\n\n"
+        if cross_references[cate]:
+            content += "*<small>亦可见于本分类 (来自其他主分类):</small>*\n"
+            for ref in cross_references[cate]:
+                content += f"- *<small><a href=\"#{convert.slugify(ref['id'])}\">{ref['title']}</a></small>*\n"
+            content += "\n---\n\n"
+    return (f"# AI-Enhanced arXiv Daily {date_str}\n\n" + "<a id='toc'></a>\n" + "\n".join(toc_parts) + "\n\n---\n"
+            + content.strip().removesuffix('---'))
+
+# ─────────────── 计时 ───────────────
+def run_legacy(fn, data, template_text, date_str, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(fn(data, template_text, date_str))
+
+def run_new(module, data, template_text, date_str, path):
+    with open(path, "w", encoding="utf-8") as f:
+        module.write_report(f, data, module.compile_template(template_text), date_str)
+
+def measure(fn, args, repeat, memory):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the compiled template renderer against the legacy convert code")
+    ap.add_argument("--data", default="data", help="数据目录")
+    ap.add_argument("--top", type=int, default=3, help="取最大的 N 个 *_AI_enhanced_*.jsonl")
+    ap.add_argument("--template", default=os.path.join(HERE, "paper_template.md"))
+    ap.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快一次）")
+    ap.add_argument("--memory", action="store_true", help="用 tracemalloc 统计峰值内存（单独再跑一次）")
+    ap.add_argument("--json", default=None, help="将结果另存为 JSON")
+    args = ap.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.data, "*_AI_enhanced_*.jsonl")), key=os.path.getsize, reverse=True)[:args.top]
+    if not files:
+        sys.exit(f"⚠️ {args.data} 中没有 *_AI_enhanced_*.jsonl")
+    template_text = open(args.template, encoding="utf-8").read()
+    tmp_old, tmp_new = os.path.join(args.data, ".bench_old.md"), os.path.join(args.data, ".bench_new.md")
+    ok, report = True, []
+    try:
+        for path in files:
+            data = jsonl_io.read_jsonl(path)             # 旧实现读原始 dict
+            papers = [Paper.from_dict(d) for d in data]  # 新实现读规范记录
+            date_str = os.path.basename(path)[:10]
+            for name, legacy, module in (("convert", legacy_convert, convert), ("convert_revised", legacy_revised, convert_revised)):
+                t_old, m_old = measure(run_legacy, (legacy, data, template_text, date_str, tmp_old), args.repeat, args.memory)
+                t_new, m_new = measure(run_new, (module, papers, template_text, date_str, tmp_new), args.repeat, args.memory)
+                same = open(tmp_old, "rb").read() == open(tmp_new, "rb").read()
+                ok &= same
+                row = {"file": os.path.basename(path), "renderer": name, "papers": len(data),
+                       "report_bytes": os.path.getsize(tmp_new), "identical": same,
+                       "legacy_seconds": round(t_old, 4), "new_seconds": round(t_new, 4), "speedup": round(t_old / t_new, 2)}
+                if args.memory:
+                    row |= {"legacy_peak_mb": round(m_old / 2**20, 1), "new_peak_mb": round(m_new / 2**20, 1)}
+                report.append(row)
+                mem = f" | 峰值 {row['legacy_peak_mb']} → {row['new_peak_mb']} MB" if args.memory else ""
+                print(f"{'✔' if same else '✘'} {row['file']:<36} {name:<16} {len(data):>5} 篇 "
+                      f"{row['report_bytes'] / 2**20:5.1f} MB | 旧 {t_old * 1000:7.1f} ms → 新 {t_new * 1000:7.1f} ms"
+                      f" | ×{row['speedup']}{mem}")
+    finally:
+        for p in (tmp_old, tmp_new):
+            if os.path.exists(p):
+                os.remove(p)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 结果保存至：{args.json}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
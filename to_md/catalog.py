@@ -0,0 +1,148 @@
+"""
+catalog.py — 每日报告的摘要 sidecar 与汇总目录（catalog）
+
+报告阶段（convert.py 的 summary 输出、batch_convert.py）每写一份 <日期>.md，就同时写出
+<日期>.summary.json（总数、各分类篇数、交叉引用数、目录），并把它增量合并进同目录的 catalog.json。
+update_readme.py 只读 catalog.json 生成仪表盘、日历与存档，不再列目录、也不再读取数 MB 的报告正文。
+
+catalog.json 的结构：{"version": 1, "days": {日期: {"report", "total", "categories": [[分类, 篇数], ...]}}}
+（目录行可由分类与篇数重建，只保存在 sidecar 中）。
+
+本模块只依赖标准库，既可在 to_md/ 内直接 import，也可在仓库根目录以 to_md.catalog 引入。
+
+用法（为没有 sidecar 的旧报告补建目录，只读每份报告开头的目录部分）：
+  python to_md/catalog.py --data data --rebuild
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+
+CATALOG = "catalog.json"
+SUMMARY_SUFFIX = ".summary.json"
+VERSION = 1
+RE_REPORT = re.compile(r"^(\d{4}-\d{2}-\d{2})\.md$")
+RE_TOTAL = re.compile(r"^## 今日总计: (\d+) 篇")
+RE_TOC_LINE = re.compile(r"^- \[(.+?)\]\(#[^)]*\) (?:\((\d+)|\[Total: (\d+)\])")   # convert.py 格式 / 早期英文格式
+RE_LEGACY_PAPER = re.compile(r"^### \[")   # 早期报告每篇论文的标题行
+
+def summary_path(data_dir, date_str):
+    return os.path.join(data_dir, date_str + SUMMARY_SUFFIX)
+
+def catalog_entry(summary):
+    return {"report": summary["report"], "total": summary["total"], "categories": summary["categories"]}
+
+def _write_json(path, obj, **kwargs):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, **kwargs)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def load_catalog(data_dir):
+    try:
+        with open(os.path.join(data_dir, CATALOG), encoding="utf-8") as f:
+            catalog = json.load(f)
+        if catalog.get("version") == VERSION:
+            return catalog
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": VERSION, "days": {}}
+
+def save_catalog(data_dir, catalog):
+    catalog["days"] = dict(sorted(catalog["days"].items()))
+    _write_json(os.path.join(data_dir, CATALOG), catalog, indent=1)
+
+def write_summary(data_dir, summary):
+    path = summary_path(data_dir, summary["date"])
+    _write_json(path, summary, indent=1)
+    return path
+
+def load_or_rebuild(data_dir):
+    """读取 catalog.json；还没有目录时（升级后的第一次运行）先由现有报告重建，避免目录里只剩新写的几天。"""
+    if not os.path.exists(os.path.join(data_dir, CATALOG)) and os.path.isdir(data_dir):
+        return rebuild(data_dir)[0]
+    return load_catalog(data_dir)
+
+def record(data_dir, summaries):
+    """写出各天的 sidecar，并把它们合并进 catalog.json（只改动这些日期的条目）。返回 sidecar 路径列表。"""
+    catalog = load_or_rebuild(data_dir)
+    paths = []
+    for summary in summaries:
+        paths.append(write_summary(data_dir, summary))
+        catalog["days"][summary["date"]] = catalog_entry(summary)
+    save_catalog(data_dir, catalog)
+    return paths
+
+def parse_report_head(path):
+    """从报告开头的目录解析摘要（供没有 sidecar 的旧报告使用），目录之后的正文不读。
+
+    支持 convert.py 的中文目录与早期的英文目录（`[Total: n]`）；更早的报告没有目录，只能通读一遍数论文标题行。"""
+    date_str = RE_REPORT.match(os.path.basename(path)).group(1)
+    total, categories, toc = None, [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            m = RE_TOTAL.match(line)
+            if m:
+                total = int(m.group(1))
+                continue
+            m = RE_TOC_LINE.match(line)
+            if m:
+                categories.append([m.group(1), int(m.group(2) or m.group(3))])
+                toc.append(line)
+            elif line == "---" or (toc and line.startswith(("<", "#"))):
+                break
+            elif line.startswith("### ["):   # 没有目录的早期报告
+                total = 1 + sum(1 for rest in f if RE_LEGACY_PAPER.match(rest))
+                break
+    if total is None:
+        total = sum(n for _, n in categories)
+    return {
+        "date": date_str,
+        "report": os.path.basename(path),
+        "total": total,
+        "categories": categories,
+        "cross_references": {},
+        "toc": toc,
+    }
+
+def rebuild(data_dir):
+    """按现有报告重建 catalog.json：有 sidecar 的直接读取，没有的解析报告目录并补写 sidecar。"""
+    catalog = {"version": VERSION, "days": {}}
+    parsed = 0
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.md"))):
+        m = RE_REPORT.match(os.path.basename(path))
+        if not m:
+            continue
+        try:
+            with open(summary_path(data_dir, m.group(1)), encoding="utf-8") as f:
+                summary = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            summary = parse_report_head(path)
+            write_summary(data_dir, summary)
+            parsed += 1
+        catalog["days"][summary["date"]] = catalog_entry(summary)
+    save_catalog(data_dir, catalog)
+    return catalog, parsed
+
+def main():
+    parser = argparse.ArgumentParser(description="维护每日报告的摘要目录 catalog.json。")
+    parser.add_argument("--data", default="data", help="报告所在目录")
+    parser.add_argument("--rebuild", action="store_true", help="按现有报告与 sidecar 重建目录")
+    args = parser.parse_args()
+    if not args.rebuild:
+        catalog = load_catalog(args.data)
+        print(f"📚 {os.path.join(args.data, CATALOG)}: {len(catalog['days'])} 天")
+        return
+    if not os.path.isdir(args.data):
+        print(f"错误: 目录不存在 {args.data}", file=sys.stderr)
+        sys.exit(1)
+    catalog, parsed = rebuild(args.data)
+    print(f"成功重建目录: {len(catalog['days'])} 天（其中 {parsed} 天由报告目录解析并补写 sidecar）")
+
+if __name__ == "__main__":
+    main()
@@ -3,48 +3,66 @@ import os
 import sys
 import argparse
 import re
-from collections import defaultdict
 from datetime import datetime
 
+import sinks
+from template_engine import compile_template
+from report_model import DayReport, slugify
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 仓库根目录：共享的 insightarxiv 包
+from insightarxiv import jsonl_io, record
+
 def parse_arguments():
     """解析命令行参数，与 run.yml 工作流保持一致。"""
     parser = argparse.ArgumentParser(description="将JSONL文件转换为功能完善的Markdown报告。")
     parser.add_argument("--input", type=str, required=True, help="输入的 JSONL 文件路径")
     parser.add_argument("--template", type=str, required=True, help="单篇论文的模板文件路径")
     parser.add_argument("--output", type=str, required=True, help="输出的 Markdown 文件路径")
+    parser.add_argument("--sinks", type=str, default="markdown,summary",
+                        help=f"逗号分隔的输出列表（可选：{', '.join(sinks.SINKS)}），同一次读取与渲染供所有输出共用")
+    parser.add_argument("--sink-dir", type=str, default=None, help="分类报告与订阅源的输出目录（默认与 --output 同目录）")
+    parser.add_argument("--site-url", type=str, default=os.environ.get("SITE_URL", ""), help="订阅源中报告链接的站点前缀（可用环境变量 SITE_URL）")
     return parser.parse_args()
 
 def load_jsonl_data(file_path):
     """从JSONL文件加载数据，处理文件不存在或为空的情况。"""
-    if not os.path.exists(file_path):
+    if not jsonl_io.exists(file_path):
         print(f"信息: 输入文件未找到 {file_path}", file=sys.stdout)
         return None
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = [json.loads(line) for line in f if line.strip()]
+        data = record.read_papers(file_path)   # 规范论文记录；按扩展名透明解压 .jsonl.gz / .jsonl.zst
         if not data:
             print(f"信息: JSONL文件为空 {file_path}.", file=sys.stdout)
             return None
         return data
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, TypeError) as e:   # TypeError：某行不是 JSON 对象
         print(f"错误: 解析JSONL文件失败 {file_path}: {e}", file=sys.stderr)
         return None
 
 def load_template(file_path):
-    """加载模板文件，处理文件未找到的错误。"""
+    """加载并编译模板文件，处理文件未找到的错误。"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+            return compile_template(f.read())
     except FileNotFoundError:
         print(f"错误: 模板文件未找到 {file_path}", file=sys.stderr)
         sys.exit(1)
 
-def slugify(text):
-    """为TOC创建健壮的、GitHub兼容的锚点链接。"""
-    text = str(text).lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s]+', '-', text)
-    return text
+empty_report = sinks.empty_report   # batch_convert.py 等沿用 convert.empty_report
+
+def write_report(out, data, paper_template, date_str):
+    """把完整报告写入文件对象 out（分组与卡片渲染见 report_model.DayReport，排版见 sinks.write_markdown）。"""
+    sinks.write_markdown(out, DayReport(data, paper_template, date_str))
+
+def render(data, paper_template, date_str, output, names=("markdown", "summary"), sink_dir=None, site_url=""):
+    """一次分组与渲染，写出 names 中的各个输出；返回 [(名字, 路径列表, 耗时秒)]。
+    没有论文时同样经过各个输出：空报告、总数为 0 的摘要、没有条目的订阅源。"""
+    options = {
+        "output": output,
+        "sink_dir": sink_dir or os.path.dirname(os.path.abspath(output)),
+        "site_url": site_url,
+    }
+    os.makedirs(options["sink_dir"], exist_ok=True)
+    return sinks.run_sinks(names, DayReport(data or [], paper_template, date_str), options)
 
 def main():
     """主函数，生成Markdown报告。"""
@@ -53,111 +71,26 @@ def main():
     date_match = re.search(r'(\d{4}-\d{2}-\d{2})', args.output)
     date_str = date_match.group(1) if date_match else datetime.now().strftime('%Y-%m-%d')
 
+    names = [s.strip() for s in args.sinks.split(",") if s.strip()]
+    unknown = [s for s in names if s not in sinks.SINKS]
+    if unknown:
+        print(f"错误: 未知的输出 {', '.join(unknown)}（可选：{', '.join(sinks.SINKS)}）", file=sys.stderr)
+        sys.exit(1)
+
     data = load_jsonl_data(args.input)
     paper_template = load_template(args.template)
 
-    if not data:
-        final_content = f"# AI-Enhanced arXiv Daily {date_str}\n\n"
-        final_content += "### 今日没有找到新论文。\n"
-        with open(args.output, "w", encoding='utf-8') as f:
-            f.write(final_content)
-        print(f"成功生成报告 (无新论文): {args.output}")
-        sys.exit(0)
-
-    # --- 数据分类和排序 ---
-    preference_str = os.environ.get('CATEGORIES', 'cs.CV,cs.CL,cs.LG,cs.AI,stat.ML,eess.IV')
-    preference = [cat.strip() for cat in preference_str.split(',')]
-    def rank(category):
-        try:
-            return preference.index(category)
-        except ValueError:
-            return len(preference)
-
-    papers_by_category = defaultdict(list)
-    for paper in data:
-        primary_category = (paper.get("categories") or [paper.get("cate")])[0] or "Uncategorized"
-        papers_by_category[primary_category].append(paper)
-    sorted_categories = sorted(papers_by_category.keys(), key=rank)
+    results = render(data, paper_template, date_str, args.output, names, args.sink_dir, args.site_url)
+    for name, paths, secs in results:
+        target = paths[0] if len(paths) == 1 else f"{len(paths)} 个文件"
+        print(f"  ✍️ {name}: {target}（{secs * 1000:.0f} ms）")
 
-    # --- Markdown 内容生成 ---
-    # 1. 预先渲染所有论文卡片
-    rendered_papers = {}
-    for idx, paper in enumerate(data):
-        ai_data = paper.get('AI', {})
-        primary_category = (paper.get("categories") or [paper.get("cate")])[0] or "Uncategorized" # 获取主分类，默认为 "Uncategorized"
-
-        # 兼容 "categories" 和 "cate" 字段
-        categories = paper.get("categories") or ([paper.get("cate")] if paper.get("cate") else [])
-        if not categories:
-            categories = ["Uncategorized"]
-            
-        paper['all_categories_str'] = ", ".join(categories) # 存储所有分类，用于模板显示
-        
-        # **核心修正**: 调整context字典的键名，以精确匹配paper_template.md中的占位符
-        context = {
-            "idx": idx + 1,
-            "id": paper.get("id", "N/A"),
-            "title": paper.get("title", "N/A"),
-            "authors": ", ".join(paper.get("authors", ["N/A"])),
-            "comment": paper.get("comment", "无"), # 作者备注
-            "categories": paper.get('all_categories_str', 'N/A'), # 使用我们创建的完整分类字符串
-            "pdf_url": paper.get("pdf_url", "N/A"), # PDF链接
-            "cate": primary_category,
-            "url": f"https://arxiv.org/abs/{paper.get('id', '')}",
-            "updated": paper.get("updated", "N/A"),          
-            
-            # AI 数据
-            "title_translation": ai_data.get('title_translation', 'N/A'),
-            "keywords": ai_data.get('keywords', 'N/A'),
-            "tldr": ai_data.get('tldr', 'N/A'),
-            "motivation": ai_data.get('motivation', 'N/A'),
-            "method": ai_data.get('method', 'N/A'),
-            "conclusion": ai_data.get('conclusion', 'N/A'),
-
-            # --- 已修正以下键名以匹配模板 ---
-            "ai_comment": ai_data.get('comments', 'N/A'),      # 模板需要 {ai_comment}
-            "results": ai_data.get('result', 'N/A'),           # 模板需要 {results}
-            "ai_Abstract": ai_data.get('summary', 'N/A'),      # 模板需要 {ai_Abstract}
-            "abstract_translation": ai_data.get('translation', 'N/A'), # 模板需要 {abstract_translation}
-        }
-        
-        # 填充模板
-        temp_paper_content = paper_template
-        for key, value in context.items():
-            # 使用 str(value or '') 确保即使值为None也能安全替换为空字符串
-            temp_paper_content = temp_paper_content.replace(f"{{{key}}}", str(value or ''))
-        rendered_papers[paper.get("id")] = temp_paper_content
-
-    # 2. 生成TOC (目录)
-    toc_parts = [f"## 今日总计: {len(data)} 篇论文", "### 目录"]
-    for cate in sorted_categories:
-        slug = slugify(cate)
-        toc_parts.append(f"- [{cate}](#{slug}) ({len(papers_by_category[cate])} 篇)")
-    
-    # 3. 按分类组装最终内容
-    content_by_category_str = ""
-    for cate in sorted_categories:
-        slug = slugify(cate)
-        # **已修改**: 使用 <small> 标签来缩小导航链接的字体
-        content_by_category_str += f"<a id='{slug}'></a>\n## {cate} \n\n"
-        
-        for paper_data in papers_by_category[cate]:
-            paper_id = paper_data.get("id")
-            if paper_id in rendered_papers:
-                content_by_category_str += rendered_papers[paper_id]
-                content_by_category_str += f"\n[⬆️ 返回分类顶部](#{slug}) | [⬆️ 返回总目录](#toc)\n\n---\n\n"
-
-    # 4. 组装最终的完整Markdown页面
-    report_title = f"# AI-Enhanced arXiv Daily {date_str}\n\n"
-    toc_anchor = "<a id='toc'></a>\n"
-    final_toc = "\n".join(toc_parts) + "\n\n---\n"
-    
-    final_content = report_title + toc_anchor + final_toc + content_by_category_str.strip().removesuffix('---')
-
-    with open(args.output, "w", encoding='utf-8') as f:
-        f.write(final_content)
-    
-    print(f"成功将 {len(data)} 篇论文转换为Markdown，并保存到 {args.output}")
+    if not data:
+        print(f"成功生成报告 (无新论文): {', '.join(names)}")
+    elif "markdown" in names:
+        print(f"成功将 {len(data)} 篇论文转换为Markdown，并保存到 {args.output}")
+    else:
+        print(f"成功将 {len(data)} 篇论文写出到 {len(names)} 个输出（{', '.join(names)}）")
 
 if __name__ == "__main__":
     main()
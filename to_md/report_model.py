@@ -0,0 +1,110 @@
+"""
+report_model.py — 一天报告的内存模型
+
+每天的增强 JSONL 只读一次：在这里完成按主分类分组、分类排序、交叉引用整理，并用编译后的模板
+预渲染全部论文卡片。完整报告、分类报告、订阅源等各个输出（sinks.py）共享同一个 DayReport，
+新增输出只需遍历已有的分组与卡片，不再重复读文件、渲染模板。
+
+论文为 insightarxiv.record.Paper（convert.load_jsonl_data 读入时已统一历史字段变体）。
+"""
+
+import os
+import re
+from collections import defaultdict
+
+def slugify(text):
+    """为TOC创建健壮的、GitHub兼容的锚点链接。"""
+    text = str(text).lower()
+    text = re.sub(r'[^\w\s-]', '', text)
+    text = re.sub(r'[\s]+', '-', text)
+    return text
+
+def category_preference():
+    preference_str = os.environ.get('CATEGORIES', 'cs.CV,cs.CL,cs.LG,cs.AI,stat.ML,eess.IV')
+    return [cat.strip() for cat in preference_str.split(',')]
+
+def primary_category_of(paper):
+    return paper.primary or "Uncategorized"
+
+def paper_context(idx, paper, primary_category):
+    """模板占位符 → 值（键名与 paper_template.md 中的占位符一一对应）。"""
+    ai_data = paper.ai or {}
+    return {
+        "idx": idx + 1,
+        "id": paper.id or "N/A",
+        "title": "N/A" if paper.title is None else paper.title,
+        "authors": ", ".join(paper.authors) or "N/A",
+        "comment": paper.comment, # 作者备注（None 渲染为空）
+        "categories": ", ".join(paper.categories) or "Uncategorized", # 完整分类字符串
+        "pdf_url": paper.pdf_url or "N/A", # PDF链接
+        "cate": primary_category,
+        "url": f"https://arxiv.org/abs/{paper.id or ''}",
+        "updated": "N/A" if paper.updated is None else paper.updated,
+
+        # AI 数据
+        "title_translation": ai_data.get('title_translation', 'N/A'),
+        "keywords": ai_data.get('keywords', 'N/A'),
+        "tldr": ai_data.get('tldr', 'N/A'),
+        "motivation": ai_data.get('motivation', 'N/A'),
+        "method": ai_data.get('method', 'N/A'),
+        "conclusion": ai_data.get('conclusion', 'N/A'),
+
+        # --- 已修正以下键名以匹配模板 ---
+        "ai_comment": ai_data.get('comments', 'N/A'),      # 模板需要 {ai_comment}
+        "results": ai_data.get('result', 'N/A'),           # 模板需要 {results}
+        "ai_Abstract": ai_data.get('summary', 'N/A'),      # 模板需要 {ai_Abstract}
+        "abstract_translation": ai_data.get('translation', 'N/A'), # 模板需要 {abstract_translation}
+    }
+
+def group_papers(data):
+    """按主分类分组并排序，同时整理交叉引用。返回 (papers_by_category, sorted_categories, cross_references)。"""
+    preference = category_preference()
+    def rank(category):
+        try:
+            return preference.index(category)
+        except ValueError:
+            return len(preference)
+
+    papers_by_category = defaultdict(list)
+    cross_references = defaultdict(list)   # 次要分类 → 主分类在别处的论文
+    for paper in data:
+        primary_category = primary_category_of(paper)
+        papers_by_category[primary_category].append(paper)
+        for secondary in paper.categories[1:]:
+            if secondary != primary_category:
+                cross_references[secondary].append(paper)
+    return papers_by_category, sorted(papers_by_category.keys(), key=rank), cross_references
+
+def build_summary(date_str, report_name, papers_by_category, sorted_categories, cross_references):
+    """报告的结构化摘要（catalog.py 的每日 sidecar）：总数、各分类篇数、交叉引用数与目录。"""
+    total = sum(len(papers) for papers in papers_by_category.values())
+    categories = [[cate, len(papers_by_category[cate])] for cate in sorted_categories]
+    return {
+        "date": date_str,
+        "report": report_name,
+        "total": total,
+        "categories": categories,
+        "cross_references": {cate: len(refs) for cate, refs in sorted(cross_references.items())},
+        "toc": [f"- [{cate}](#{slugify(cate)}) ({n} 篇)" for cate, n in categories],
+    }
+
+def summarize(date_str, report_name, data):
+    """不渲染卡片、只分组，得到与 DayReport.summary 相同的摘要（data 为空时总数为 0）。"""
+    return build_summary(date_str, report_name, *group_papers(data or []))
+
+class DayReport:
+    def __init__(self, data, paper_template, date_str):
+        self.data = data
+        self.date_str = date_str
+
+        # --- 数据分类和排序 ---
+        self.papers_by_category, self.sorted_categories, self.cross_references = group_papers(data)
+
+        # --- 预先渲染所有论文卡片（按 id；编译后的模板一次拼接完成，None 值渲染为空字符串） ---
+        self.rendered_papers = {}
+        for idx, paper in enumerate(data):
+            self.rendered_papers[paper.id] = paper_template.render(paper_context(idx, paper, primary_category_of(paper)))
+
+    def summary(self, report_name):
+        return build_summary(self.date_str, report_name, self.papers_by_category,
+                             self.sorted_categories, self.cross_references)
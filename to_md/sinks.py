@@ -0,0 +1,204 @@
+"""
+sinks.py — 一天的报告数据（report_model.DayReport）的各种输出
+
+所有输出共享 DayReport 中已分组的论文与预渲染的卡片，只负责各自的排版与写盘：
+- markdown     完整的每日报告（即 convert.py 的 --output，内容与之前逐字节一致）
+- category_md  每个分类一个 Markdown 文件：<sink-dir>/<日期>/<分类>.md（如 cs.CV.md），末尾附交叉引用
+- atom         Atom 订阅源：<sink-dir>/<日期>.atom.xml
+- jsonfeed     JSON Feed 1.1：<sink-dir>/<日期>.feed.json
+- summary      报告摘要 <sink-dir>/<日期>.summary.json，并增量更新 <sink-dir>/catalog.json（见 catalog.py）
+
+新增输出：写一个 `fn(report, options) -> [写出的路径]` 并用 `@register("名字")` 注册即可，
+convert.py 的 --sinks 会按名字调用。options 含 output / sink_dir / site_url。
+"""
+
+import os
+import re
+import json
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+import catalog
+from template_engine import ReportStream
+from report_model import slugify
+
+SINKS = {}
+XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")   # XML 1.0 不允许的字符（LaTeX 摘要里偶有 \b 等）
+
+def register(name):
+    def deco(fn):
+        SINKS[name] = fn
+        return fn
+    return deco
+
+def run_sinks(names, report, options):
+    """依次执行各输出，返回 [(名字, 写出的路径列表, 耗时秒)]。"""
+    results = []
+    for name in names:
+        t0 = time.perf_counter()
+        paths = SINKS[name](report, options)
+        results.append((name, paths, time.perf_counter() - t0))
+    return results
+
+def abs_url(paper):
+    return f"https://arxiv.org/abs/{paper.id or ''}"
+
+def title(paper):
+    return "N/A" if paper.title is None else paper.title
+
+def timestamp(paper, date_str):
+    """RFC 3339 时间：论文的 updated（通常只有日期），没有时用报告日期。"""
+    value = str(paper.updated or date_str)
+    return value if "T" in value else f"{value[:10]}T00:00:00Z"
+
+def tldr(paper):
+    return (paper.ai or {}).get("tldr") or paper.abstract or ""
+
+def xml_text(value):
+    return escape(XML_INVALID.sub("", str(value)))
+
+def xml_attr(value):
+    return quoteattr(XML_INVALID.sub("", str(value)))
+
+def category_filename(cate):
+    return str(cate).replace("/", "_") + ".md"
+
+def report_url(options, date_str, suffix=".md"):
+    site = (options.get("site_url") or "").rstrip("/")
+    return f"{site}/{date_str}{suffix}" if site else None
+
+# ─────────────── Markdown ───────────────
+def empty_report(date_str):
+    """当天没有论文时的报告内容。"""
+    return f"# AI-Enhanced arXiv Daily {date_str}\n\n### 今日没有找到新论文。\n"
+
+def write_markdown(out, report):
+    """完整报告写入文件对象 out：目录写完后按分类逐段写出正文；没有论文时写空报告。"""
+    if not report.data:
+        out.write(empty_report(report.date_str))
+        return
+    papers_by_category, rendered_papers = report.papers_by_category, report.rendered_papers
+
+    # 1. 生成TOC (目录)
+    toc_parts = [f"## 今日总计: {len(report.data)} 篇论文", "### 目录"]
+    for cate in report.sorted_categories:
+        slug = slugify(cate)
+        toc_parts.append(f"- [{cate}](#{slug}) ({len(papers_by_category[cate])} 篇)")
+
+    # 2. 写出标题与目录
+    report_title = f"# AI-Enhanced arXiv Daily {report.date_str}\n\n"
+    toc_anchor = "<a id='toc'></a>\n"
+    final_toc = "\n".join(toc_parts) + "\n\n---\n"
+    out.write(report_title + toc_anchor + final_toc)
+
+    # 3. 按分类逐段写出正文（ReportStream 负责去掉末尾多余的分隔线）
+    body = ReportStream(out)
+    for cate in report.sorted_categories:
+        slug = slugify(cate)
+        parts = [f"<a id='{slug}'></a>\n## {cate} \n\n"]
+        footer = f"\n[⬆️ 返回分类顶部](#{slug}) | [⬆️ 返回总目录](#toc)\n\n---\n\n"
+        for paper_data in papers_by_category[cate]:
+            paper_id = paper_data.id
+            if paper_id in rendered_papers:
+                parts.append(rendered_papers[paper_id])
+                parts.append(footer)
+        body.write("".join(parts))
+    body.close()
+
+@register("markdown")
+def markdown_sink(report, options):
+    with open(options["output"], "w", encoding="utf-8") as f:
+        write_markdown(f, report)
+    return [options["output"]]
+
+# ─────────────── 分类 Markdown ───────────────
+@register("category_md")
+def category_sink(report, options):
+    out_dir = os.path.join(options["sink_dir"], report.date_str)
+    paths = []
+    for cate in report.sorted_categories:
+        os.makedirs(out_dir, exist_ok=True)
+        papers = report.papers_by_category[cate]
+        path = os.path.join(out_dir, category_filename(cate))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {cate} — AI-Enhanced arXiv Daily {report.date_str}\n\n"
+                    f"<a id='top'></a>\n## 共 {len(papers)} 篇论文\n\n---\n")
+            body = ReportStream(f)
+            footer = "\n[⬆️ 返回顶部](#top)\n\n---\n\n"
+            for paper in papers:
+                paper_id = paper.id
+                if paper_id in report.rendered_papers:
+                    body.write(report.rendered_papers[paper_id] + footer)
+            refs = report.cross_references.get(cate)
+            if refs:
+                body.write("## 亦可见于本分类 (来自其他主分类)\n\n"
+                           + "".join(f"- [{title(p)}]({abs_url(p)})\n" for p in refs))
+            body.close()
+        paths.append(path)
+    return paths
+
+# ─────────────── 订阅源 ───────────────
+@register("atom")
+def atom_sink(report, options):
+    path = os.path.join(options["sink_dir"], f"{report.date_str}.atom.xml")
+    link = report_url(options, report.date_str)
+    updated = max((timestamp(p, report.date_str) for p in report.data), default=f"{report.date_str}T00:00:00Z")
+    parts = ['<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n',
+             f"  <title>AI-Enhanced arXiv Daily {report.date_str}</title>\n",
+             f"  <id>urn:insightarxiv:{report.date_str}</id>\n",
+             f"  <updated>{updated}</updated>\n"]
+    if link:
+        parts.append(f"  <link href={xml_attr(link)}/>\n")
+    for cate in report.sorted_categories:
+        for paper in report.papers_by_category[cate]:
+            card = report.rendered_papers.get(paper.id)
+            if card is None:
+                continue
+            parts.append("  <entry>\n"
+                         f"    <title>{xml_text(title(paper))}</title>\n"
+                         f"    <id>{xml_text(abs_url(paper))}</id>\n"
+                         f"    <link href={xml_attr(abs_url(paper))}/>\n"
+                         f"    <updated>{timestamp(paper, report.date_str)}</updated>\n")
+            parts.extend(f"    <author><name>{xml_text(a)}</name></author>\n" for a in paper.authors)
+            parts.extend(f"    <category term={xml_attr(c)}/>\n" for c in paper.categories or [cate])
+            parts.append(f"    <summary>{xml_text(tldr(paper))}</summary>\n"
+                         f"    <content type=\"text\">{xml_text(card)}</content>\n"
+                         "  </entry>\n")
+    parts.append("</feed>\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+    return [path]
+
+@register("jsonfeed")
+def jsonfeed_sink(report, options):
+    path = os.path.join(options["sink_dir"], f"{report.date_str}.feed.json")
+    feed = {"version": "https://jsonfeed.org/version/1.1",
+            "title": f"AI-Enhanced arXiv Daily {report.date_str}",
+            "items": []}
+    link = report_url(options, report.date_str)
+    if link:
+        feed["home_page_url"] = link
+        feed["feed_url"] = report_url(options, report.date_str, ".feed.json")
+    for cate in report.sorted_categories:
+        for paper in report.papers_by_category[cate]:
+            card = report.rendered_papers.get(paper.id)
+            if card is None:
+                continue
+            feed["items"].append({
+                "id": abs_url(paper),
+                "url": abs_url(paper),
+                "title": title(paper),
+                "summary": tldr(paper),
+                "content_text": card,
+                "date_published": timestamp(paper, report.date_str),
+                "authors": [{"name": a} for a in paper.authors],
+                "tags": paper.categories or [cate],
+            })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(feed, f, ensure_ascii=False, indent=1)
+    return [path]
+
+# ─────────────── 摘要与目录 ───────────────
+@register("summary")
+def summary_sink(report, options):
+    return catalog.record(options["sink_dir"], [report.summary(os.path.basename(options["output"]))])
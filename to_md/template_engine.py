@@ -0,0 +1,64 @@
+"""
+template_engine.py — 论文卡片模板的编译与渲染，以及报告的流式写出
+
+模板（如 paper_template.md）只在启动时编译一次：按 `{name}` 占位符切成“字面量 / 占位符”交替的片段，
+渲染每篇论文时只做一次 `"".join`，而不是对整个模板逐个 `str.replace`。
+
+与旧的逐个 replace 的差异：值中恰好含有 `{title}` 之类的文本时，旧实现会在后续 replace 中把它再替换一次，
+这里只替换模板本身的占位符；其余输出逐字节一致（未在 context 中给出的占位符原样保留，None / 空值渲染为空串）。
+"""
+
+import re
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+RENDERER_VERSION = "1"   # 报告格式版本：改动渲染逻辑、使同样的输入产生不同输出时递增（batch_convert.py 据此判断是否重渲染）
+
+class CompiledTemplate:
+    def __init__(self, text):
+        self.text = text
+        self.parts = []   # 字面量与占位符交替：偶数位为字面量，奇数位为占位符名
+        pos = 0
+        for m in PLACEHOLDER.finditer(text):
+            self.parts.append(text[pos:m.start()])
+            self.parts.append(m.group(1))
+            pos = m.end()
+        self.parts.append(text[pos:])
+        self.fields = tuple(self.parts[1::2])
+
+    def render(self, context):
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            key = parts[i]
+            if key in context:
+                parts[i] = str(context[key] or '')
+            else:
+                parts[i] = "{" + key + "}"
+        return "".join(parts)
+
+def compile_template(text):
+    return CompiledTemplate(text)
+
+class ReportStream:
+    """把报告正文分块写入文件，效果等同于对整段正文做 `.strip().removesuffix('---')` 后一次写出。
+
+    只有结尾的空白和紧挨着它的 3 个字符可能被裁掉，因此只暂存这一小段，其余内容随写随出。"""
+    def __init__(self, f):
+        self.f = f
+        self.tail = ""
+        self.started = False
+
+    def write(self, s):
+        if not self.started:
+            s = s.lstrip()
+            if not s:
+                return
+            self.started = True
+        tail = self.tail + s
+        keep = max(0, len(tail.rstrip()) - 3)
+        if keep:
+            self.f.write(tail[:keep])
+        self.tail = tail[keep:]
+
+    def close(self):
+        self.f.write(self.tail.rstrip().removesuffix('---'))
+        self.tail = ""
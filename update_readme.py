@@ -1,65 +1,46 @@
 import os
-import re
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 import calendar
 
+from to_md import catalog
+
 # --- 配置区 ---
 DATA_DIR = "data"
 README_PATH = "README.md"
 # 这是一个新的模板文件，定义了README的静态框架
 TEMPLATE_PATH = "readme_content_template.md" 
 
-def get_report_files():
-    """扫描data目录，获取所有报告文件并按日期降序排序。"""
-    files = []
-    for filename in os.listdir(DATA_DIR):
-        if re.match(r"\d{4}-\d{2}-\d{2}\.md$", filename):
-            files.append(os.path.join(DATA_DIR, filename))
-    files.sort(reverse=True)
-    return files
-
-def parse_report_toc(filepath):
-    """解析报告文件，提取其目录和总数。"""
-    summary = {"total": 0, "toc_lines": []}
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        total_match = re.search(r'## Total Papers Today: (\d+)', content)
-        if total_match:
-            summary["total"] = int(total_match.group(1))
+def load_report_catalog():
+    """读取报告目录 data/catalog.json（报告阶段增量维护），返回按日期降序排列的 [(日期, 条目)]。
 
-        toc_match = re.search(r'# Table of Contents\n\n(.*?)\n\n<hr>', content, re.DOTALL)
-        if toc_match:
-            summary["toc_lines"] = toc_match.group(1).strip().split('\n')
-        
-        return summary
-    except Exception:
-        return summary
+    目录还不存在时（旧数据），先由现有报告重建一次。"""
+    report_catalog = catalog.load_or_rebuild(DATA_DIR)
+    return sorted(report_catalog["days"].items(), reverse=True)
+
+def report_link(entry):
+    return f"{DATA_DIR}/{entry['report']}"
 
-def generate_dashboard_section(latest_file, recent_files):
-    """生成动态摘要仪表盘模块。"""
-    if not latest_file:
+def generate_dashboard_section(latest, recent):
+    """生成动态摘要仪表盘模块。latest / recent 为 catalog 中的 (日期, 条目)。"""
+    if not latest:
         return "## Latest Bulletin\n\nNo reports at the moment.\n"
 
-    latest_date_str = os.path.basename(latest_file).replace('.md', '')
-    report_summary = parse_report_toc(latest_file)
+    latest_date_str, latest_entry = latest
 
     dashboard_md = f"## **Latest Bulletin: {latest_date_str}**\n\n"
     
-    if report_summary["total"] > 0:
-        mini_toc = " | ".join([line.strip().replace("- [", "").split("]")[0] for line in report_summary["toc_lines"]])
-        dashboard_md += f"**Today's Topic Distribution:** {mini_toc}\n\n"
+    if latest_entry["total"] > 0 and latest_entry["categories"]:
+        mini_toc = " | ".join(f"{cate} ({count})" for cate, count in latest_entry["categories"])
+        dashboard_md += f"**Today's Topic Distribution ({latest_entry['total']} papers):** {mini_toc}\n\n"
 
-    dashboard_md += f"> [**Read the full report for {latest_date_str}...**](./{latest_file})\n"
+    dashboard_md += f"> [**Read the full report for {latest_date_str}...**](./{report_link(latest_entry)})\n"
 
     # 增加“本周回顾”
     dashboard_md += "\n---\n\n### **Past 7 Days**\n\n"
     # 我们只展示最近的6篇（不含今天）
-    for file in recent_files:
-        date_str = os.path.basename(file).replace('.md', '')
-        dashboard_md += f"- [{date_str}](./{file})\n"
+    for date_str, entry in recent:
+        dashboard_md += f"- [{date_str}](./{report_link(entry)}) ({entry['total']} papers)\n"
         
     return dashboard_md
 
@@ -104,21 +85,20 @@ def generate_archive_md(files_by_year_month):
     return md
 
 def main():
-    """主函数，生成并更新README.md。"""
-    report_files = get_report_files()
-    if not report_files:
+    """主函数，生成并更新README.md（只读 data/catalog.json，不再扫描目录、解析报告）。"""
+    reports = load_report_catalog()
+    if not reports:
         print("No report files found in the data directory.")
         return
 
     # --- 准备数据 ---
-    latest_report = report_files[0]
-    recent_reports = report_files[1:7] 
+    latest_report = reports[0]
+    recent_reports = reports[1:7] 
     
-    files_by_date = {os.path.basename(f).replace('.md', ''): f for f in report_files}
+    files_by_date = {date_str: report_link(entry) for date_str, entry in reports}
     files_by_year_month = defaultdict(lambda: defaultdict(list))
-    for f in report_files:
-        basename = os.path.basename(f)
-        year, month, _ = basename.split('-')
+    for date_str, f in files_by_date.items():
+        year, month, _ = date_str.split('-')
         files_by_year_month[int(year)][int(month)].append(f)
 
     # --- 生成各个模块 ---